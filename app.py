@@ -7,15 +7,24 @@ and rental recommendation logic for the RentSure web frontend.
 Run with: uvicorn app:app --reload
 """
 
-from fastapi import FastAPI, Depends
-from fastapi.responses import JSONResponse
+from startup import startup_profile
+
+import heapq
+import math
+import os
+
+from fastapi import FastAPI, Depends, Header, BackgroundTasks
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi import Path
-from typing import List, Dict, Any, Optional, Tuple
+from fastapi.concurrency import run_in_threadpool
+from fastapi import Path, Query
+from typing import List, Dict, Any, Optional, Sequence, Tuple
 from pydantic import BaseModel
 from uuid import uuid4
 from datetime import datetime
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+startup_profile.checkpoint("import: framework")
 
 # Import our custom modules
 from trust_score import calculate_trust_score
@@ -25,12 +34,31 @@ from rental_recommender import (
     recommend_rentals,
     calculate_rental_recommendation_score,
 )
+from geo_index import GeoIndex
+from commute_matrix import estimate_commute_minutes
+from facets import Filters, iter_rows, normalize_filters, row_test
+startup_profile.checkpoint("import: scoring")
 
 # Import auth modules
-from models import get_db, User, Tenant, Owner, Property, UserRole, engine, Base
+from models import get_async_read_db, User, Tenant, Owner, Property, UserRole, engine, read_engine, async_engine, async_read_engine
+import migrations
 from auth_routes import router as auth_router, owner_router
-from auth_utils import hash_password
+from auth_utils import hash_password, verify_admin_token
 from schemas import PropertyResponse
+from request_coalescing import SingleFlight
+from catalog_store import CatalogStore, IndexedCatalog, DEFAULT_CATALOG_PATH
+from catalog_reload import CatalogManager
+from exports import EXPORT_FORMATS, EXPORT_MEDIA_TYPES, encode_rows, export_filename
+startup_profile.checkpoint("import: models, auth & catalog")
+import metrics
+from metrics import MetricsMiddleware, SCORING_LATENCY
+import tracing
+from tracing import TracingMiddleware, span
+import query_audit
+import warmup
+from rate_limit import RateLimitMiddleware
+from profiling import ALLOCATION_GROUPINGS, DEFAULT_INTERVAL_MS, ProfilerBusy, allocation_sites, sample_stacks
+startup_profile.checkpoint("import: monitoring")
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -39,6 +67,11 @@ app = FastAPI(
     version="2.0.0"
 )
 
+# Per-client token buckets for /search*, /recommendations, /nearby, /map and
+# /auth/login, /auth/register* (RENTSURE_RATE_LIMIT_*). Added first so it runs innermost: 429s still get
+# CORS headers, but are sent before routing, body parsing or handler work.
+app.add_middleware(RateLimitMiddleware)
+
 # Enable CORS for frontend communication
 app.add_middleware(
     CORSMiddleware,
@@ -48,18 +81,51 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-route request counts, latency and DB usage for GET /metrics
+app.add_middleware(MetricsMiddleware)
+metrics.instrument_sqlalchemy()
+
+# Phase spans for sampled requests (RENTSURE_TRACE_SAMPLE_RATE)
+app.add_middleware(TracingMiddleware)
+tracing.instrument_sqlalchemy()
+
+# Slow-query log and per-request N+1 detection (RENTSURE_REPEATED_QUERY_MODE),
+# on the per-request statement tracking of MetricsMiddleware
+query_audit.instrument_sqlalchemy()
+
 # Include auth routes
 app.include_router(auth_router)
 app.include_router(owner_router)
 
+# Coalesces concurrent identical /recommendations and /search computations
+ranking_flight = SingleFlight()
+startup_profile.checkpoint("app setup")
+
 
 # ============================================================================
 # DATABASE INITIALIZATION & DEMO DATA SEEDING
 # ============================================================================
 
 @app.on_event("startup")
+def apply_migrations():
+    """Apply pending migrations when auto-migrate is on (SQLite by default); otherwise only warn"""
+    with startup_profile.phase("migrations"):
+        if migrations.auto_migrate_enabled(str(engine.url)):
+            migrations.upgrade(engine)
+            return
+        pending = migrations.pending_migrations(engine)
+        if pending:
+            print(f"⚠ {len(pending)} pending schema migration(s); run `python migrations.py`")
+
+
+@app.on_event("startup")
+def start_demo_seeding():
+    """Seed demo data in the background: it hashes passwords (pbkdf2)"""
+    startup_profile.background("seed demo users", seed_demo_users)
+
+
 def seed_demo_users():
-    """Seed demo users and properties on startup"""
+    """Seed demo users and properties"""
     from models import SessionLocal
     
     db = SessionLocal()
@@ -185,474 +251,41 @@ DEMO_STUDENT = StudentProfile(
     preferred_distance_km=5.0
 )
 
-# India-specific rental properties by city
-RENTALS_BY_CITY = {
-    "pune": [
-        RentalProperty(
-            property_id="PUNE001",
-            rent=12000,
-            distance_km=2.5,
-            safety_score=92,
-            trust_score=88,
-            description="Safe PG near COEP College, Shivajinagar. 24/7 security, CCTV, no broker",
-            campus_fit_score=9.1,
-            police_distance_km=0.8,
-            cctv_coverage=92,
-            street_lighting=88,
-            transit_access=86,
-            price_fairness="Fair",
-            response_time_minutes=35,
-            complaints_count=0,
-            image_url="https://images.unsplash.com/photo-1566073771259-6a8506099945?w=500&h=400&fit=crop",
-            is_direct_owner=True,
-            availability_status="available",
-            payment_methods=["UPI", "Bank Transfer", "Cash"],
-            gender_preference="female",
-            reviews=[
-                {"tenant_name": "Priya S.", "rating": 5, "comment": "Great PG, safe area, responsive owner", "is_verified": True},
-                {"tenant_name": "Neha K.", "rating": 4, "comment": "Good facilities, little far from main market", "is_verified": True}
-            ]
-        ),
-        RentalProperty(
-            property_id="PUNE002",
-            rent=18000,
-            distance_km=1.8,
-            safety_score=95,
-            trust_score=85,
-            description="Premium 1BHK in Aundh, walking distance to Symbiosis. Verified owner",
-            campus_fit_score=9.4,
-            police_distance_km=1.1,
-            cctv_coverage=90,
-            street_lighting=85,
-            transit_access=88,
-            price_fairness="High",
-            response_time_minutes=60,
-            complaints_count=1,
-            image_url="https://images.unsplash.com/photo-1502672260266-1c1ef2d93688?w=500&h=400&fit=crop",
-            is_direct_owner=True,
-            availability_status="available",
-            payment_methods=["UPI", "Bank Transfer"],
-            gender_preference="any",
-            reviews=[
-                {"tenant_name": "Rahul M.", "rating": 4, "comment": "Nice flat, bit expensive but worth it", "is_verified": True}
-            ]
-        ),
-        RentalProperty(
-            property_id="PUNE003",
-            rent=9500,
-            distance_km=6.5,
-            safety_score=78,
-            trust_score=80,
-            description="Budget-friendly hostel in Kothrud. Near PMPML bus stop, safe locality",
-            campus_fit_score=6.8,
-            police_distance_km=2.4,
-            cctv_coverage=70,
-            street_lighting=72,
-            transit_access=80,
-            price_fairness="Low",
-            response_time_minutes=90,
-            complaints_count=1,
-            image_url="https://images.unsplash.com/photo-1545324418-cc1a9a6fded0?w=500&h=400&fit=crop",
-            is_direct_owner=False,
-            availability_status="limited",
-            payment_methods=["Cash", "UPI"],
-            gender_preference="male",
-            reviews=[
-                {"tenant_name": "Amit P.", "rating": 3, "comment": "Decent for budget, maintenance could be better", "is_verified": False}
-            ]
-        ),
-        RentalProperty(
-            property_id="PUNE004",
-            rent=14000,
-            distance_km=3.2,
-            safety_score=88,
-            trust_score=92,
-            description="Girls hostel in Karve Nagar. Police station nearby, owner responds fast",
-            campus_fit_score=8.3,
-            police_distance_km=0.6,
-            cctv_coverage=85,
-            street_lighting=84,
-            transit_access=82,
-            price_fairness="Fair",
-            response_time_minutes=25,
-            complaints_count=0,
-            image_url="https://images.unsplash.com/photo-1537225228614-056a7fb3fb1b?w=500&h=400&fit=crop",
-            is_direct_owner=True,
-            availability_status="available",
-            payment_methods=["UPI", "Bank Transfer", "Cash"],
-            gender_preference="female",
-            reviews=[
-                {"tenant_name": "Sneha R.", "rating": 5, "comment": "Excellent hostel, very safe, owner is caring", "is_verified": True},
-                {"tenant_name": "Anjali T.", "rating": 5, "comment": "Highly recommend for girls", "is_verified": True}
-            ]
-        ),
-        RentalProperty(
-            property_id="PUNE005",
-            rent=22000,
-            distance_km=1.2,
-            safety_score=96,
-            trust_score=90,
-            description="Luxury PG in Hinjewadi Phase 1. IT professionals preferred, zero complaints",
-            campus_fit_score=9.6,
-            police_distance_km=1.3,
-            cctv_coverage=95,
-            street_lighting=90,
-            transit_access=88,
-            price_fairness="High",
-            response_time_minutes=40,
-            complaints_count=0,
-            image_url="https://images.unsplash.com/photo-1512917774080-9b274b3ce0c1?w=500&h=400&fit=crop",
-            is_direct_owner=True,
-            availability_status="limited",
-            payment_methods=["UPI", "Bank Transfer"],
-            gender_preference="any",
-            reviews=[
-                {"tenant_name": "Karthik V.", "rating": 5, "comment": "Premium quality, great amenities", "is_verified": True}
-            ]
-        ),
-    ],
-    "bengaluru": [
-        RentalProperty(
-            property_id="BLR001",
-            rent=15000,
-            distance_km=2.0,
-            safety_score=90,
-            trust_score=87,
-            description="PG near Indiranagar Metro. Safe for women, 24/7 security, verified owner",
-            campus_fit_score=9.0,
-            police_distance_km=1.0,
-            cctv_coverage=91,
-            street_lighting=86,
-            transit_access=92,
-            price_fairness="Fair",
-            response_time_minutes=30,
-            complaints_count=0,
-            image_url="https://images.unsplash.com/photo-1564013799919-ab600027ffc6?w=500&h=400&fit=crop",
-            is_direct_owner=True,
-            availability_status="available",
-            payment_methods=["UPI", "GPay", "PhonePe"],
-            gender_preference="female",
-            reviews=[
-                {"tenant_name": "Divya S.", "rating": 5, "comment": "Safe PG, metro nearby, great for working women", "is_verified": True}
-            ]
-        ),
-        RentalProperty(
-            property_id="BLR002",
-            rent=20000,
-            distance_km=1.5,
-            safety_score=94,
-            trust_score=91,
-            description="1BHK in Koramangala 5th Block. Walking distance to startups, fast WiFi",
-            campus_fit_score=9.2,
-            police_distance_km=1.4,
-            cctv_coverage=88,
-            street_lighting=84,
-            transit_access=90,
-            price_fairness="High",
-            response_time_minutes=55,
-            complaints_count=1,
-            image_url="https://images.unsplash.com/photo-1522708323590-d24dbb6b0267?w=500&h=400&fit=crop",
-            is_direct_owner=True,
-            availability_status="available",
-            payment_methods=["UPI", "Bank Transfer"],
-            gender_preference="any",
-            reviews=[
-                {"tenant_name": "Arjun K.", "rating": 4, "comment": "Good location, startup hub, a bit noisy", "is_verified": True}
-            ]
-        ),
-        RentalProperty(
-            property_id="BLR003",
-            rent=11000,
-            distance_km=8.0,
-            safety_score=75,
-            trust_score=78,
-            description="Budget hostel in Marathahalli. Near bus depot, owner responds in 30 mins",
-            campus_fit_score=6.2,
-            police_distance_km=2.8,
-            cctv_coverage=68,
-            street_lighting=70,
-            transit_access=78,
-            price_fairness="Low",
-            response_time_minutes=75,
-            complaints_count=1,
-            image_url="https://images.unsplash.com/photo-1503672260252-cf088d43f26f?w=500&h=400&fit=crop",
-            is_direct_owner=False,
-            availability_status="available",
-            payment_methods=["Cash", "UPI"],
-            gender_preference="male",
-            reviews=[
-                {"tenant_name": "Ravi B.", "rating": 3, "comment": "Okay for budget, far from city center", "is_verified": False}
-            ]
-        ),
-        RentalProperty(
-            property_id="BLR004",
-            rent=16500,
-            distance_km=3.5,
-            safety_score=89,
-            trust_score=93,
-            description="Safe PG in HSR Layout. Near BDA complex, police patrolling area",
-            campus_fit_score=8.4,
-            police_distance_km=1.2,
-            cctv_coverage=86,
-            street_lighting=83,
-            transit_access=85,
-            price_fairness="Fair",
-            response_time_minutes=28,
-            complaints_count=0,
-            image_url="https://images.unsplash.com/photo-1540932239986-310128078ceb?w=500&h=400&fit=crop",
-            is_direct_owner=True,
-            availability_status="available",
-            payment_methods=["UPI", "Bank Transfer", "Cash"],
-            gender_preference="any",
-            reviews=[
-                {"tenant_name": "Meera J.", "rating": 5, "comment": "Safe area, good maintenance", "is_verified": True},
-                {"tenant_name": "Raj K.", "rating": 4, "comment": "Peaceful locality", "is_verified": True}
-            ]
-        ),
-        RentalProperty(
-            property_id="BLR005",
-            rent=25000,
-            distance_km=0.8,
-            safety_score=97,
-            trust_score=95,
-            description="Premium flat in Whitefield. Tech park proximity, gated community, zero broker",
-            campus_fit_score=9.7,
-            police_distance_km=1.6,
-            cctv_coverage=96,
-            street_lighting=92,
-            transit_access=90,
-            price_fairness="High",
-            response_time_minutes=35,
-            complaints_count=0,
-            image_url="https://images.unsplash.com/photo-1559080241-cd4628902d4a?w=500&h=400&fit=crop",
-            is_direct_owner=True,
-            availability_status="limited",
-            payment_methods=["UPI", "Bank Transfer"],
-            gender_preference="any",
-            reviews=[
-                {"tenant_name": "Vikram S.", "rating": 5, "comment": "Luxury living, worth the price", "is_verified": True}
-            ]
-        ),
-    ],
-    "nagpur": [
-        RentalProperty(
-            property_id="NGP001",
-            rent=9500,
-            distance_km=2.4,
-            safety_score=88,
-            trust_score=86,
-            description="Safe PG near VNIT campus, Laxmi Nagar. CCTV, warden on-site",
-            campus_fit_score=8.8,
-            police_distance_km=0.7,
-            cctv_coverage=87,
-            street_lighting=84,
-            transit_access=80,
-            price_fairness="Fair",
-            response_time_minutes=32,
-            complaints_count=0,
-            image_url="https://images.unsplash.com/photo-1520932091298-1b434c919eba?w=500&h=400&fit=crop",
-            is_direct_owner=True,
-            availability_status="available",
-            payment_methods=["UPI", "Cash", "Bank Transfer"],
-            gender_preference="female",
-            reviews=[
-                {"tenant_name": "Pooja D.", "rating": 5, "comment": "Safe PG near college, warden is caring", "is_verified": True}
-            ]
-        ),
-        RentalProperty(
-            property_id="NGP002",
-            rent=12000,
-            distance_km=1.9,
-            safety_score=90,
-            trust_score=89,
-            description="1BHK in Dharampeth. Walking distance to colleges, verified owner",
-            campus_fit_score=9.0,
-            police_distance_km=0.9,
-            cctv_coverage=89,
-            street_lighting=86,
-            transit_access=82,
-            price_fairness="Fair",
-            response_time_minutes=40,
-            complaints_count=0,
-            image_url="https://images.unsplash.com/photo-1522708323590-d24dbb6b0267?w=500&h=400&fit=crop",
-            is_direct_owner=True,
-            availability_status="available",
-            payment_methods=["UPI", "Bank Transfer"],
-            gender_preference="any",
-            reviews=[
-                {"tenant_name": "Ankit M.", "rating": 4, "comment": "Good flat, near college", "is_verified": True}
-            ]
-        ),
-        RentalProperty(
-            property_id="NGP003",
-            rent=8000,
-            distance_km=5.8,
-            safety_score=78,
-            trust_score=80,
-            description="Budget hostel in Pratap Nagar. Near bus stop, decent locality",
-            campus_fit_score=6.5,
-            police_distance_km=2.2,
-            cctv_coverage=72,
-            street_lighting=70,
-            transit_access=76,
-            price_fairness="Low",
-            response_time_minutes=80,
-            complaints_count=1,
-            image_url="https://images.unsplash.com/photo-1505692952047-643ca81abfa6?w=500&h=400&fit=crop",
-            is_direct_owner=False,
-            availability_status="available",
-            payment_methods=["Cash"],
-            gender_preference="male",
-            reviews=[
-                {"tenant_name": "Suresh G.", "rating": 3, "comment": "Very budget-friendly, basic amenities", "is_verified": False}
-            ]
-        ),
-        RentalProperty(
-            property_id="NGP004",
-            rent=13500,
-            distance_km=3.1,
-            safety_score=91,
-            trust_score=92,
-            description="Girls PG in Ramdaspeth. Police station nearby, fast owner response",
-            campus_fit_score=8.6,
-            police_distance_km=0.6,
-            cctv_coverage=90,
-            street_lighting=88,
-            transit_access=83,
-            price_fairness="Fair",
-            response_time_minutes=22,
-            complaints_count=0,
-            image_url="https://images.unsplash.com/photo-1537380540434-ba8e4d52eac9?w=500&h=400&fit=crop",
-            is_direct_owner=True,
-            availability_status="available",
-            payment_methods=["UPI", "Bank Transfer", "Cash"],
-            gender_preference="female",
-            reviews=[
-                {"tenant_name": "Tanvi P.", "rating": 5, "comment": "Safest PG in Nagpur, owner responds instantly", "is_verified": True},
-                {"tenant_name": "Shreya N.", "rating": 5, "comment": "Highly recommend for girls", "is_verified": True}
-            ]
-        ),
-        RentalProperty(
-            property_id="NGP005",
-            rent=17000,
-            distance_km=1.4,
-            safety_score=93,
-            trust_score=90,
-            description="Premium flat in Civil Lines. Gated society, power backup",
-            campus_fit_score=9.1,
-            police_distance_km=1.1,
-            cctv_coverage=92,
-            street_lighting=89,
-            transit_access=84,
-            price_fairness="High",
-            response_time_minutes=45,
-            complaints_count=0,
-            image_url="https://images.unsplash.com/photo-1560519038-0ac8d7bb46a7?w=500&h=400&fit=crop",
-            is_direct_owner=True,
-            availability_status="limited",
-            payment_methods=["UPI", "Bank Transfer"],
-            gender_preference="any",
-            reviews=[
-                {"tenant_name": "Nikhil R.", "rating": 5, "comment": "Premium quality in Nagpur, gated community", "is_verified": True}
-            ]
-        ),
-    ]
-}
 
-# ---------------------------------------------------------------------------
-# Enrichment data for proximity, owners, and neighborhood analytics
-# ---------------------------------------------------------------------------
-
-CITY_META = {
-    "pune": {
-        "neighborhoods": ["Shivajinagar", "Aundh", "Kothrud", "Karve Nagar", "Hinjewadi"],
-        "colleges": ["COEP", "Symbiosis", "MIT-WPU", "Fergusson College", "PICT"],
-        "office_hubs": ["Hinjewadi IT Park", "Magarpatta", "Kharadi EON", "Baner Business Bay", "Viman Nagar Hub"],
-        "zones": ["Central", "West", "West", "North", "West"],
-        "tiffin": [
-            {"provider": "Dagdusheth Tiffins", "price_per_meal": 70, "veg_only": True, "rating": 4.3},
-            {"provider": "Aundh HomeMeals", "price_per_meal": 85, "veg_only": False, "rating": 4.5},
-        ],
-    },
-    "bengaluru": {
-        "neighborhoods": ["Indiranagar", "Koramangala", "Marathahalli", "HSR Layout", "Whitefield"],
-        "colleges": ["Christ University", "St. Joseph's", "PES", "IIM-B", "RVCE"],
-        "office_hubs": ["Manyata Tech Park", "Koramangala Startup Hub", "Sarjapur ORR", "HSR Sector 2", "Whitefield ITPL"],
-        "zones": ["East", "South", "East", "South", "East"],
-        "tiffin": [
-            {"provider": "Udupi Tiffin Hub", "price_per_meal": 80, "veg_only": True, "rating": 4.4},
-            {"provider": "Namma Meals", "price_per_meal": 95, "veg_only": False, "rating": 4.2},
-        ],
-    },
-    "nagpur": {
-        "neighborhoods": ["Laxmi Nagar", "Dharampeth", "Pratap Nagar", "Ramdaspeth", "Sadar"],
-        "colleges": ["VNIT", "RTMNU", "YCCE", "RCOEM", "LIT"],
-        "office_hubs": ["MIHAN", "Civil Lines", "Sitabuldi", "Sadar Market", "Dharampeth Hub"],
-        "zones": ["Central", "West", "East", "Central", "Central"],
-        "tiffin": [
-            {"provider": "Orange City Mess", "price_per_meal": 60, "veg_only": True, "rating": 4.1},
-            {"provider": "Nagpur Meal Box", "price_per_meal": 75, "veg_only": False, "rating": 4.0},
-        ],
-    },
-}
+def prime_score_cache(catalog: CatalogStore) -> None:
+    """Score every city for the demo profile so the first requests hit the cache."""
+    for city in catalog:
+        catalog[city].overall_scores(DEMO_STUDENT)
+
+
+def build_geo_indexes(catalog: CatalogStore) -> None:
+    """Build each city's spatial index ahead of the first geo query."""
+    for city in catalog:
+        catalog[city].geo_index()
 
-OWNER_INDEX: Dict[str, Dict[str, Any]] = {}
-
-
-def enrich_rentals() -> None:
-    for city_key, rentals in RENTALS_BY_CITY.items():
-        meta = CITY_META.get(city_key, {})
-        neighborhoods = meta.get("neighborhoods", [])
-        colleges = meta.get("colleges", [])
-        office_hubs = meta.get("office_hubs", [])
-        zones = meta.get("zones", [])
-        tiffin_options = meta.get("tiffin", [])
-
-        for idx, rental in enumerate(rentals):
-            rental.neighborhood = neighborhoods[idx % len(neighborhoods)] if neighborhoods else None
-            rental.city_zone = zones[idx % len(zones)] if zones else None
-            rental.nearby_college = colleges[idx % len(colleges)] if colleges else None
-            rental.nearby_office_hub = office_hubs[idx % len(office_hubs)] if office_hubs else None
-            rental.college_distance_km = max(0.6, round(rental.distance_km - 0.4, 1))
-            rental.office_distance_km = max(1.0, round(rental.distance_km + 1.1, 1))
-            rental.commute_minutes = int((rental.distance_km * 12) + 8)
-            rental.women_safety_index = min(100, rental.safety_score + 4)
-            rental.crime_index = max(5, 100 - rental.safety_score)
-            rental.night_transit_score = rental.transit_access
-            rental.tiffin_options = tiffin_options
-
-            owner_id = f"OWN-{city_key[:3].upper()}-{idx + 1:02d}"
-            owner_name = f"{rental.neighborhood} Rentals"
-            owner_average_rating = round(min(4.9, 3.8 + (rental.trust_score / 100) * 1.2), 1)
-            agreement_completed = rental.trust_score >= 85
-
-            rental.owner_id = owner_id
-            rental.owner_name = owner_name
-            rental.owner_average_rating = owner_average_rating
-            rental.owner_response_time_minutes = rental.response_time_minutes
-            rental.owner_complaints_count = rental.complaints_count
-            rental.agreement_completed = agreement_completed
-
-            OWNER_INDEX[owner_id] = {
-                "owner_id": owner_id,
-                "name": owner_name,
-                "average_rating": owner_average_rating,
-                "response_time_minutes": rental.response_time_minutes,
-                "complaints_count": rental.complaints_count,
-                "agreement_completed": agreement_completed,
-            }
 
+def build_facet_indexes(catalog: CatalogStore) -> None:
+    """Build each city's facet bitmaps ahead of the first search."""
+    for city in catalog:
+        catalog[city].facet_index()
 
-enrich_rentals()
+
+# Listings catalog, built offline by catalog_build.py. Only the header is read
+# here; each city is mapped on first use. Hot reloads swap in new versions.
+catalog_manager = CatalogManager(DEFAULT_CATALOG_PATH, warmers=[prime_score_cache, build_geo_indexes, build_facet_indexes])
+startup_profile.checkpoint("catalog header")
+
+
+def current_catalog() -> CatalogStore:
+    """The active catalog version. Read it once per request so a hot reload
+    never mixes two versions within one response."""
+    return catalog_manager.current
 
 # Simple in-memory auth and payment stores (demo only)
 USERS: Dict[str, Dict[str, Any]] = {}
 TOKENS: Dict[str, Dict[str, Any]] = {}
 PAYMENTS: Dict[str, Dict[str, Any]] = {}
 
-# Default rentals (Pune for demo)
-DEMO_RENTALS = RENTALS_BY_CITY["pune"]
-
 # Sample owner data for trust score demo
 DEMO_OWNER = {
     "owner_id": "OWNER001", 
@@ -705,21 +338,11 @@ class ExpenseSplitRequest(BaseModel):
 
 
 def find_rental(property_id: str) -> Optional[RentalProperty]:
-    property_id = property_id.upper().strip()
-    for rentals in RENTALS_BY_CITY.values():
-        for rental in rentals:
-            if rental.property_id == property_id:
-                return rental
-    return None
+    return find_rental_with_city(property_id)[1]
 
 
 def find_rental_with_city(property_id: str) -> Tuple[Optional[str], Optional[RentalProperty]]:
-    property_id = property_id.upper().strip()
-    for city_key, rentals in RENTALS_BY_CITY.items():
-        for rental in rentals:
-            if rental.property_id == property_id:
-                return city_key, rental
-    return None, None
+    return current_catalog().find_rental(property_id)
 
 
 def search_score(query: str, rental: RentalProperty) -> float:
@@ -832,16 +455,27 @@ async def get_recommendations(
             pass  # Allow public access if no auth or invalid token
     
     # Normalize city name
+    catalog = current_catalog()
     city = city.lower().strip()
-    if city not in RENTALS_BY_CITY:
+    if city not in catalog:
         city = "pune"  # Default to Pune if invalid city
     
     # Limit top_n to reasonable values
     top_n = min(max(1, top_n), 5)
 
+    # Identical concurrent requests share a single scoring pass
+    return await ranking_flight.run(
+        ("recommendations", catalog.catalog_version, city, top_n),
+        build_recommendations, catalog, city, top_n,
+    )
+
+
+def build_recommendations(catalog: CatalogStore, city: str, top_n: int) -> Dict[str, Any]:
+    """Score a (normalized) city and build the /recommendations payload."""
     # Get recommendations using the recommend_rentals function
-    city_rentals = RENTALS_BY_CITY[city]
-    recommendations = recommend_rentals(DEMO_STUDENT, city_rentals, top_n=top_n)
+    city_rentals = catalog[city]
+    with SCORING_LATENCY.time("recommend_rentals"), span("score.recommend_rentals", top_n=top_n):
+        recommendations = recommend_rentals(DEMO_STUDENT, city_rentals, top_n=top_n)
 
     # Format recommendations for JSON response
     formatted_recommendations = []
@@ -961,84 +595,581 @@ async def login(request: AuthRequest) -> Dict[str, Any]:
     }
 
 
+SEARCH_RANK_MODES = ("college", "office", "safety")
+# Rank modes that measure from the near= college/office hub
+NEAR_RANK_MODES = ("commute",)
+
+SearchFilters = Tuple[Filters, Optional[int], Optional[int]]
+
+
+def search_filters(
+    min_rent: Optional[int] = None,
+    max_rent: Optional[int] = None,
+    gender_preference: Optional[List[str]] = Query(None),
+    availability_status: Optional[List[str]] = Query(None),
+    is_direct_owner: Optional[bool] = None,
+    payment_method: Optional[List[str]] = Query(None),
+    city_zone: Optional[List[str]] = Query(None)
+) -> SearchFilters:
+    """Facet filter query parameters. List parameters may repeat (OR within a facet)."""
+    filters = normalize_filters({
+        "gender_preference": gender_preference,
+        "availability_status": availability_status,
+        "is_direct_owner": None if is_direct_owner is None else [is_direct_owner],
+        "payment_methods": payment_method,
+        "city_zone": city_zone,
+    })
+    return filters, min_rent, max_rent
+
+
 @app.get("/search")
-async def search_rentals(city: str = "pune", query: str = "", top_n: int = 5, rank_by: str = "match") -> Dict[str, Any]:
+async def search_rentals(
+    city: str = "pune",
+    query: str = "",
+    top_n: int = 5,
+    rank_by: str = "match",
+    near: Optional[str] = None,
+    radius_km: Optional[float] = None,
+    filters: SearchFilters = Depends(search_filters)
+) -> Dict[str, Any]:
+    catalog = current_catalog()
     city = city.lower().strip()
-    if city not in RENTALS_BY_CITY:
+    if city not in catalog:
         city = "pune"
     top_n = min(max(1, top_n), 10)
 
-    results = []
-    for rental in RENTALS_BY_CITY[city]:
-        rec = calculate_rental_recommendation_score(rental, DEMO_STUDENT)
-        match_score = search_score(query, rental) if query else 0.0
-
-        if rank_by == "college":
-            rank_score = max(0, 100 - (rental.college_distance_km or rental.distance_km) * 10)
-        elif rank_by == "office":
-            rank_score = max(0, 100 - (rental.office_distance_km or rental.distance_km) * 10)
-        elif rank_by == "safety":
-            rank_score = rental.safety_score
-        else:
-            rank_score = rec.overall_score + match_score
-
-        results.append({
-            "property_id": rec.property_id,
-            "overall_score": round(rec.overall_score, 2),
-            "relevance_score": round(rank_score, 2),
-            "rent": rec.rent,
-            "distance_km": rec.distance_km,
-            "safety_score": rec.safety_score,
-            "trust_score": rec.trust_score,
-            "campus_fit_score": rec.campus_fit_score,
-            "police_distance_km": rec.police_distance_km,
-            "cctv_coverage": rec.cctv_coverage,
-            "street_lighting": rec.street_lighting,
-            "transit_access": rec.transit_access,
-            "price_fairness": rec.price_fairness,
-            "response_time_minutes": rec.response_time_minutes,
-            "complaints_count": rec.complaints_count,
-            "description": rec.description,
-            "image_url": rec.image_url,
-            "is_direct_owner": rec.is_direct_owner,
-            "availability_status": rec.availability_status,
-            "payment_methods": rec.payment_methods,
-            "gender_preference": rec.gender_preference,
-            "reviews": rec.reviews,
-            "owner_id": rec.owner_id,
-            "owner_name": rec.owner_name,
-            "owner_average_rating": rec.owner_average_rating,
-            "owner_response_time_minutes": rec.owner_response_time_minutes,
-            "owner_complaints_count": rec.owner_complaints_count,
-            "agreement_completed": rec.agreement_completed,
-            "neighborhood": rec.neighborhood,
-            "city_zone": rec.city_zone,
-            "nearby_college": rec.nearby_college,
-            "college_distance_km": rec.college_distance_km,
-            "nearby_office_hub": rec.nearby_office_hub,
-            "office_distance_km": rec.office_distance_km,
-            "commute_minutes": rec.commute_minutes,
-            "women_safety_index": rec.women_safety_index,
-            "crime_index": rec.crime_index,
-            "night_transit_score": rec.night_transit_score,
-            "tiffin_options": rec.tiffin_options,
-        })
+    # near= names a college or office hub: rank_by=college|office then uses
+    # the true distance to it, rank_by=commute the commute time to it, and
+    # radius_km limits results around it.
+    target = None
+    if near is not None:
+        target = find_landmark(catalog, city, near)
+        if target is None:
+            return JSONResponse(status_code=400, content={"error": f"Unknown college or office hub in {city.title()}: {near}"})
+    if radius_km is not None and target is None:
+        return JSONResponse(status_code=400, content={"error": "radius_km requires near"})
+    geo_error = invalid_geo_params(radius_km=radius_km)
+    if geo_error:
+        return JSONResponse(status_code=400, content={"error": geo_error})
+    if rank_by in NEAR_RANK_MODES and target is None:
+        return JSONResponse(status_code=400, content={"error": f"rank_by={rank_by} requires near"})
+
+    # Normalize the ranking inputs so equivalent queries coalesce: search_score
+    # is case-insensitive and token based, and unknown rank modes mean "match".
+    normalized_query = " ".join(query.lower().split())
+    rank_mode = rank_by if rank_by in SEARCH_RANK_MODES + NEAR_RANK_MODES else "match"
+    search = await ranking_flight.run(
+        ("search", catalog.catalog_version, city, normalized_query, top_n, rank_mode, target, radius_km, filters),
+        search_city, catalog, city, normalized_query, top_n, rank_mode, target, radius_km, filters,
+    )
 
-    results.sort(key=lambda x: x["relevance_score"], reverse=True)
-    return {
+    response = {
         "city": city.title(),
         "query": query,
         "rank_by": rank_by,
-        "results": results[:top_n]
+        "results": search["results"]
+    }
+    if target is not None:
+        response["near"] = target[0]
+        response["radius_km"] = radius_km
+    response["total_matches"] = search["total_matches"]
+    response["facets"] = search["facets"]
+    with span("response.json_encode"):
+        return JSONResponse(response)
+
+
+def search_city(
+    catalog: CatalogStore,
+    city: str,
+    query: str,
+    top_n: int,
+    rank_by: str,
+    target: Optional[Tuple[str, float, float]],
+    radius_km: Optional[float],
+    filters: SearchFilters
+) -> Dict[str, Any]:
+    """Ranked /search results for one city plus facet counts for its filters."""
+    facet_filters, min_rent, max_rent = filters
+    with span("search.filter", city=city):
+        facets = catalog[city].facet_index()
+        rent_mask = facets.rent_mask(min_rent, max_rent)
+        mask = facets.mask(facet_filters, rent_mask)
+    with span("search.rank", rank_by=rank_by, matches=mask.bit_count()):
+        results = rank_search_results(
+            catalog, city, query, top_n, rank_by, target, radius_km,
+            None if mask == facets.all_rows else mask,
+        )
+    with span("search.facet_counts"):
+        counts = facets.counts(facet_filters, rent_mask)
+    return {"results": results, "total_matches": mask.bit_count(), "facets": counts}
+
+
+@app.get("/nearby")
+async def nearby_rentals(
+    city: str = "pune",
+    near: Optional[str] = None,
+    lat: Optional[float] = None,
+    lon: Optional[float] = None,
+    k: int = 5,
+    radius_km: Optional[float] = None
+) -> Dict[str, Any]:
+    """Listings closest to a point, given as lat/lon or a college/office hub name."""
+    catalog = current_catalog()
+    city = city.lower().strip()
+    if city not in catalog:
+        city = "pune"
+    k = min(max(1, k), 50)
+
+    if near is not None:
+        target = find_landmark(catalog, city, near)
+        if target is None:
+            return JSONResponse(status_code=400, content={"error": f"Unknown college or office hub in {city.title()}: {near}"})
+        _name, lat, lon = target
+    elif lat is None or lon is None:
+        return JSONResponse(status_code=400, content={"error": "Pass near, or both lat and lon"})
+    geo_error = invalid_geo_params(lat, lon, radius_km)
+    if geo_error:
+        return JSONResponse(status_code=400, content={"error": geo_error})
+
+    rentals = catalog[city]
+    hits = await run_in_threadpool(nearby_hits, rentals, lat, lon, k, radius_km)
+    return {
+        "city": city.title(),
+        "near": near,
+        "point": {"lat": lat, "lon": lon},
+        "radius_km": radius_km,
+        "results": [nearby_result(rentals[i], distance) for i, distance in hits]
+    }
+
+
+def invalid_geo_params(
+    lat: Optional[float] = None,
+    lon: Optional[float] = None,
+    radius_km: Optional[float] = None
+) -> Optional[str]:
+    """Error message for an unusable point or radius, else None."""
+    if lat is not None and not (math.isfinite(lat) and -90 <= lat <= 90):
+        return "lat must be a number between -90 and 90"
+    if lon is not None and not (math.isfinite(lon) and -180 <= lon <= 180):
+        return "lon must be a number between -180 and 180"
+    if radius_km is not None and not (math.isfinite(radius_km) and radius_km >= 0):
+        return "radius_km must be a non-negative number"
+    return None
+
+
+def nearby_hits(
+    rentals: IndexedCatalog,
+    lat: float,
+    lon: float,
+    k: int,
+    radius_km: Optional[float]
+) -> List[Tuple[int, float]]:
+    """(row, distance_km) of the /nearby results; CPU work, run off the event loop."""
+    index = rentals.geo_index()
+    return index.within(lat, lon, radius_km)[:k] if radius_km is not None else index.nearest(lat, lon, k)
+
+
+def nearby_result(rental: RentalProperty, distance_km: float) -> Dict[str, Any]:
+    """Build one /nearby result row."""
+    return {
+        "property_id": rental.property_id,
+        "near_distance_km": round(distance_km, 2),
+        "latitude": rental.latitude,
+        "longitude": rental.longitude,
+        "rent": rental.rent,
+        "safety_score": rental.safety_score,
+        "trust_score": rental.trust_score,
+        "neighborhood": rental.neighborhood,
+        "availability_status": rental.availability_status,
+        "description": rental.description,
+        "image_url": rental.image_url,
+    }
+
+
+# Below this zoom (or above MAP_MAX_MARKERS listings in view) /map returns
+# per-cell clusters instead of individual listings.
+MAP_LISTINGS_MIN_ZOOM = int(os.environ.get("RENTSURE_MAP_LISTINGS_ZOOM", "15"))
+MAP_MAX_MARKERS = int(os.environ.get("RENTSURE_MAP_MAX_MARKERS", "500"))
+
+
+@app.get("/map")
+async def map_viewport(
+    south: float,
+    west: float,
+    north: float,
+    east: float,
+    zoom: int = 12,
+    city: Optional[str] = None
+) -> Dict[str, Any]:
+    """Listings in a map viewport, clustered server-side when zoomed out."""
+    if not all(math.isfinite(edge) for edge in (south, west, north, east)):
+        return JSONResponse(status_code=400, content={"error": "Bounding box edges must be finite numbers"})
+    if not (south < north and west < east):
+        return JSONResponse(status_code=400, content={"error": "Bounding box needs south < north and west < east"})
+    catalog = current_catalog()
+    if city is not None:
+        city = city.lower().strip()
+        if city not in catalog:
+            return JSONResponse(status_code=404, content={"error": "City not found"})
+    cities = [city] if city is not None else list(catalog)
+    zoom = min(max(0, zoom), 22)
+
+    view = await run_in_threadpool(map_view, catalog, cities, south, west, north, east, zoom)
+    return {
+        "zoom": zoom,
+        "bbox": {"south": south, "west": west, "north": north, "east": east},
+        **view
+    }
+
+
+def map_view(
+    catalog: CatalogStore,
+    cities: List[str],
+    south: float,
+    west: float,
+    north: float,
+    east: float,
+    zoom: int
+) -> Dict[str, Any]:
+    """Markers or clusters for a viewport. Clusters come from per-zoom grids
+    built once per catalog version, so panning only reads the cells in view."""
+    if zoom >= MAP_LISTINGS_MIN_ZOOM:
+        hits = [(c, i) for c in cities for i in catalog[c].geo_index().in_bbox(south, west, north, east)]
+        if len(hits) <= MAP_MAX_MARKERS:
+            return {
+                "mode": "listings",
+                "total": len(hits),
+                "listings": [map_marker(c, catalog[c][i]) for c, i in hits]
+            }
+
+    clusters = [
+        dict(cluster, city=c.title())
+        for c in cities
+        for cluster in catalog[c].cluster_grid(zoom).in_bbox(south, west, north, east)
+    ]
+    return {
+        "mode": "clusters",
+        "total": sum(cluster["count"] for cluster in clusters),
+        "clusters": clusters
+    }
+
+
+def map_marker(city: str, rental: RentalProperty) -> Dict[str, Any]:
+    """Build one /map listing marker."""
+    return {
+        "property_id": rental.property_id,
+        "city": city.title(),
+        "lat": rental.latitude,
+        "lon": rental.longitude,
+        "rent": rental.rent,
+        "safety_score": rental.safety_score,
+        "availability_status": rental.availability_status,
+    }
+
+
+def find_landmark(catalog: CatalogStore, city: str, name: str) -> Optional[Tuple[str, float, float]]:
+    """(name, lat, lon) of a college or office hub in a city, matched case-insensitively."""
+    landmarks = catalog.city_meta.get(city, {}).get("landmarks", {})
+    wanted = name.strip().lower()
+    for landmark, (lat, lon) in landmarks.items():
+        if landmark.lower() == wanted:
+            return landmark, lat, lon
+    return None
+
+
+@app.get("/search/export")
+async def export_search_results(
+    city: str = "pune",
+    query: str = "",
+    rank_by: str = "match",
+    format: str = "ndjson",
+    filters: SearchFilters = Depends(search_filters)
+):
+    """Stream every ranked /search result for a city (no top_n cap) as NDJSON or CSV."""
+    catalog = current_catalog()
+    city = city.lower().strip()
+    if city not in catalog:
+        city = "pune"
+    fmt = format.lower()
+    if fmt not in EXPORT_FORMATS:
+        return JSONResponse(status_code=400, content={"error": "format must be ndjson or csv"})
+
+    normalized_query = " ".join(query.lower().split())
+    rank_mode = rank_by if rank_by in SEARCH_RANK_MODES else "match"
+    return StreamingResponse(
+        encode_rows(iter_search_results(catalog, city, normalized_query, rank_mode, filters), fmt),
+        media_type=EXPORT_MEDIA_TYPES[fmt],
+        headers=export_filename(f"search-{city}", fmt),
+    )
+
+
+def iter_search_results(catalog: CatalogStore, city: str, query: str, rank_by: str, filters: SearchFilters):
+    """Yield /search result rows for a whole city in ranked order.
+
+    Same ordering as /search (nlargest == stable descending sort); rows are
+    built one at a time as the response is consumed.
+    """
+    rentals = catalog[city]
+    facet_filters, min_rent, max_rent = filters
+    facets = rentals.facet_index()
+    rows = list(iter_rows(facets.mask(facet_filters, facets.rent_mask(min_rent, max_rent))))
+    keys = search_rank_keys(rentals, query, rank_by, rows)
+    for j in sorted(range(len(keys)), key=keys.__getitem__, reverse=True):
+        yield search_result(rentals[rows[j]], query, rank_by)
+
+
+def search_rank_score(
+    rank_by: str,
+    overall_score: float,
+    match_score: float,
+    distance_km: float,
+    college_distance_km: Optional[float],
+    office_distance_km: Optional[float],
+    safety_score: float,
+    target_distance_km: Optional[float] = None,
+    target_commute_minutes: Optional[float] = None
+) -> float:
+    """Relevance score used to order /search results.
+
+    target_distance_km, when given, is the true distance to the college or
+    office hub picked with near= and replaces the precomputed distances;
+    target_commute_minutes is the commute time to it (rank_by=commute).
+    """
+    if rank_by == "commute":
+        return max(0, 100 - target_commute_minutes) if target_commute_minutes is not None else 0
+    if rank_by in ("college", "office") and target_distance_km is not None:
+        return max(0, 100 - target_distance_km * 10)
+    if rank_by == "college":
+        return max(0, 100 - (college_distance_km or distance_km) * 10)
+    if rank_by == "office":
+        return max(0, 100 - (office_distance_km or distance_km) * 10)
+    if rank_by == "safety":
+        return safety_score
+    return overall_score + match_score
+
+
+def rank_search_results(
+    catalog: CatalogStore,
+    city: str,
+    query: str,
+    top_n: int,
+    rank_by: str,
+    target: Optional[Tuple[str, float, float]] = None,
+    radius_km: Optional[float] = None,
+    mask: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """Rank one city for /search, returning the top_n result rows.
+
+    Ranking reads the catalog's numeric columns; listings are only
+    materialized for text matching and for the top_n rows returned.
+    With a target, only listings the spatial index returns are ranked;
+    with a facet mask, only the rows it selects.
+    """
+    rentals = catalog[city]
+    if target is None:
+        rows = range(len(rentals)) if mask is None else list(iter_rows(mask))
+        keys = search_rank_keys(rentals, query, rank_by, rows)
+        best = heapq.nlargest(top_n, range(len(keys)), key=keys.__getitem__)
+        with span("search.build_results", rows=len(best)):
+            return [search_result(rentals[rows[j]], query, rank_by) for j in best]
+
+    name, lat, lon = target
+    with span("search.geo_candidates"):
+        hits = geo_search_candidates(rentals.geo_index(), lat, lon, top_n, rank_by, radius_km, mask is not None)
+    if mask is not None:
+        selected = row_test(mask)
+        hits = [hit for hit in hits if selected(hit[0])]
+    # Row order keeps ties ordered the same way as a full scan
+    hits.sort()
+    rows = [i for i, _distance in hits]
+    distances = [distance for _i, distance in hits]
+    # Commute minutes are only needed for every candidate when ranking by them
+    minutes = commute_minutes_to(catalog, city, name, rows) if rank_by == "commute" else None
+    keys = search_rank_keys(rentals, query, rank_by, rows, distances, minutes)
+    best = heapq.nlargest(top_n, range(len(rows)), key=keys.__getitem__)
+    if minutes is None:
+        best_minutes = commute_minutes_to(catalog, city, name, [rows[j] for j in best])
+    else:
+        best_minutes = [minutes[j] for j in best]
+    with span("search.build_results", rows=len(best)):
+        return [
+            search_result(rentals[rows[j]], query, rank_by, name, distances[j], best_minutes[k])
+            for k, j in enumerate(best)
+        ]
+
+
+def commute_minutes_to(catalog: CatalogStore, city: str, destination: str, rows: Sequence[int]) -> List[Optional[float]]:
+    """Commute minutes from each listing row to a college or office hub.
+
+    O(1) per row from the precomputed matrix; falls back to the same travel
+    model computed directly if no matrix was built for this catalog.
+    """
+    rentals = catalog[city]
+    latitude = rentals.column("latitude")
+    longitude = rentals.column("longitude")
+    matrix = catalog.commute_matrix()
+    commutes = matrix.city(city) if matrix is not None else None
+    column = commutes.destination(destination) if commutes is not None else None
+    if column is not None:
+        return [commutes.minutes_from_cell(commutes.cell(latitude[i], longitude[i]), column) for i in rows]
+
+    _name, dest_lat, dest_lon = find_landmark(catalog, city, destination)
+    return [
+        None if latitude[i] != latitude[i] else round(estimate_commute_minutes(latitude[i], longitude[i], dest_lat, dest_lon))
+        for i in rows
+    ]
+
+
+def geo_search_candidates(
+    index: GeoIndex,
+    lat: float,
+    lon: float,
+    top_n: int,
+    rank_by: str,
+    radius_km: Optional[float],
+    filtered: bool = False
+) -> List[Tuple[int, float]]:
+    """Listings that can make the /search top_n around a target point.
+
+    With filtered=True the nearest listings may be filtered out afterwards,
+    so the nearest-top_n shortcut does not apply.
+    """
+    if radius_km is not None:
+        return index.within(lat, lon, radius_km)
+    if rank_by in ("college", "office") and not filtered:
+        # The distance score (100 - 10 * km, rounded to 2 places) only falls
+        # as distance grows, so the top_n are the nearest top_n plus anything
+        # that rounds to the same score as the last of them. Past 10 km every
+        # score is 0 and the whole city ties.
+        nearest = index.nearest(lat, lon, top_n)
+        if len(nearest) == top_n and nearest[-1][1] < 10:
+            return index.within(lat, lon, nearest[-1][1] + 0.002)
+    return index.within(lat, lon, math.inf)
+
+
+def search_rank_keys(
+    rentals: IndexedCatalog,
+    query: str,
+    rank_by: str,
+    rows: Optional[Sequence[int]] = None,
+    target_distances: Optional[Sequence[float]] = None,
+    target_minutes: Optional[Sequence[Optional[float]]] = None
+) -> List[float]:
+    """/search ordering keys for one city, or for the given rows of it."""
+    distance = rentals.column("distance_km")
+    college_distance = rentals.column("college_distance_km")
+    office_distance = rentals.column("office_distance_km")
+    safety = rentals.column("safety_score")
+    overall = None
+    if rank_by == "match":
+        with span("score.calculate_rental_recommendation_score"):
+            overall = rentals.overall_scores(DEMO_STUDENT)
+
+    keys = []
+    with SCORING_LATENCY.time("search_score"), span("score.search_score", rows=len(rows) if rows is not None else len(rentals)):
+        for j, i in enumerate(rows if rows is not None else range(len(rentals))):
+            match_score = search_score(query, rentals[i]) if query and overall is not None else 0.0
+            rank_score = search_rank_score(
+                rank_by,
+                overall[i] if overall is not None else 0.0,
+                match_score,
+                distance[i],
+                _none_if_nan(college_distance[i]),
+                _none_if_nan(office_distance[i]),
+                safety[i],
+                target_distances[j] if target_distances is not None else None,
+                target_minutes[j] if target_minutes is not None else None,
+            )
+            # Results are ordered by the rounded score they report
+            keys.append(round(rank_score, 2))
+    return keys
+
+
+def _none_if_nan(value: float) -> Optional[float]:
+    return None if value != value else value
+
+
+def search_result(
+    rental: RentalProperty,
+    query: str,
+    rank_by: str,
+    near: Optional[str] = None,
+    near_distance_km: Optional[float] = None,
+    near_commute_minutes: Optional[float] = None
+) -> Dict[str, Any]:
+    """Build one /search result row."""
+    rec = calculate_rental_recommendation_score(rental, DEMO_STUDENT)
+    match_score = search_score(query, rental) if query else 0.0
+    rank_score = search_rank_score(
+        rank_by,
+        rec.overall_score,
+        match_score,
+        rental.distance_km,
+        rental.college_distance_km,
+        rental.office_distance_km,
+        rental.safety_score,
+        near_distance_km,
+        near_commute_minutes,
+    )
+
+    result = {
+        "property_id": rec.property_id,
+        "overall_score": round(rec.overall_score, 2),
+        "relevance_score": round(rank_score, 2),
+        "rent": rec.rent,
+        "distance_km": rec.distance_km,
+        "safety_score": rec.safety_score,
+        "trust_score": rec.trust_score,
+        "campus_fit_score": rec.campus_fit_score,
+        "police_distance_km": rec.police_distance_km,
+        "cctv_coverage": rec.cctv_coverage,
+        "street_lighting": rec.street_lighting,
+        "transit_access": rec.transit_access,
+        "price_fairness": rec.price_fairness,
+        "response_time_minutes": rec.response_time_minutes,
+        "complaints_count": rec.complaints_count,
+        "description": rec.description,
+        "image_url": rec.image_url,
+        "is_direct_owner": rec.is_direct_owner,
+        "availability_status": rec.availability_status,
+        "payment_methods": rec.payment_methods,
+        "gender_preference": rec.gender_preference,
+        "reviews": rec.reviews,
+        "owner_id": rec.owner_id,
+        "owner_name": rec.owner_name,
+        "owner_average_rating": rec.owner_average_rating,
+        "owner_response_time_minutes": rec.owner_response_time_minutes,
+        "owner_complaints_count": rec.owner_complaints_count,
+        "agreement_completed": rec.agreement_completed,
+        "neighborhood": rec.neighborhood,
+        "city_zone": rec.city_zone,
+        "nearby_college": rec.nearby_college,
+        "college_distance_km": rec.college_distance_km,
+        "nearby_office_hub": rec.nearby_office_hub,
+        "office_distance_km": rec.office_distance_km,
+        "commute_minutes": rec.commute_minutes,
+        "women_safety_index": rec.women_safety_index,
+        "crime_index": rec.crime_index,
+        "night_transit_score": rec.night_transit_score,
+        "tiffin_options": rec.tiffin_options,
     }
+    if near is not None:
+        result["near"] = near
+        result["near_distance_km"] = round(near_distance_km, 2)
+        result["near_commute_minutes"] = near_commute_minutes
+    return result
 
 
 @app.get("/owner/{owner_id}")
-async def get_owner_details(owner_id: str, db: Session = Depends(get_db)) -> Dict[str, Any]:
+async def get_owner_details(owner_id: str, db: AsyncSession = Depends(get_async_read_db)) -> Dict[str, Any]:
     """Get owner contact details from database"""
     try:
-        owner = db.query(Owner).filter(Owner.id == owner_id).first()
-        if not owner:
+        # One round-trip: the owner row and its user account together
+        result = await db.execute(
+            select(Owner, User).outerjoin(User, User.id == Owner.user_id).where(Owner.id == owner_id)
+        )
+        row = result.first()
+        if not row:
             # Return demo owner if not found
             return {
                 "id": owner_id,
@@ -1048,8 +1179,8 @@ async def get_owner_details(owner_id: str, db: Session = Depends(get_db)) -> Dic
                 "city": "Pune",
                 "property_type": "Apartment"
             }
-        
-        user = db.query(User).filter(User.id == owner.user_id).first()
+
+        owner, user = row
         return {
             "id": owner.id,
             "name": user.name if user else "Owner",
@@ -1072,7 +1203,7 @@ async def get_owner_details(owner_id: str, db: Session = Depends(get_db)) -> Dic
 
 @app.get("/owner/{owner_id}/trust")
 async def get_owner_trust(owner_id: str) -> Dict[str, Any]:
-    owner = OWNER_INDEX.get(owner_id)
+    owner = current_catalog().find_owner(owner_id)
     if not owner:
         return JSONResponse(status_code=404, content={"error": "Owner not found"})
 
@@ -1092,14 +1223,24 @@ async def get_owner_trust(owner_id: str) -> Dict[str, Any]:
 
 @app.get("/proximity/{property_id}")
 async def proximity_details(property_id: str) -> Dict[str, Any]:
-    rental = find_rental(property_id)
+    catalog = current_catalog()
+    city_key, rental = catalog.find_rental(property_id)
     if not rental:
         return JSONResponse(status_code=404, content={"error": "Property not found"})
 
     college_distance = rental.college_distance_km or rental.distance_km
     office_distance = rental.office_distance_km or rental.distance_km
-    proximity_score = max(0, 100 - (college_distance * 8 + office_distance * 4))
-    best_for = "college" if college_distance <= office_distance else "office"
+    commutes = commute_table(catalog, city_key, rental)
+    college_minutes = landmark_commute_minutes(catalog, city_key, rental, rental.nearby_college, commutes)
+    office_minutes = landmark_commute_minutes(catalog, city_key, rental, rental.nearby_office_hub, commutes)
+    if college_minutes is not None and office_minutes is not None:
+        # 100 minus the mean commute, with the college trip counting double
+        proximity_score = max(0, 100 - (2 * college_minutes + office_minutes) / 3)
+        best_for = "college" if college_minutes <= office_minutes else "office"
+    else:
+        # No position for the listing or its landmarks: fall back to distances
+        proximity_score = max(0, 100 - (college_distance * 8 + office_distance * 4))
+        best_for = "college" if college_distance <= office_distance else "office"
 
     return {
         "property_id": rental.property_id,
@@ -1109,10 +1250,44 @@ async def proximity_details(property_id: str) -> Dict[str, Any]:
         "office_distance_km": office_distance,
         "commute_minutes": rental.commute_minutes,
         "proximity_score": round(proximity_score, 1),
-        "best_for": best_for
+        "best_for": best_for,
+        "commute_minutes_to": commutes
     }
 
 
+def commute_table(catalog: CatalogStore, city: str, rental: RentalProperty) -> Dict[str, Optional[int]]:
+    """Commute minutes from a listing to every college and office hub in its city."""
+    matrix = catalog.commute_matrix()
+    commutes = matrix.city(city) if matrix is not None else None
+    if commutes is None:
+        return {}
+    cell = commutes.cell(rental.latitude, rental.longitude)
+    return {name: commutes.minutes_from_cell(cell, i) for i, name in enumerate(commutes.destinations)}
+
+
+def landmark_commute_minutes(
+    catalog: CatalogStore,
+    city: str,
+    rental: RentalProperty,
+    name: Optional[str],
+    commutes: Dict[str, Optional[int]]
+) -> Optional[float]:
+    """Commute minutes from a listing to one of its landmarks.
+
+    Taken from the commute table when the matrix has it, otherwise from the
+    same travel model; None if either position is unknown.
+    """
+    if not name:
+        return None
+    if commutes.get(name) is not None:
+        return commutes[name]
+    landmark = find_landmark(catalog, city, name)
+    if landmark is None or rental.latitude is None or rental.longitude is None:
+        return None
+    _name, lat, lon = landmark
+    return round(estimate_commute_minutes(rental.latitude, rental.longitude, lat, lon))
+
+
 @app.get("/neighborhood/{property_id}")
 async def neighborhood_analytics(property_id: str) -> Dict[str, Any]:
     rental = find_rental(property_id)
@@ -1229,66 +1404,65 @@ async def get_rental_details(property_id: str = Path(..., description="Rental pr
     """
     Return a single rental by property_id with city context.
     """
-    property_id = property_id.upper().strip()
-
-    for city_key, rentals in RENTALS_BY_CITY.items():
-        for rental in rentals:
-            if rental.property_id == property_id:
-                score = calculate_rental_recommendation_score(rental, DEMO_STUDENT)
-                return {
-                    "city": city_key.title(),
-                    "property": {
-                        "property_id": rental.property_id,
-                        "rent": rental.rent,
-                        "distance_km": rental.distance_km,
-                        "safety_score": rental.safety_score,
-                        "trust_score": rental.trust_score,
-                        "campus_fit_score": rental.campus_fit_score,
-                        "police_distance_km": rental.police_distance_km,
-                        "cctv_coverage": rental.cctv_coverage,
-                        "street_lighting": rental.street_lighting,
-                        "transit_access": rental.transit_access,
-                        "price_fairness": rental.price_fairness,
-                        "response_time_minutes": rental.response_time_minutes,
-                        "complaints_count": rental.complaints_count,
-                        "description": rental.description,
-                        "image_url": rental.image_url,
-                        "is_direct_owner": rental.is_direct_owner,
-                        "availability_status": rental.availability_status,
-                        "payment_methods": rental.payment_methods,
-                        "gender_preference": rental.gender_preference,
-                        "reviews": rental.reviews,
-                        "owner_id": rental.owner_id,
-                        "owner_name": rental.owner_name,
-                        "owner_average_rating": rental.owner_average_rating,
-                        "owner_response_time_minutes": rental.owner_response_time_minutes,
-                        "owner_complaints_count": rental.owner_complaints_count,
-                        "agreement_completed": rental.agreement_completed,
-                        "neighborhood": rental.neighborhood,
-                        "city_zone": rental.city_zone,
-                        "nearby_college": rental.nearby_college,
-                        "college_distance_km": rental.college_distance_km,
-                        "nearby_office_hub": rental.nearby_office_hub,
-                        "office_distance_km": rental.office_distance_km,
-                        "commute_minutes": rental.commute_minutes,
-                        "women_safety_index": rental.women_safety_index,
-                        "crime_index": rental.crime_index,
-                        "night_transit_score": rental.night_transit_score,
-                        "tiffin_options": rental.tiffin_options,
-                    },
-                    "overall_score": round(score.overall_score, 2),
-                    "score_breakdown": {
-                        "budget_fit": round(score.budget_fit_score, 2),
-                        "distance_fit": round(score.distance_fit_score, 2),
-                        "safety_contribution": round(score.safety_score_contrib, 2),
-                        "trust_contribution": round(score.trust_score_contrib, 2),
-                    }
-                }
+    city_key, rental = find_rental_with_city(property_id)
+    if not rental:
+        return JSONResponse(
+            status_code=404,
+            content={"error": "Not Found", "message": "Rental property not found"}
+        )
 
-    return JSONResponse(
-        status_code=404,
-        content={"error": "Not Found", "message": "Rental property not found"}
-    )
+    score = calculate_rental_recommendation_score(rental, DEMO_STUDENT)
+    return {
+        "city": city_key.title(),
+        "property": {
+            "property_id": rental.property_id,
+            "rent": rental.rent,
+            "distance_km": rental.distance_km,
+            "safety_score": rental.safety_score,
+            "trust_score": rental.trust_score,
+            "campus_fit_score": rental.campus_fit_score,
+            "police_distance_km": rental.police_distance_km,
+            "cctv_coverage": rental.cctv_coverage,
+            "street_lighting": rental.street_lighting,
+            "transit_access": rental.transit_access,
+            "price_fairness": rental.price_fairness,
+            "response_time_minutes": rental.response_time_minutes,
+            "complaints_count": rental.complaints_count,
+            "description": rental.description,
+            "image_url": rental.image_url,
+            "is_direct_owner": rental.is_direct_owner,
+            "availability_status": rental.availability_status,
+            "payment_methods": rental.payment_methods,
+            "gender_preference": rental.gender_preference,
+            "reviews": rental.reviews,
+            "owner_id": rental.owner_id,
+            "owner_name": rental.owner_name,
+            "owner_average_rating": rental.owner_average_rating,
+            "owner_response_time_minutes": rental.owner_response_time_minutes,
+            "owner_complaints_count": rental.owner_complaints_count,
+            "agreement_completed": rental.agreement_completed,
+            "neighborhood": rental.neighborhood,
+            "city_zone": rental.city_zone,
+            "nearby_college": rental.nearby_college,
+            "college_distance_km": rental.college_distance_km,
+            "nearby_office_hub": rental.nearby_office_hub,
+            "office_distance_km": rental.office_distance_km,
+            "commute_minutes": rental.commute_minutes,
+            "women_safety_index": rental.women_safety_index,
+            "crime_index": rental.crime_index,
+            "night_transit_score": rental.night_transit_score,
+            "tiffin_options": rental.tiffin_options,
+            "latitude": rental.latitude,
+            "longitude": rental.longitude,
+        },
+        "overall_score": round(score.overall_score, 2),
+        "score_breakdown": {
+            "budget_fit": round(score.budget_fit_score, 2),
+            "distance_fit": round(score.distance_fit_score, 2),
+            "safety_contribution": round(score.safety_score_contrib, 2),
+            "trust_contribution": round(score.trust_score_contrib, 2),
+        }
+    }
 
 
 @app.get("/trust-metrics")
@@ -1318,11 +1492,130 @@ async def trust_metrics() -> Dict[str, Any]:
 # ============================================================================
 
 @app.get("/health")
-async def health_check() -> Dict[str, str]:
+async def health_check() -> Dict[str, Any]:
     """
     Health check endpoint - Verifies API is running.
+
+    Always 200 while the process serves; `ready` turns true once background
+    startup work (catalog warmup, demo seeding) has finished.
     """
-    return {"status": "healthy", "service": "RentSure API"}
+    return {
+        "status": "healthy",
+        "service": "RentSure API",
+        "ready": startup_profile.ready(),
+        "startup": startup_profile.report(),
+    }
+
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics() -> Response:
+    """
+    Prometheus scrape endpoint: per-route request counts and latency,
+    scoring/DB/password-hash timings and threadpool queue depth.
+    """
+    metrics.update_threadpool_metrics()
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
+# ============================================================================
+# Admin: Catalog Hot Reload
+# ============================================================================
+
+@app.on_event("startup")
+def start_catalog_watcher():
+    """Pick up new catalog files renamed onto the catalog path."""
+    catalog_manager.start_watching()
+
+
+@app.on_event("shutdown")
+def stop_catalog_watcher():
+    catalog_manager.stop_watching()
+
+
+@app.get("/admin/catalog")
+async def catalog_status(x_admin_token: Optional[str] = Header(None)) -> Dict[str, Any]:
+    """Active catalog version and the outcome of the last reload."""
+    verify_admin_token(x_admin_token)
+    catalog = current_catalog()
+    return {
+        "catalog_version": catalog.catalog_version,
+        "built_at": catalog.built_at,
+        "loaded_cities": catalog.loaded_cities(),
+        "reloading": catalog_manager.reloading(),
+        "last_reload": catalog_manager.last_reload,
+    }
+
+
+@app.post("/admin/catalog/reload", status_code=202)
+async def reload_catalog(
+    background_tasks: BackgroundTasks,
+    rebuild: bool = False,
+    x_admin_token: Optional[str] = Header(None)
+) -> Dict[str, Any]:
+    """
+    Build the next catalog version in the background and swap it in.
+
+    With rebuild=true the catalog file is first rebuilt from
+    data/listings.json; other workers pick the new file up via their watcher.
+    """
+    verify_admin_token(x_admin_token)
+    background_tasks.add_task(catalog_manager.reload, rebuild)
+    return {
+        "status": "scheduled",
+        "rebuild": rebuild,
+        "catalog_version": current_catalog().catalog_version,
+    }
+
+
+# ============================================================================
+# Admin: Live Profiling
+# ============================================================================
+
+@app.get("/admin/profile/cpu")
+async def profile_cpu(
+    seconds: float = 10,
+    interval_ms: float = DEFAULT_INTERVAL_MS,
+    include_idle: bool = False,
+    x_admin_token: Optional[str] = Header(None)
+):
+    """
+    Sample this worker's thread stacks for `seconds` and return them in the
+    collapsed-stack format (flamegraph.pl / speedscope input).
+
+    Profiles only the worker that serves the request; the X-Worker-PID
+    response header says which one.
+    """
+    verify_admin_token(x_admin_token)
+    try:
+        stacks = await run_in_threadpool(sample_stacks, seconds, interval_ms, include_idle)
+    except ProfilerBusy as e:
+        return JSONResponse(status_code=409, content={"error": str(e)})
+    pid = os.getpid()
+    headers = export_filename(f"rentsure-{pid}-cpu", "collapsed")
+    headers["X-Worker-PID"] = str(pid)
+    return Response(stacks, media_type="text/plain; charset=utf-8", headers=headers)
+
+
+@app.get("/admin/profile/allocations")
+async def profile_allocations(
+    seconds: float = 10,
+    limit: int = 25,
+    group_by: str = "lineno",
+    frames: int = 1,
+    x_admin_token: Optional[str] = Header(None)
+) -> Dict[str, Any]:
+    """
+    Top allocation sites (tracemalloc) in this worker over the next `seconds`,
+    e.g. RecommendationResult creation while /recommendations is under load.
+    Use group_by=traceback with frames>1 to see the callers.
+    """
+    verify_admin_token(x_admin_token)
+    if group_by not in ALLOCATION_GROUPINGS:
+        return JSONResponse(status_code=400, content={"error": f"group_by must be one of: {', '.join(ALLOCATION_GROUPINGS)}"})
+    try:
+        return await run_in_threadpool(allocation_sites, seconds, min(max(1, limit), 200), group_by, min(max(1, frames), 50))
+    except ProfilerBusy as e:
+        return JSONResponse(status_code=409, content={"error": str(e)})
 
 
 # ============================================================================
@@ -1344,6 +1637,92 @@ async def error_example() -> Dict[str, str]:
     )
 
 
+# ============================================================================
+# Readiness & Warmup
+# ============================================================================
+
+# Outcome of the warmup routine, for /ready
+warmup_state: Dict[str, Any] = {"score_cache_primed": False, "requests": {}}
+
+
+def warmup_paths(catalog: CatalogStore) -> List[str]:
+    """Representative requests: the default search and recommendations per city."""
+    paths = ["/cities"]
+    for city in catalog:
+        paths += [f"/search?city={city}", f"/recommendations?city={city}"]
+    paths.append("/owner/1")
+    return paths
+
+
+async def warm_up_worker() -> None:
+    """Warm catalog, indexes, score caches and DB pools, then replay representative requests."""
+    # Maps every city and runs the warmers: geo/facet indexes, demo-profile scores
+    await run_in_threadpool(catalog_manager.warm_current)
+    warmup_state["score_cache_primed"] = True
+
+    for sync_engine in (engine, read_engine):
+        if sync_engine is not None:
+            await run_in_threadpool(warmup.open_pool_connections, sync_engine)
+    for pool_engine in (async_engine, async_read_engine):
+        if pool_engine is not None:
+            await warmup.open_async_pool_connections(pool_engine)
+
+    for path in warmup_paths(current_catalog()):
+        status = await warmup.asgi_get(app, path)
+        warmup_state["requests"][path] = status
+        if status >= 500:
+            print(f"⚠ Warmup request {path} returned {status}")
+
+
+@app.on_event("startup")
+async def start_warmup():
+    """Run the warmup routine on the serving event loop, off the startup path."""
+    startup_profile.background("warmup", warm_up_worker)
+
+
+def readiness_checks() -> Dict[str, bool]:
+    """Each condition /ready waits for."""
+    catalog = current_catalog()
+    pools = [e for e in (engine, read_engine, async_engine.sync_engine) if e is not None]
+    if async_read_engine is not None:
+        pools.append(async_read_engine.sync_engine)
+    return {
+        "startup_tasks_done": startup_profile.ready(),
+        "catalog_loaded": catalog.fully_loaded(),
+        "indexes_built": catalog.fully_loaded() and all(catalog[city].indexes_built() for city in catalog),
+        "db_pool_open": all(warmup.open_connections(e) != 0 for e in pools),
+        # Recorded once: score caches evict under traffic, and a warm worker
+        # must not flap out of rotation because of it
+        "score_cache_primed": warmup_state["score_cache_primed"],
+    }
+
+
+@app.get("/ready")
+async def readiness_check() -> Dict[str, Any]:
+    """
+    Readiness probe: 200 once the worker is warm, 503 until then.
+
+    Point the load balancer here (and liveness checks at /health) so traffic
+    only reaches workers whose catalog, indexes, DB pool and caches are warm.
+    """
+    checks = readiness_checks()
+    body = {"ready": all(checks.values()), "checks": checks, "warmup_requests": warmup_state["requests"]}
+    if not body["ready"]:
+        return JSONResponse(status_code=503, content=body)
+    return body
+
+
+# ============================================================================
+# Startup Budget
+# ============================================================================
+
+# Registered last, so it runs after every other startup handler
+@app.on_event("startup")
+def report_startup():
+    """Log time-to-serve against RENTSURE_STARTUP_BUDGET_SECONDS."""
+    startup_profile.serving()
+
+
 # ============================================================================
 # Run Instructions
 # ============================================================================
@@ -1371,5 +1750,7 @@ To run this API locally:
 
 5. For production deployment:
    - Use gunicorn: gunicorn -w 4 -k uvicorn.workers.UvicornWorker app:app
+     (workers share one memory-mapped copy of data/catalog.bin; publish a new
+     catalog version with `python catalog_build.py`, which renames atomically)
    - Or use docker for containerization
 """
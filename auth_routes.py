@@ -1,20 +1,29 @@
 """
 Authentication routes for RentSure
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Header
+from fastapi import APIRouter, Depends, HTTPException, status, Header, UploadFile, File
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import case, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import Optional
 
-from models import User, Tenant, Owner, Property, UserRole, get_db
+from models import User, Tenant, Owner, Property, UserRole, get_db, get_async_db, get_async_read_db
 from schemas import (
     TenantSignupRequest, OwnerSignupRequest, LoginRequest,
     TokenResponse, UserResponse, TenantResponse, OwnerResponse,
-    PropertyCreateRequest, PropertyResponse
+    PropertyCreateRequest, PropertyResponse, PropertyBulkUpdateRequest
 )
 from auth_utils import (
     hash_password, verify_password, create_access_token,
     verify_token, get_token_from_header
 )
+from property_import import IMPORT_FORMATS, detect_format, import_properties
+from exports import (
+    EXPORT_FORMATS, EXPORT_MEDIA_TYPES, OWNER_EXPORT_COLUMNS,
+    encode_rows, export_filename, iter_owner_properties
+)
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
@@ -114,11 +123,13 @@ def register_owner(req: OwnerSignupRequest, db: Session = Depends(get_db)):
 
 
 @router.post("/login", response_model=TokenResponse)
-def login(req: LoginRequest, db: Session = Depends(get_db)):
+async def login(req: LoginRequest, db: AsyncSession = Depends(get_async_db)):
     """Login with email and password"""
     # Find user
-    user = db.query(User).filter(User.email == req.email).first()
-    if not user or not verify_password(req.password, user.password_hash):
+    result = await db.execute(select(User).where(User.email == req.email))
+    user = result.scalars().first()
+    # pbkdf2 is CPU-bound; keep it off the event loop
+    if not user or not await run_in_threadpool(verify_password, req.password, user.password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password"
@@ -140,12 +151,13 @@ def login(req: LoginRequest, db: Session = Depends(get_db)):
 
 
 @router.get("/me")
-def get_current_user(authorization: Optional[str] = Header(None), db: Session = Depends(get_db)):
+async def get_current_user(authorization: Optional[str] = Header(None), db: AsyncSession = Depends(get_async_read_db)):
     """Get current authenticated user info"""
     token = get_token_from_header(authorization)
     payload = verify_token(token)
     
-    user = db.query(User).filter(User.id == payload.get("user_id")).first()
+    result = await db.execute(select(User).where(User.id == payload.get("user_id")))
+    user = result.scalars().first()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -170,7 +182,7 @@ owner_router = APIRouter(prefix="/owner", tags=["owner"])
 
 
 @owner_router.get("/properties")
-def get_owner_properties(authorization: Optional[str] = Header(None), db: Session = Depends(get_db)):
+async def get_owner_properties(authorization: Optional[str] = Header(None), db: AsyncSession = Depends(get_async_read_db)):
     """Get all properties for current owner"""
     token = get_token_from_header(authorization)
     payload = verify_token(token)
@@ -182,7 +194,8 @@ def get_owner_properties(authorization: Optional[str] = Header(None), db: Sessio
         )
     
     user_id = payload.get("user_id")
-    properties = db.query(Property).filter(Property.owner_id == user_id).all()
+    result = await db.execute(select(Property).where(Property.owner_id == user_id))
+    properties = result.scalars().all()
     
     return {
         "properties": [
@@ -202,6 +215,33 @@ def get_owner_properties(authorization: Optional[str] = Header(None), db: Sessio
     }
 
 
+@owner_router.get("/properties/export")
+def export_owner_properties(format: str = "ndjson", authorization: Optional[str] = Header(None)):
+    """Stream the current owner's full portfolio as NDJSON or CSV"""
+    token = get_token_from_header(authorization)
+    payload = verify_token(token)
+    
+    if payload.get("role") != UserRole.OWNER:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only owners can access this route"
+        )
+    
+    fmt = format.lower()
+    if fmt not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="format must be ndjson or csv"
+        )
+    
+    rows = iter_owner_properties(payload.get("user_id"))
+    return StreamingResponse(
+        encode_rows(rows, fmt, OWNER_EXPORT_COLUMNS),
+        media_type=EXPORT_MEDIA_TYPES[fmt],
+        headers=export_filename("properties", fmt)
+    )
+
+
 @owner_router.post("/properties", response_model=dict)
 def create_property(
     req: PropertyCreateRequest,
@@ -247,6 +287,37 @@ def create_property(
     }
 
 
+@owner_router.post("/properties/import")
+def bulk_import_properties(
+    file: UploadFile = File(...),
+    format: Optional[str] = None,
+    authorization: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
+    """Bulk-create properties from a CSV or NDJSON upload"""
+    token = get_token_from_header(authorization)
+    payload = verify_token(token)
+    
+    if payload.get("role") != UserRole.OWNER:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only owners can create properties"
+        )
+    
+    fmt = (format or detect_format(file.filename, file.content_type) or "").lower()
+    if fmt not in IMPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Upload a .csv or .ndjson file, or pass format=csv|ndjson"
+        )
+    
+    # The upload is spooled to disk by the server; rows are parsed and
+    # inserted incrementally rather than loaded into memory at once.
+    result = import_properties(db, payload.get("user_id"), file.file, fmt)
+    result["message"] = f"Imported {result['imported']} properties, {result['failed']} rows rejected"
+    return result
+
+
 @owner_router.put("/properties/{property_id}")
 def update_property(
     property_id: int,
@@ -377,3 +448,65 @@ def toggle_availability(
         "availability": property.availability,
         "message": "Availability updated"
     }
+
+
+@owner_router.patch("/properties")
+def bulk_update_properties(
+    req: PropertyBulkUpdateRequest,
+    authorization: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
+    """Update availability and/or rent for many properties in one transaction"""
+    token = get_token_from_header(authorization)
+    payload = verify_token(token)
+    
+    if payload.get("role") != UserRole.OWNER:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only owners can update properties"
+        )
+    
+    user_id = payload.get("user_id")
+    # Later entries for the same id win
+    availability_changes = {u.id: u.availability for u in req.updates if u.availability is not None}
+    rent_changes = {u.id: u.rent for u in req.updates if u.rent is not None}
+    property_ids = set(availability_changes) | set(rent_changes)
+    if not property_ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No availability or rent changes given"
+        )
+    
+    # One ownership check for the whole batch
+    owners = dict(db.execute(
+        select(Property.id, Property.owner_id).where(Property.id.in_(property_ids))
+    ).all())
+    missing = sorted(property_ids - owners.keys())
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Properties not found: {missing}"
+        )
+    not_owned = sorted(pid for pid, owner_id in owners.items() if owner_id != user_id)
+    if not_owned:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=f"You can only update your own properties: {not_owned}"
+        )
+    
+    # One UPDATE per change type; CASE maps each id to its new value
+    for column, changes in ((Property.availability, availability_changes), (Property.rent, rent_changes)):
+        if changes:
+            db.execute(
+                update(Property)
+                .where(Property.id.in_(changes))
+                .values({column: case(changes, value=Property.id)})
+            )
+    db.commit()
+    
+    return {
+        "updated": len(property_ids),
+        "availability_updated": len(availability_changes),
+        "rent_updated": len(rent_changes),
+        "message": "Properties updated"
+    }
@@ -1,27 +1,39 @@
 """Authentication utilities: JWT token handling and password hashing.
 
-Uses python-jose for JWTs and passlib[bcrypt] for password hashing.
+Uses python-jose for JWTs and passlib[bcrypt] for password hashing. Both are
+imported on first use, so workers start without paying for them.
 """
+import hmac
+import os
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 from typing import Optional
 
 from fastapi import HTTPException, status
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+
+from metrics import PASSWORD_HASH_LATENCY
 
 # Secret key for JWT - use environment variable in production
 SECRET_KEY = "rentsure-secret-key-dev-only-change-in-production"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_HOURS = 6
 
+# Shared secret for operational /admin endpoints; they are disabled when unset
+ADMIN_TOKEN = os.environ.get("RENTSURE_ADMIN_TOKEN")
+
 
-# Use pbkdf2_sha256 to avoid native bcrypt backend issues on some platforms
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+@lru_cache(maxsize=None)
+def pwd_context():
+    """Password hashing context, built on first use."""
+    from passlib.context import CryptContext
+    # Use pbkdf2_sha256 to avoid native bcrypt backend issues on some platforms
+    return CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
 
 
 def hash_password(password: str) -> str:
     """Hash a password using bcrypt via passlib."""
-    return pwd_context.hash(password)
+    with PASSWORD_HASH_LATENCY.time("hash"):
+        return pwd_context().hash(password)
 
 
 def verify_password(plain_password: str, password_hash: str) -> bool:
@@ -31,7 +43,8 @@ def verify_password(plain_password: str, password_hash: str) -> bool:
     instead of raising so that the API returns a clean 401.
     """
     try:
-        return pwd_context.verify(plain_password, password_hash)
+        with PASSWORD_HASH_LATENCY.time("verify"):
+            return pwd_context().verify(plain_password, password_hash)
     except ValueError:
         # Unknown or invalid hash format
         return False
@@ -39,6 +52,8 @@ def verify_password(plain_password: str, password_hash: str) -> bool:
 
 def create_access_token(data: dict) -> str:
     """Create a JWT access token"""
+    from jose import jwt
+
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + timedelta(hours=ACCESS_TOKEN_EXPIRE_HOURS)
     to_encode.update({"exp": expire})
@@ -49,6 +64,8 @@ def create_access_token(data: dict) -> str:
 
 def verify_token(token: str) -> dict:
     """Verify and decode a JWT token."""
+    from jose import JWTError, jwt
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         return payload
@@ -75,3 +92,17 @@ def get_token_from_header(auth_header: Optional[str]) -> str:
         )
     
     return parts[1]
+
+
+def verify_admin_token(token: Optional[str]) -> None:
+    """Check an X-Admin-Token header value against RENTSURE_ADMIN_TOKEN."""
+    if not ADMIN_TOKEN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin endpoints are disabled"
+        )
+    if not token or not hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid admin token"
+        )
@@ -0,0 +1,338 @@
+"""
+RentSure benchmark suite
+
+Times the scoring, search and auth hot paths against seeded synthetic
+catalogs (1k / 100k / 1M listings) and reports calls/sec, listings/sec and
+peak allocation per call. Results are written as JSON so runs can be
+compared; `compare` flags benchmarks that got slower or allocate more.
+
+Usage:
+    python benchmarks.py run [--sizes 1k,100k,1m] [--only search_score,...]
+                             [--output benchmark_results/run.json]
+    python benchmarks.py compare BASELINE.json CURRENT.json [--threshold 0.10]
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from rental_recommender import RentalProperty, StudentProfile, recommend_rentals
+from trust_score import calculate_trust_score
+from catalog_store import CatalogStore, write_catalog
+
+SIZES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+DEFAULT_SIZES = "1k,100k"
+DEFAULT_OUTPUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_results")
+# A benchmark is "regressed" when it loses more than this fraction of its
+# throughput (or allocates this much more) against the baseline
+DEFAULT_THRESHOLD = 0.10
+
+BENCH_CITY = "benchville"
+NEIGHBORHOODS = ["Kothrud", "Baner", "Viman Nagar", "Hadapsar", "Aundh", "Wakad", "Shivajinagar", "Kharadi"]
+COLLEGES = ["COEP", "PICT", "VIT", "MIT-WPU", "Symbiosis"]
+OFFICE_HUBS = ["Hinjewadi", "Magarpatta", "EON IT Park", "Kharadi IT Park"]
+DESCRIPTION_WORDS = [
+    "safe", "pg", "flat", "2bhk", "1bhk", "room", "furnished", "near", "college", "metro",
+    "cctv", "security", "quiet", "spacious", "girls", "boys", "wifi", "balcony", "no", "broker",
+]
+SEARCH_QUERY = "safe pg near college"
+
+
+# ============================================================================
+# Synthetic data
+# ============================================================================
+
+def synthetic_rentals(count: int, seed: int = 42) -> List[RentalProperty]:
+    """Seeded, catalog-ready listings with realistic value ranges."""
+    rng = random.Random(seed)
+    rentals = []
+    for i in range(count):
+        distance = round(rng.uniform(0.3, 15.0), 1)
+        safety = rng.randint(45, 99)
+        trust = rng.randint(40, 99)
+        rentals.append(RentalProperty(
+            property_id=f"BEN{i + 1:07d}",
+            rent=rng.randrange(4000, 30001, 500),
+            distance_km=distance,
+            safety_score=safety,
+            trust_score=trust,
+            description=" ".join(rng.sample(DESCRIPTION_WORDS, 8)),
+            campus_fit_score=round(max(0.0, 10 - distance * 0.6), 1),
+            cctv_coverage=rng.randint(30, 100),
+            transit_access=rng.randint(30, 100),
+            price_fairness=rng.choice(["Fair", "Low", "High"]),
+            response_time_minutes=rng.randint(5, 240),
+            complaints_count=rng.randint(0, 6),
+            is_direct_owner=rng.random() < 0.6,
+            availability_status=rng.choice(["available", "available", "limited", "occupied"]),
+            payment_methods=rng.choice([["UPI"], ["UPI", "Cash"], ["UPI", "Bank Transfer", "Cash"]]),
+            gender_preference=rng.choice(["male", "female", "any"]),
+            owner_id=f"OWN-BEN-{i // 4 + 1:06d}",
+            owner_name="Bench Rentals",
+            owner_average_rating=round(rng.uniform(3.0, 4.9), 1),
+            agreement_completed=trust >= 85,
+            neighborhood=rng.choice(NEIGHBORHOODS),
+            city_zone=rng.choice(["East", "West", "Central"]),
+            nearby_college=rng.choice(COLLEGES),
+            college_distance_km=max(0.6, round(distance - 0.4, 1)),
+            nearby_office_hub=rng.choice(OFFICE_HUBS),
+            office_distance_km=max(1.0, round(distance + 1.1, 1)),
+            latitude=round(18.45 + rng.random() * 0.2, 6),
+            longitude=round(73.75 + rng.random() * 0.2, 6),
+        ))
+    return rentals
+
+
+def synthetic_catalog(rentals: Sequence[RentalProperty], directory: str) -> CatalogStore:
+    """Write rentals as a one-city catalog file and open it like the API does."""
+    path = os.path.join(directory, f"catalog-{len(rentals)}.bin")
+    write_catalog(path, {BENCH_CITY: rentals}, {BENCH_CITY: {}}, f"bench-{len(rentals)}")
+    # No commute matrix: the path below never exists
+    return CatalogStore(path, commute_path=os.path.join(directory, "no-commute.bin"))
+
+
+# ============================================================================
+# Measurement
+# ============================================================================
+
+def measure(func: Callable[[], Any], min_time: float, min_runs: int, max_runs: int) -> Dict[str, float]:
+    """Time repeated calls (after one warm-up) and the peak allocation of one call."""
+    func()
+    times: List[float] = []
+    started = time.perf_counter()
+    gc_was_enabled = gc.isenabled()
+    while len(times) < max_runs and (len(times) < min_runs or time.perf_counter() - started < min_time):
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            func()
+            times.append(time.perf_counter() - start)
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        _current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    median = statistics.median(times)
+    return {
+        "runs": len(times),
+        "median_ms": round(median * 1000, 4),
+        "min_ms": round(min(times) * 1000, 4),
+        "stdev_ms": round(statistics.pstdev(times) * 1000, 4),
+        "ops_per_sec": round(1 / median, 3) if median else float("inf"),
+        "peak_alloc_kb": round(peak / 1024, 1),
+    }
+
+
+class Benchmark:
+    """One named hot path: func() is timed, `items` is work done per call."""
+
+    def __init__(self, name: str, func: Callable[[], Any], items: int = 1, size: Optional[str] = None) -> None:
+        self.name = name
+        self.func = func
+        self.items = items
+        self.size = size
+
+
+def catalog_benchmarks(size: str, rentals: List[RentalProperty], store: CatalogStore, seed: int) -> List[Benchmark]:
+    from app import search_score  # app.py owns search_score; import only when benchmarking it
+
+    count = len(rentals)
+    catalog = store[BENCH_CITY]
+    student = StudentProfile(max_budget=15000, preferred_distance_km=5.0)
+    budgets = iter(range(15000, 10**9))
+
+    def recommend_catalog() -> None:
+        # A new profile each call, so the per-profile score cache never hits
+        recommend_rentals(StudentProfile(max_budget=next(budgets), preferred_distance_km=5.0), catalog, top_n=10)
+
+    rng = random.Random(seed)
+    lookups = [f"BEN{rng.randint(1, count):07d}" for _ in range(1000)]
+    store.find_rental(lookups[0])  # build the id index outside the timing
+
+    def find_many() -> None:
+        for property_id in lookups:
+            store.find_rental(property_id)
+
+    return [
+        Benchmark("recommend_rentals[list]", lambda: recommend_rentals(student, rentals, top_n=10), count, size),
+        Benchmark("recommend_rentals[catalog]", recommend_catalog, count, size),
+        Benchmark("search_score", lambda: [search_score(SEARCH_QUERY, rental) for rental in rentals], count, size),
+        Benchmark("find_rental", find_many, len(lookups), size),
+    ]
+
+
+def standalone_benchmarks(seed: int) -> List[Benchmark]:
+    from auth_utils import hash_password
+
+    rng = random.Random(seed)
+    owners = [
+        (round(rng.uniform(1.0, 5.0), 1), rng.randint(1, 600), rng.randint(0, 10), rng.random() < 0.5)
+        for _ in range(10_000)
+    ]
+
+    def trust_scores() -> None:
+        for owner in owners:
+            calculate_trust_score(*owner)
+
+    return [
+        Benchmark("calculate_trust_score", trust_scores, len(owners)),
+        Benchmark("hash_password", lambda: hash_password("Bench@12345")),
+    ]
+
+
+def run_benchmark(bench: Benchmark, args: argparse.Namespace) -> Dict[str, Any]:
+    stats = measure(bench.func, args.min_time, args.min_runs, args.max_runs)
+    result = {"name": bench.name, "size": bench.size, "items_per_call": bench.items}
+    result.update(stats)
+    result["items_per_sec"] = round(bench.items * 1000 / stats["median_ms"], 1) if stats["median_ms"] else float("inf")
+    size = f"[{bench.size}]" if bench.size else ""
+    print(
+        f"  {bench.name + size:<36} {stats['ops_per_sec']:>12,.1f} ops/s {result['items_per_sec']:>14,.0f} items/s "
+        f"{stats['median_ms']:>10.3f} ms {stats['peak_alloc_kb']:>11,.1f} KB peak"
+    )
+    return result
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args: argparse.Namespace) -> int:
+    sizes = [size.strip().lower() for size in args.sizes.split(",") if size.strip()]
+    unknown = [size for size in sizes if size not in SIZES]
+    if unknown:
+        print(f"⚠ Unknown sizes {unknown}; choose from {', '.join(SIZES)}")
+        return 2
+    only = set(args.only.split(",")) if args.only else None
+
+    results = []
+    print("Standalone:")
+    for bench in standalone_benchmarks(args.seed):
+        if only is None or bench.name in only:
+            results.append(run_benchmark(bench, args))
+
+    with tempfile.TemporaryDirectory(prefix="rentsure-bench-") as directory:
+        for size in sizes:
+            print(f"Catalog {size} ({SIZES[size]:,} listings):")
+            rentals = synthetic_rentals(SIZES[size], args.seed)
+            store = synthetic_catalog(rentals, directory)
+            for bench in catalog_benchmarks(size, rentals, store, args.seed):
+                if only is None or bench.name in only:
+                    results.append(run_benchmark(bench, args))
+            del rentals, store
+            gc.collect()
+
+    report = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "sizes": sizes,
+        },
+        "results": results,
+    }
+    output = args.output
+    if output is None:
+        os.makedirs(DEFAULT_OUTPUT_DIR, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        output = os.path.join(DEFAULT_OUTPUT_DIR, f"{stamp}.json")
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"✓ Results written to {output}")
+    return 0
+
+
+# ============================================================================
+# Comparison
+# ============================================================================
+
+def compare(args: argparse.Namespace) -> int:
+    """Print per-benchmark change; exit status 1 if anything regressed."""
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = {(r["name"], r["size"]): r for r in json.load(f)["results"]}
+    with open(args.current, encoding="utf-8") as f:
+        current = json.load(f)["results"]
+
+    regressions = 0
+    print(f"{'benchmark':<38} {'baseline ops/s':>15} {'current ops/s':>15} {'change':>8} {'alloc':>8}")
+    for result in current:
+        key = (result["name"], result["size"])
+        label = result["name"] + (f"[{result['size']}]" if result["size"] else "")
+        before = baseline.get(key)
+        if before is None:
+            print(f"{label:<38} {'-':>15} {result['ops_per_sec']:>15,.1f}      new")
+            continue
+        speed = result["ops_per_sec"] / before["ops_per_sec"] - 1 if before["ops_per_sec"] else 0.0
+        alloc_before = before.get("peak_alloc_kb") or 0
+        alloc = result["peak_alloc_kb"] / alloc_before - 1 if alloc_before else 0.0
+        flags = []
+        if speed < -args.threshold:
+            flags.append("SLOWER")
+        if alloc > args.threshold and result["peak_alloc_kb"] - alloc_before > 1:
+            flags.append("MORE ALLOC")
+        regressions += bool(flags)
+        print(
+            f"{label:<38} {before['ops_per_sec']:>15,.1f} {result['ops_per_sec']:>15,.1f} "
+            f"{speed:>+8.1%} {alloc:>+8.1%}  {' '.join(flags) or 'ok'}"
+        )
+    missing = set(baseline) - {(r["name"], r["size"]) for r in current}
+    for name, size in sorted(missing, key=str):
+        print(f"{name + (f'[{size}]' if size else ''):<38} missing from current run")
+
+    if regressions:
+        print(f"⚠ {regressions} benchmark(s) regressed by more than {args.threshold:.0%}")
+        return 1
+    print(f"✓ No regressions beyond {args.threshold:.0%}")
+    return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="RentSure hot-path benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run the benchmarks and write a JSON report")
+    run_parser.add_argument("--sizes", default=DEFAULT_SIZES, help=f"catalog sizes ({', '.join(SIZES)})")
+    run_parser.add_argument("--only", help="comma-separated benchmark names")
+    run_parser.add_argument("--output", help="report path (default benchmark_results/<timestamp>.json)")
+    run_parser.add_argument("--seed", type=int, default=42, help="synthetic data seed")
+    run_parser.add_argument("--min-time", type=float, default=1.0, help="minimum seconds per benchmark")
+    run_parser.add_argument("--min-runs", type=int, default=3, help="minimum timed calls per benchmark")
+    run_parser.add_argument("--max-runs", type=int, default=1000, help="maximum timed calls per benchmark")
+
+    compare_parser = commands.add_parser("compare", help="compare two reports")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="allowed fractional regression")
+
+    args = parser.parse_args()
+    sys.exit(run(args) if args.command == "run" else compare(args))
+
+
+if __name__ == "__main__":
+    main()
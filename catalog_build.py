@@ -0,0 +1,127 @@
+"""
+RentSure offline catalog builder
+
+Reads the raw listings source (data/listings.json), runs the listing
+enrichment (proximity, owners, neighborhood analytics) and writes the packed
+catalog file that the API loads lazily per city, plus the commute matrix for
+that catalog version. Enrichment happens here, at build time, instead of on
+every worker import.
+
+Usage:
+    python catalog_build.py [--source data/listings.json] [--output data/catalog.bin]
+                            [--commute-output data/commute.bin]
+"""
+import argparse
+import hashlib
+import json
+import os
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from rental_recommender import RentalProperty
+from catalog_store import DEFAULT_CATALOG_PATH, FORMAT_VERSION, write_catalog
+from commute_matrix import DEFAULT_COMMUTE_PATH, CommuteMatrix, write_commute_matrix
+from geo_index import haversine_km
+
+DEFAULT_SOURCE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "listings.json")
+# Part of the catalog version: bump when enrich_rentals derives fields
+# differently, so response caches keyed by version drop the old values
+ENRICHMENT_VERSION = 2
+
+
+def load_source(path: str) -> Tuple[Dict[str, List[RentalProperty]], Dict[str, Any], str]:
+    """Load raw listings and city metadata. Also returns the source digest."""
+    with open(path, "rb") as f:
+        raw = f.read()
+    source = json.loads(raw.decode("utf-8"))
+    rentals_by_city = {
+        city: [RentalProperty(**listing) for listing in listings]
+        for city, listings in source["listings"].items()
+    }
+    return rentals_by_city, source["city_meta"], hashlib.sha256(raw).hexdigest()
+
+
+def landmark_distance_km(rental: RentalProperty, landmarks: Mapping[str, Sequence[float]], name: Optional[str]) -> Optional[float]:
+    """Straight-line km from a listing to a named landmark, None if either position is unknown."""
+    point = landmarks.get(name) if name else None
+    if point is None or rental.latitude is None or rental.longitude is None:
+        return None
+    return round(haversine_km(rental.latitude, rental.longitude, point[0], point[1]), 1)
+
+
+def enrich_rentals(rentals_by_city: Dict[str, List[RentalProperty]], city_meta: Dict[str, Any]) -> None:
+    """Fill in proximity, owner and neighborhood fields for every listing."""
+    for city_key, rentals in rentals_by_city.items():
+        meta = city_meta.get(city_key, {})
+        neighborhoods = meta.get("neighborhoods", [])
+        colleges = meta.get("colleges", [])
+        office_hubs = meta.get("office_hubs", [])
+        zones = meta.get("zones", [])
+        tiffin_options = meta.get("tiffin", [])
+        landmarks = meta.get("landmarks", {})
+
+        for idx, rental in enumerate(rentals):
+            rental.neighborhood = neighborhoods[idx % len(neighborhoods)] if neighborhoods else None
+            rental.city_zone = zones[idx % len(zones)] if zones else None
+            rental.nearby_college = colleges[idx % len(colleges)] if colleges else None
+            rental.nearby_office_hub = office_hubs[idx % len(office_hubs)] if office_hubs else None
+            rental.college_distance_km = landmark_distance_km(rental, landmarks, rental.nearby_college)
+            rental.office_distance_km = landmark_distance_km(rental, landmarks, rental.nearby_office_hub)
+            rental.women_safety_index = min(100, rental.safety_score + 4)
+            rental.crime_index = max(5, 100 - rental.safety_score)
+            rental.night_transit_score = rental.transit_access
+            rental.tiffin_options = tiffin_options
+
+            rental.owner_id = f"OWN-{city_key[:3].upper()}-{idx + 1:02d}"
+            rental.owner_name = f"{rental.neighborhood} Rentals"
+            rental.owner_average_rating = round(min(4.9, 3.8 + (rental.trust_score / 100) * 1.2), 1)
+            rental.owner_response_time_minutes = rental.response_time_minutes
+            rental.owner_complaints_count = rental.complaints_count
+            rental.agreement_completed = rental.trust_score >= 85
+
+
+def set_commute_minutes(rentals_by_city: Dict[str, List[RentalProperty]], matrix: CommuteMatrix) -> None:
+    """Set commute_minutes to the matrix minutes to each listing's college (else its office hub)."""
+    for city_key, rentals in rentals_by_city.items():
+        commutes = matrix.city(city_key)
+        for rental in rentals:
+            rental.commute_minutes = None
+            if commutes is None:
+                continue
+            for destination in (rental.nearby_college, rental.nearby_office_hub):
+                minutes = commutes.minutes(rental.latitude, rental.longitude, destination) if destination else None
+                if minutes is not None:
+                    rental.commute_minutes = minutes
+                    break
+
+
+def build_catalog(
+    source_path: str = DEFAULT_SOURCE_PATH,
+    output_path: str = DEFAULT_CATALOG_PATH,
+    commute_path: str = DEFAULT_COMMUTE_PATH
+) -> str:
+    """Build the catalog and commute matrix from source. Returns the new catalog version."""
+    rentals_by_city, city_meta, digest = load_source(source_path)
+    enrich_rentals(rentals_by_city, city_meta)
+    # Same source + same format => same version, so rebuilds are idempotent
+    catalog_version = f"v{FORMAT_VERSION}-e{ENRICHMENT_VERSION}-{digest[:12]}"
+    # Matrix first: a watcher that sees the new catalog finds its matrix ready,
+    # and each listing's commute_minutes is read from the same grid the API uses
+    write_commute_matrix(commute_path, rentals_by_city, city_meta, catalog_version)
+    set_commute_minutes(rentals_by_city, CommuteMatrix(commute_path))
+    write_catalog(output_path, rentals_by_city, city_meta, catalog_version)
+    return catalog_version
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build the RentSure listings catalog")
+    parser.add_argument("--source", default=DEFAULT_SOURCE_PATH, help="raw listings JSON")
+    parser.add_argument("--output", default=DEFAULT_CATALOG_PATH, help="catalog file to write")
+    parser.add_argument("--commute-output", default=DEFAULT_COMMUTE_PATH, help="commute matrix file to write")
+    args = parser.parse_args()
+
+    version = build_catalog(args.source, args.output, args.commute_output)
+    print(f"✓ Catalog {version} written to {args.output} (commute matrix: {args.commute_output})")
+
+
+if __name__ == "__main__":
+    main()
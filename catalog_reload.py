@@ -0,0 +1,136 @@
+"""
+Hot catalog reload for RentSure
+
+CatalogManager owns the active CatalogStore. A reload prepares the next
+version entirely off the request path (optionally rebuilding it from source,
+then mapping every city, building lookup indexes and priming score caches)
+and only then swaps the reference. Requests read the active catalog once and
+keep using that version until they finish.
+
+Reloads are triggered by an admin call or by a file watcher that notices a
+new catalog renamed onto the path. With several workers, one admin rebuild
+publishes the file and every worker's watcher picks it up. A file that fails
+to load is skipped by the watcher until another file replaces it.
+"""
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from catalog_store import CatalogStore, file_signature
+
+# Seconds between checks for a new catalog file (0 disables the watcher)
+WATCH_INTERVAL_SECONDS = float(os.environ.get("RENTSURE_CATALOG_WATCH_SECONDS", "5"))
+
+
+class CatalogManager:
+    """Holds the active catalog version and swaps in new ones atomically."""
+
+    def __init__(self, path: str, warmers: Optional[List[Callable[[CatalogStore], None]]] = None) -> None:
+        self.path = path
+        # Run against each new version before it goes live (e.g. score caches)
+        self.warmers = list(warmers or [])
+        self._current = CatalogStore(path)
+        self._reload_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+        # Signature of a catalog file the watcher failed to load
+        self._failed_file: Optional[Tuple[int, int, int]] = None
+        self.last_reload: Dict[str, Any] = {}
+
+    @property
+    def current(self) -> CatalogStore:
+        """The active catalog. Read it once per request."""
+        return self._current
+
+    def reload(self, rebuild: bool = False) -> Dict[str, Any]:
+        """Prepare the next catalog version and swap it in.
+
+        With rebuild=True the catalog is first rebuilt (and re-enriched) from
+        the listings source. Only one reload runs at a time; a concurrent
+        call returns immediately. On failure the current version stays live.
+        """
+        if not self._reload_lock.acquire(blocking=False):
+            return {"status": "in_progress", "catalog_version": self._current.catalog_version}
+
+        started = time.perf_counter()
+        previous = self._current.catalog_version
+        try:
+            if rebuild:
+                # Imported lazily: building is an offline/admin operation
+                from catalog_build import build_catalog
+                build_catalog(output_path=self.path)
+
+            store = CatalogStore(self.path)
+            store.load_all()
+            for warm in self.warmers:
+                warm(store)
+
+            # Single reference assignment: new requests see the new version,
+            # in-flight requests keep the store they already read.
+            self._current = store
+            result = {
+                "status": "reloaded",
+                "previous_version": previous,
+                "catalog_version": store.catalog_version,
+            }
+        except Exception as exc:
+            result = {"status": "failed", "catalog_version": previous, "error": str(exc)}
+            print(f"Catalog reload failed: {exc}")
+        finally:
+            self._reload_lock.release()
+
+        result["duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        result["finished_at"] = datetime.now(timezone.utc).isoformat()
+        self.last_reload = result
+        return result
+
+    def warm_current(self) -> None:
+        """Map every city of the active version and run the warmers on it.
+
+        For a freshly started worker, whose catalog is otherwise mapped city by
+        city on first use. Safe alongside requests: each step is idempotent.
+        """
+        store = self._current
+        store.load_all()
+        for warm in self.warmers:
+            warm(store)
+
+    def reloading(self) -> bool:
+        return self._reload_lock.locked()
+
+    # ----- File watching -----------------------------------------------------
+
+    def start_watching(self, interval: float = WATCH_INTERVAL_SECONDS) -> None:
+        """Reload whenever a new catalog file is renamed onto the path."""
+        if interval <= 0 or self._watcher is not None:
+            return
+        self._stop.clear()
+        self._watcher = threading.Thread(
+            target=self._watch, args=(interval,), name="catalog-watcher", daemon=True
+        )
+        self._watcher.start()
+
+    def stop_watching(self) -> None:
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=5)
+            self._watcher = None
+
+    def _watch(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            self.check_for_update()
+
+    def check_for_update(self) -> Optional[Dict[str, Any]]:
+        """One watcher tick: reload if a new, not yet failed, file is on the path."""
+        signature = file_signature(self.path)
+        if signature is None or signature == self._failed_file or not self._current.is_stale():
+            return None
+        result = self.reload()
+        if result["status"] == "failed":
+            self._failed_file = signature
+            print("⚠ Skipping this catalog file until a new one replaces it")
+        elif result["status"] == "reloaded":
+            self._failed_file = None
+        return result
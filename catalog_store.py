@@ -0,0 +1,529 @@
+"""
+RentSure listings catalog storage
+
+Listings are built offline (see catalog_build.py) into a versioned, packed
+columnar file instead of living as Python literals in app.py. Opening the
+catalog only reads a small header; each city's section is mapped on first use,
+so worker startup does not depend on catalog size.
+
+The file is memory-mapped read-only. Numeric columns are used in place
+(zero-copy) and strings are decoded from the pool only when a listing is
+materialized, so every worker process shares the same page-cache copy of the
+catalog. A new version is published by writing a temp file and renaming it
+over the old one; stores that already mapped the old file keep using it.
+
+File layout (integers little-endian, sections 8-byte aligned):
+
+    magic         5 bytes   b"RSCAT"
+    format        uint16    FORMAT_VERSION
+    header_len    uint32
+    header        JSON      catalog_version, city_meta, per-city section index
+    city sections, one per city:
+        numeric columns   float64 x count each (NaN means None)
+        string columns    uint32 x count each (string pool index, NO_STRING = None)
+        string pool       uint32 offsets x (pool_size + 1), then UTF-8 bytes
+"""
+import json
+import math
+import mmap
+import os
+import struct
+import sys
+import threading
+from array import array
+from functools import lru_cache
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+from rental_recommender import RentalCatalog, RentalProperty
+from commute_matrix import DEFAULT_COMMUTE_PATH, CommuteMatrix, CommuteMatrixError
+from facets import FACET_FIELDS, FacetIndex
+from geo_index import ClusterGrid, GeoIndex, cluster_cell_degrees
+
+MAGIC = b"RSCAT"
+FORMAT_VERSION = 2
+_PREAMBLE = struct.Struct("<5sHI")
+
+NO_STRING = 0xFFFFFFFF
+
+DEFAULT_CATALOG_PATH = os.environ.get(
+    "RENTSURE_CATALOG_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "catalog.bin"),
+)
+
+# (field, kind) in on-disk order. Numeric kinds ("int", "float", "bool") are
+# stored as float64 columns; "str" and "json" kinds as string pool indexes.
+NUMERIC_COLUMNS: Tuple[Tuple[str, str], ...] = (
+    ("rent", "int"),
+    ("distance_km", "float"),
+    ("safety_score", "int"),
+    ("trust_score", "int"),
+    ("campus_fit_score", "float"),
+    ("police_distance_km", "float"),
+    ("cctv_coverage", "int"),
+    ("street_lighting", "int"),
+    ("transit_access", "int"),
+    ("response_time_minutes", "int"),
+    ("complaints_count", "int"),
+    ("is_direct_owner", "bool"),
+    ("owner_average_rating", "float"),
+    ("owner_response_time_minutes", "int"),
+    ("owner_complaints_count", "int"),
+    ("agreement_completed", "bool"),
+    ("college_distance_km", "float"),
+    ("office_distance_km", "float"),
+    ("commute_minutes", "int"),
+    ("women_safety_index", "int"),
+    ("crime_index", "int"),
+    ("night_transit_score", "int"),
+    ("latitude", "float"),
+    ("longitude", "float"),
+)
+
+STRING_COLUMNS: Tuple[Tuple[str, str], ...] = (
+    ("property_id", "str"),
+    ("description", "str"),
+    ("price_fairness", "str"),
+    ("image_url", "str"),
+    ("availability_status", "str"),
+    ("payment_methods", "json"),
+    ("gender_preference", "str"),
+    ("reviews", "json"),
+    ("owner_id", "str"),
+    ("owner_name", "str"),
+    ("neighborhood", "str"),
+    ("city_zone", "str"),
+    ("nearby_college", "str"),
+    ("nearby_office_hub", "str"),
+    ("tiffin_options", "json"),
+)
+
+
+class CatalogFormatError(ValueError):
+    """Raised when a catalog file is missing, corrupt or of another format."""
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+def _column_bytes(values: array) -> bytes:
+    if sys.byteorder != "little":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _column_from_bytes(typecode: str, data: bytes) -> array:
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder != "little":
+        values.byteswap()
+    return values
+
+
+def _encode_city(rentals: Sequence[RentalProperty]) -> Tuple[bytes, int]:
+    """Pack one city's listings into a section. Returns (bytes, pool_size)."""
+    pool: List[bytes] = []
+    pool_index: Dict[str, int] = {}
+
+    def intern_string(value: Optional[str]) -> int:
+        if value is None:
+            return NO_STRING
+        if value not in pool_index:
+            pool_index[value] = len(pool)
+            pool.append(value.encode("utf-8"))
+        return pool_index[value]
+
+    parts: List[bytes] = []
+    for name, _kind in NUMERIC_COLUMNS:
+        column = array("d")
+        for rental in rentals:
+            value = getattr(rental, name)
+            column.append(math.nan if value is None else float(value))
+        parts.append(_column_bytes(column))
+
+    for name, kind in STRING_COLUMNS:
+        column = array("I")
+        for rental in rentals:
+            value = getattr(rental, name)
+            if kind == "json" and value is not None:
+                value = json.dumps(value, ensure_ascii=False)
+            column.append(intern_string(value))
+        parts.append(_column_bytes(column))
+
+    offsets = array("I", [0])
+    for item in pool:
+        offsets.append(offsets[-1] + len(item))
+    parts.append(_column_bytes(offsets))
+    parts.append(b"".join(pool))
+    return b"".join(parts), len(pool)
+
+
+def write_catalog(
+    path: str,
+    rentals_by_city: Mapping[str, Sequence[RentalProperty]],
+    city_meta: Mapping[str, Any],
+    catalog_version: str
+) -> None:
+    """Write an enriched catalog to path (via a temp file and atomic rename)."""
+    sections = {city: _encode_city(rentals) for city, rentals in rentals_by_city.items()}
+
+    def header_bytes(data_start: int) -> bytes:
+        index = {}
+        offset = data_start
+        for city, (section, pool_size) in sections.items():
+            index[city] = {
+                "offset": offset,
+                "length": len(section),
+                "count": len(rentals_by_city[city]),
+                "pool_size": pool_size,
+            }
+            offset = _align(offset + len(section))
+        header = {
+            "catalog_version": catalog_version,
+            "built_at": datetime.now(timezone.utc).isoformat(),
+            "city_meta": city_meta,
+            "cities": index,
+        }
+        return json.dumps(header, ensure_ascii=False).encode("utf-8")
+
+    # Section offsets depend on the header length, which depends on the
+    # offsets; iterate until the aligned data start is stable.
+    data_start = 0
+    while True:
+        header = header_bytes(data_start)
+        start = _align(_PREAMBLE.size + len(header))
+        if start == data_start:
+            break
+        data_start = start
+
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header)))
+        f.write(header)
+        for section, _pool_size in sections.values():
+            f.write(b"\0" * (_align(f.tell()) - f.tell()))
+            f.write(section)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _decode_value(kind: str, value: float) -> Any:
+    if value != value:  # NaN
+        return None
+    if kind == "int":
+        return int(value)
+    if kind == "bool":
+        return bool(value)
+    return value
+
+
+def _column_view(buffer: memoryview, typecode: str, start: int, count: int) -> Sequence:
+    """Zero-copy typed view of a column (copied only on big-endian hosts)."""
+    size = array(typecode).itemsize * count
+    view = buffer[start:start + size]
+    if sys.byteorder != "little":
+        return _column_from_bytes(typecode, view.tobytes())
+    return view.cast(typecode)
+
+
+# Per-city cap on materialized RentalProperty objects kept per worker. The
+# mapped columns are shared; only these decoded rows cost per-process RAM.
+ROW_CACHE_SIZE = int(os.environ.get("RENTSURE_CATALOG_ROW_CACHE", "4096"))
+
+
+class MappedRows(Sequence[RentalProperty]):
+    """One city's listings, decoded from the mapped section on access."""
+
+    def __init__(self, buffer: memoryview, entry: Dict[str, int], cache_size: int = ROW_CACHE_SIZE) -> None:
+        count = entry["count"]
+        pool_size = entry["pool_size"]
+        pos = entry["offset"]
+
+        self.numeric: Dict[str, Sequence[float]] = {}
+        for name, _kind in NUMERIC_COLUMNS:
+            self.numeric[name] = _column_view(buffer, "d", pos, count)
+            pos += 8 * count
+        self.strings: Dict[str, Sequence[int]] = {}
+        for name, _kind in STRING_COLUMNS:
+            self.strings[name] = _column_view(buffer, "I", pos, count)
+            pos += 4 * count
+        self._pool_offsets = _column_view(buffer, "I", pos, pool_size + 1)
+        pos += 4 * (pool_size + 1)
+        self._pool = buffer[pos:entry["offset"] + entry["length"]]
+        self._count = count
+
+        self._row = lru_cache(maxsize=cache_size)(self._decode_row)
+        self._json = lru_cache(maxsize=cache_size)(self._decode_json)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: int) -> RentalProperty:
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError(index)
+        return self._row(index)
+
+    def string(self, ref: int) -> Optional[str]:
+        """Decode one string pool entry."""
+        if ref == NO_STRING:
+            return None
+        return str(self._pool[self._pool_offsets[ref]:self._pool_offsets[ref + 1]], "utf-8")
+
+    def string_column(self, name: str) -> List[Optional[str]]:
+        """Decode a whole string column (e.g. ids for a lookup index)."""
+        return [self.string(ref) for ref in self.strings[name]]
+
+    def coded_column(self, name: str) -> Tuple[Sequence[Any], Any]:
+        """A column as (per-row codes, decode) without decoding every row.
+
+        String columns are coded by string pool index, so equal values share
+        a code; numeric columns by their stored float.
+        """
+        kind = dict(NUMERIC_COLUMNS + STRING_COLUMNS)[name]
+        if name in self.numeric:
+            return self.numeric[name], lambda code: _decode_value(kind, code)
+        if kind == "json":
+            return self.strings[name], lambda ref: None if ref == NO_STRING else self._json(ref)
+        return self.strings[name], self.string
+
+    def _decode_json(self, ref: int) -> Any:
+        # Cached, so identical values (e.g. a city's tiffin options) are
+        # shared between listings like they were in the source data
+        return json.loads(self.string(ref))
+
+    def _decode_row(self, index: int) -> RentalProperty:
+        values = {name: _decode_value(kind, self.numeric[name][index]) for name, kind in NUMERIC_COLUMNS}
+        for name, kind in STRING_COLUMNS:
+            ref = self.strings[name][index]
+            if kind == "json" and ref != NO_STRING:
+                values[name] = self._json(ref)
+            else:
+                values[name] = self.string(ref)
+        return RentalProperty(**values)
+
+
+class IndexedCatalog(RentalCatalog):
+    """A city's RentalCatalog plus its search indexes, each built on first use.
+
+    The catalog is immutable, so an index built once stays valid for the
+    lifetime of this catalog version.
+    """
+
+    __slots__ = ("_geo_index", "_cluster_grids", "_facet_index")
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._geo_index: Optional[GeoIndex] = None
+        self._cluster_grids: Dict[int, ClusterGrid] = {}
+        self._facet_index: Optional[FacetIndex] = None
+
+    def geo_index(self) -> GeoIndex:
+        """Spatial index over the latitude/longitude columns."""
+        if self._geo_index is None:
+            self._geo_index = GeoIndex(self.column("latitude"), self.column("longitude"))
+        return self._geo_index
+
+    def facet_index(self) -> FacetIndex:
+        """Facet bitmaps for filtering and counts."""
+        if self._facet_index is None:
+            self._facet_index = FacetIndex(self.rent, {field: self.coded_column(field) for field in FACET_FIELDS})
+        return self._facet_index
+
+    def indexes_built(self) -> bool:
+        """True once the geo and facet indexes exist."""
+        return self._geo_index is not None and self._facet_index is not None
+
+    def cluster_grid(self, zoom: int) -> ClusterGrid:
+        """Map cluster aggregates at a zoom level (one grid per zoom)."""
+        grid = self._cluster_grids.get(zoom)
+        if grid is None:
+            grid = ClusterGrid(
+                self.column("latitude"),
+                self.column("longitude"),
+                self.rent,
+                self.safety_score,
+                cluster_cell_degrees(zoom),
+            )
+            self._cluster_grids[zoom] = grid
+        return grid
+
+
+def file_signature(path: str) -> Optional[Tuple[int, int, int]]:
+    """(inode, device, mtime) of the file at path; changes when a new file is renamed onto it."""
+    try:
+        current = os.stat(path)
+    except OSError:
+        return None
+    return current.st_ino, current.st_dev, current.st_mtime_ns
+
+
+class CatalogStore(Mapping[str, IndexedCatalog]):
+    """
+    Read-only, lazily loaded mapping of city -> IndexedCatalog.
+
+    Only the header is parsed on construction. A city's section is wrapped the
+    first time it is accessed: its numeric columns become zero-copy views
+    into the mapped file and its rows are decoded on demand. The mapping
+    outlives the path, so renaming a new catalog over the file does not
+    affect this store (see is_stale()).
+    """
+
+    def __init__(self, path: str = DEFAULT_CATALOG_PATH, commute_path: str = DEFAULT_COMMUTE_PATH) -> None:
+        self.path = path
+        self.commute_path = commute_path
+        try:
+            with open(path, "rb") as f:
+                self._stat = os.fstat(f.fileno())
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as exc:
+            raise CatalogFormatError(
+                f"Catalog file not found at {path}; build it with `python catalog_build.py`"
+            ) from exc
+
+        self._buffer = memoryview(self._mmap)
+        if len(self._buffer) < _PREAMBLE.size:
+            raise CatalogFormatError(f"{path} is not a RentSure catalog")
+        magic, version, header_len = _PREAMBLE.unpack_from(self._buffer)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise CatalogFormatError(f"{path} is not a version {FORMAT_VERSION} RentSure catalog")
+        header_end = _PREAMBLE.size + header_len
+        header = json.loads(str(self._buffer[_PREAMBLE.size:header_end], "utf-8"))
+
+        self.catalog_version: str = header["catalog_version"]
+        self.built_at: str = header["built_at"]
+        self.city_meta: Dict[str, Any] = header["city_meta"]
+        self._index: Dict[str, Dict[str, int]] = header["cities"]
+        self._cities: Dict[str, IndexedCatalog] = {}
+        self._property_cities: Dict[str, Tuple[str, int]] = {}
+        self._owner_rows: Dict[str, Tuple[str, int]] = {}
+        self._commute: Optional[CommuteMatrix] = None
+        self._commute_loaded = False
+        self._lock = threading.Lock()
+
+    # ----- Mapping interface -------------------------------------------------
+
+    def __getitem__(self, city: str) -> IndexedCatalog:
+        catalog = self._cities.get(city)
+        if catalog is None:
+            if city not in self._index:
+                raise KeyError(city)
+            with self._lock:
+                catalog = self._cities.get(city)
+                if catalog is None:
+                    catalog = self._load_city(city)
+                    self._cities[city] = catalog
+        return catalog
+
+    def __contains__(self, city: object) -> bool:
+        # Answered from the header, without loading the city
+        return city in self._index
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    # ----- Versioning --------------------------------------------------------
+
+    def is_stale(self) -> bool:
+        """True if a different file has since been renamed onto self.path."""
+        current = file_signature(self.path)
+        return current is not None and current != (self._stat.st_ino, self._stat.st_dev, self._stat.st_mtime_ns)
+
+    def commute_matrix(self) -> Optional[CommuteMatrix]:
+        """The commute matrix built alongside this catalog version, if any.
+
+        A matrix built for a different catalog version is ignored, so a hot
+        reload never pairs listings with another build's grid.
+        """
+        if not self._commute_loaded:
+            with self._lock:
+                if not self._commute_loaded:
+                    try:
+                        matrix = CommuteMatrix(self.commute_path)
+                    except CommuteMatrixError as exc:
+                        print(f"⚠ {exc}")
+                        matrix = None
+                    if matrix is not None and matrix.catalog_version != self.catalog_version:
+                        print(f"⚠ Commute matrix {matrix.catalog_version} does not match catalog {self.catalog_version}; ignoring it")
+                        matrix = None
+                    self._commute = matrix
+                    self._commute_loaded = True
+        return self._commute
+
+    # ----- Lookups -----------------------------------------------------------
+
+    def loaded_cities(self) -> List[str]:
+        return list(self._cities)
+
+    def fully_loaded(self) -> bool:
+        """True once every city has been mapped."""
+        return len(self._cities) == len(self._index)
+
+    def load_all(self) -> None:
+        """Map every city and build its lookup indexes (e.g. before a swap)."""
+        for city in self._index:
+            self[city]
+
+    def _find_row(self, index: Dict[str, Tuple[str, int]], key: str) -> Optional[Tuple[str, int]]:
+        found = index.get(key)
+        if found is None:
+            for city in self._index:
+                if city in self._cities:
+                    continue
+                self[city]
+                found = index.get(key)
+                if found is not None:
+                    break
+        return found
+
+    def find_rental(self, property_id: str) -> Tuple[Optional[str], Optional[RentalProperty]]:
+        """Find a listing by id (case-insensitive), loading cities only until it is found."""
+        found = self._find_row(self._property_cities, property_id.upper().strip())
+        if found is None:
+            return None, None
+        city, row = found
+        return city, self[city][row]
+
+    def find_owner(self, owner_id: str) -> Optional[Dict[str, Any]]:
+        """Owner summary (as used for trust scoring), loading cities until found."""
+        found = self._find_row(self._owner_rows, owner_id)
+        if found is None:
+            return None
+        city, row = found
+        rental = self[city][row]
+        return {
+            "owner_id": owner_id,
+            "name": rental.owner_name,
+            "average_rating": rental.owner_average_rating,
+            "response_time_minutes": rental.owner_response_time_minutes,
+            "complaints_count": rental.owner_complaints_count,
+            "agreement_completed": rental.agreement_completed,
+        }
+
+    # ----- Loading -----------------------------------------------------------
+
+    def _load_city(self, city: str) -> IndexedCatalog:
+        rows = MappedRows(self._buffer, self._index[city])
+
+        # Only the id columns are decoded up front, for the lookup indexes
+        for row, property_id in enumerate(rows.string_column("property_id")):
+            self._property_cities[property_id] = (city, row)
+        for row, owner_id in enumerate(rows.string_column("owner_id")):
+            if owner_id:
+                self._owner_rows[owner_id] = (city, row)
+
+        return IndexedCatalog(
+            rows=rows,
+            rent=rows.numeric["rent"],
+            distance_km=rows.numeric["distance_km"],
+            safety_score=rows.numeric["safety_score"],
+            trust_score=rows.numeric["trust_score"],
+            columns=rows.numeric,
+        )
@@ -0,0 +1,235 @@
+"""
+Precomputed commute-time matrix for RentSure
+
+Commute minutes from every geocell of a city to each of its colleges and
+office hubs, built offline next to the catalog (see catalog_build.py) and
+memory-mapped at runtime. A lookup is a grid-cell calculation plus one array
+read, so ranking by "minutes to my office" costs the same as ranking by
+distance.
+
+File layout (integers little-endian, sections 8-byte aligned):
+
+    magic         5 bytes   b"RSCMT"
+    format        uint16    FORMAT_VERSION
+    header_len    uint32
+    header        JSON      catalog_version, cell_km, per-city grid + destinations
+    city sections, one per city:
+        minutes   uint16 x rows x cols x destinations (NO_ROUTE = unknown)
+"""
+import json
+import math
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from geo_index import KM_PER_DEGREE, haversine_km
+
+MAGIC = b"RSCMT"
+FORMAT_VERSION = 1
+_PREAMBLE = struct.Struct("<5sHI")
+
+NO_ROUTE = 0xFFFF
+
+DEFAULT_COMMUTE_PATH = os.environ.get(
+    "RENTSURE_COMMUTE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "commute.bin"),
+)
+COMMUTE_CELL_KM = float(os.environ.get("RENTSURE_COMMUTE_CELL_KM", "0.5"))
+
+# Travel model used until a routing-engine export is plugged in: road
+# distance is the straight line plus detours, at city traffic speed, plus a
+# fixed walk/wait overhead.
+ROAD_DETOUR_FACTOR = 1.35
+CITY_SPEED_KMH = 18.0
+FIXED_OVERHEAD_MINUTES = 8.0
+
+TravelTime = Callable[[float, float, float, float], float]
+
+
+class CommuteMatrixError(ValueError):
+    """Raised when a commute matrix file is missing, corrupt or of another format."""
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+def _minutes_view(buffer: memoryview, start: int, count: int) -> Sequence[int]:
+    """Zero-copy uint16 view (copied only on big-endian hosts)."""
+    view = buffer[start:start + 2 * count]
+    if sys.byteorder != "little":
+        values = array("H", view.tobytes())
+        values.byteswap()
+        return values
+    return view.cast("H")
+
+
+def estimate_commute_minutes(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Door-to-door commute estimate between two points."""
+    road_km = haversine_km(lat1, lon1, lat2, lon2) * ROAD_DETOUR_FACTOR
+    return FIXED_OVERHEAD_MINUTES + road_km / CITY_SPEED_KMH * 60
+
+
+def _city_grid(points: Sequence[Tuple[float, float]], cell_km: float) -> Dict[str, Any]:
+    """Grid geometry covering points with a one-cell margin."""
+    max_abs_lat = min(89.0, max(abs(lat) for lat, _lon in points))
+    lat_step = cell_km / KM_PER_DEGREE
+    lon_step = cell_km / (KM_PER_DEGREE * math.cos(math.radians(max_abs_lat)))
+    lat0 = min(lat for lat, _lon in points) - lat_step
+    lon0 = min(lon for _lat, lon in points) - lon_step
+    return {
+        "lat0": lat0,
+        "lon0": lon0,
+        "lat_step": lat_step,
+        "lon_step": lon_step,
+        "rows": math.floor((max(lat for lat, _lon in points) + lat_step - lat0) / lat_step) + 1,
+        "cols": math.floor((max(lon for _lat, lon in points) + lon_step - lon0) / lon_step) + 1,
+    }
+
+
+def _encode_city(grid: Mapping[str, Any], destinations: Sequence[Tuple[float, float]], travel_time: TravelTime) -> bytes:
+    minutes = array("H")
+    for row in range(grid["rows"]):
+        lat = grid["lat0"] + (row + 0.5) * grid["lat_step"]
+        for col in range(grid["cols"]):
+            lon = grid["lon0"] + (col + 0.5) * grid["lon_step"]
+            for dest_lat, dest_lon in destinations:
+                minutes.append(min(NO_ROUTE - 1, round(travel_time(lat, lon, dest_lat, dest_lon))))
+    if sys.byteorder != "little":
+        minutes.byteswap()
+    return minutes.tobytes()
+
+
+def write_commute_matrix(
+    path: str,
+    rentals_by_city: Mapping[str, Sequence[Any]],
+    city_meta: Mapping[str, Any],
+    catalog_version: str,
+    travel_time: TravelTime = estimate_commute_minutes,
+    cell_km: float = COMMUTE_CELL_KM
+) -> None:
+    """Build the matrix for every city with landmarks and write it to path.
+
+    Each city's grid covers its listings and its colleges/office hubs.
+    """
+    cities: Dict[str, Dict[str, Any]] = {}
+    sections: List[bytes] = []
+    for city, rentals in rentals_by_city.items():
+        landmarks = city_meta.get(city, {}).get("landmarks", {})
+        points = [(r.latitude, r.longitude) for r in rentals if r.latitude is not None and r.longitude is not None]
+        points += [tuple(point) for point in landmarks.values()]
+        if not landmarks or not points:
+            continue
+        grid = _city_grid(points, cell_km)
+        sections.append(_encode_city(grid, [tuple(point) for point in landmarks.values()], travel_time))
+        cities[city] = dict(grid, destinations=list(landmarks))
+
+    def header_bytes(data_start: int) -> bytes:
+        offset = data_start
+        for entry, section in zip(cities.values(), sections):
+            entry["offset"] = offset
+            offset = _align(offset + len(section))
+        header = {"catalog_version": catalog_version, "cell_km": cell_km, "cities": cities}
+        return json.dumps(header, ensure_ascii=False).encode("utf-8")
+
+    data_start = 0
+    while True:
+        header = header_bytes(data_start)
+        start = _align(_PREAMBLE.size + len(header))
+        if start == data_start:
+            break
+        data_start = start
+
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header)))
+        f.write(header)
+        for section in sections:
+            f.write(b"\0" * (_align(f.tell()) - f.tell()))
+            f.write(section)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class CityCommutes:
+    """One city's slice of the matrix."""
+
+    __slots__ = ("_minutes", "_lat0", "_lon0", "_lat_step", "_lon_step", "_rows", "_cols", "_dest_index", "destinations")
+
+    def __init__(self, minutes: Sequence[int], grid: Mapping[str, Any]) -> None:
+        self._minutes = minutes
+        self._lat0 = grid["lat0"]
+        self._lon0 = grid["lon0"]
+        self._lat_step = grid["lat_step"]
+        self._lon_step = grid["lon_step"]
+        self._rows = grid["rows"]
+        self._cols = grid["cols"]
+        self.destinations: List[str] = grid["destinations"]
+        self._dest_index = {name: i for i, name in enumerate(self.destinations)}
+
+    def cell(self, lat: Optional[float], lon: Optional[float]) -> Optional[int]:
+        """Geocell number of a point, or None if it is off the grid."""
+        if lat is None or lon is None or lat != lat or lon != lon:
+            return None
+        row = math.floor((lat - self._lat0) / self._lat_step)
+        col = math.floor((lon - self._lon0) / self._lon_step)
+        if not (0 <= row < self._rows and 0 <= col < self._cols):
+            return None
+        return row * self._cols + col
+
+    def destination(self, name: str) -> Optional[int]:
+        """Column number of a college or office hub."""
+        return self._dest_index.get(name)
+
+    def minutes_from_cell(self, cell: Optional[int], destination: int) -> Optional[int]:
+        """Commute minutes from a geocell (see cell()) to a destination."""
+        if cell is None:
+            return None
+        minutes = self._minutes[cell * len(self.destinations) + destination]
+        return None if minutes == NO_ROUTE else minutes
+
+    def minutes(self, lat: Optional[float], lon: Optional[float], destination: str) -> Optional[int]:
+        """Commute minutes from a point to a named college or office hub."""
+        index = self._dest_index.get(destination)
+        if index is None:
+            return None
+        return self.minutes_from_cell(self.cell(lat, lon), index)
+
+
+class CommuteMatrix:
+    """Memory-mapped commute matrix file (see module docstring)."""
+
+    def __init__(self, path: str = DEFAULT_COMMUTE_PATH) -> None:
+        self.path = path
+        try:
+            with open(path, "rb") as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as exc:
+            raise CommuteMatrixError(
+                f"Commute matrix not found at {path}; build it with `python catalog_build.py`"
+            ) from exc
+
+        buffer = memoryview(self._mmap)
+        if len(buffer) < _PREAMBLE.size:
+            raise CommuteMatrixError(f"{path} is not a RentSure commute matrix")
+        magic, version, header_len = _PREAMBLE.unpack_from(buffer)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise CommuteMatrixError(f"{path} is not a version {FORMAT_VERSION} RentSure commute matrix")
+        header = json.loads(str(buffer[_PREAMBLE.size:_PREAMBLE.size + header_len], "utf-8"))
+
+        self.catalog_version: str = header["catalog_version"]
+        self.cell_km: float = header["cell_km"]
+        self._cities: Dict[str, CityCommutes] = {}
+        for city, grid in header["cities"].items():
+            count = grid["rows"] * grid["cols"] * len(grid["destinations"])
+            self._cities[city] = CityCommutes(_minutes_view(buffer, grid["offset"], count), grid)
+
+    def __contains__(self, city: object) -> bool:
+        return city in self._cities
+
+    def city(self, city: str) -> Optional[CityCommutes]:
+        return self._cities.get(city)
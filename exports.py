@@ -0,0 +1,97 @@
+"""
+Streaming exports for RentSure
+
+Encodes row iterators as NDJSON or CSV in chunks so export endpoints can hand
+them straight to a StreamingResponse. Database exports read through a
+server-side cursor (yield_per), so memory stays flat however many rows the
+export covers.
+"""
+import csv
+import io
+import json
+import os
+from typing import Any, Dict, Iterable, Iterator, Optional, Sequence
+
+from sqlalchemy import select
+
+from models import Property, ReadSessionLocal
+
+EXPORT_FORMATS = ("ndjson", "csv")
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+# Rows fetched per cursor round-trip and encoded per response chunk
+EXPORT_CHUNK_ROWS = int(os.environ.get("RENTSURE_EXPORT_CHUNK_ROWS", "1000"))
+
+OWNER_EXPORT_COLUMNS = (
+    "id", "title", "description", "address", "city", "rent", "availability",
+    "safety_score", "trust_score", "nearby_college", "college_distance_km",
+    "nearby_office_hub", "office_distance_km", "women_safety_index", "created_at",
+)
+
+
+def _csv_cell(value: Any) -> Any:
+    if isinstance(value, (list, dict)):
+        return json.dumps(value)
+    return value
+
+
+def encode_rows(rows: Iterable[Dict[str, Any]], fmt: str, fieldnames: Optional[Sequence[str]] = None) -> Iterator[str]:
+    """Encode dict rows as NDJSON or CSV, yielding one string per chunk.
+
+    CSV columns default to the keys of the first row.
+    """
+    buffer = io.StringIO()
+    writer = None
+    pending = 0
+    for row in rows:
+        if fmt == "csv":
+            if writer is None:
+                writer = csv.writer(buffer)
+                fieldnames = list(fieldnames or row.keys())
+                writer.writerow(fieldnames)
+            writer.writerow([_csv_cell(row.get(name)) for name in fieldnames])
+        else:
+            buffer.write(json.dumps(row, default=str))
+            buffer.write("\n")
+        pending += 1
+        if pending >= EXPORT_CHUNK_ROWS:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+
+    if fmt == "csv" and writer is None and fieldnames:
+        # Empty export still gets its header row
+        csv.writer(buffer).writerow(fieldnames)
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def iter_owner_properties(owner_id: int) -> Iterator[Dict[str, Any]]:
+    """Yield one owner's properties straight off a server-side cursor.
+
+    Opens its own session: the response body is streamed after the request
+    handler (and its dependency-managed session) has returned.
+    """
+    columns = [getattr(Property, name) for name in OWNER_EXPORT_COLUMNS]
+    db = ReadSessionLocal()
+    try:
+        result = db.execute(
+            select(*columns)
+            .where(Property.owner_id == owner_id)
+            .order_by(Property.id)
+            .execution_options(yield_per=EXPORT_CHUNK_ROWS)
+        )
+        for row in result:
+            record = dict(zip(OWNER_EXPORT_COLUMNS, row))
+            record["created_at"] = record["created_at"].isoformat() if record["created_at"] else None
+            yield record
+    finally:
+        db.close()
+
+
+def export_filename(stem: str, fmt: str) -> Dict[str, str]:
+    """Content-Disposition header for an export download."""
+    return {"Content-Disposition": f'attachment; filename="{stem}.{fmt}"'}
@@ -0,0 +1,168 @@
+"""
+Faceted filtering for RentSure search
+
+Each facet value of a city (a gender preference, a payment method, a rent
+bucket, ...) gets a bitmap over the city's rows, held as a Python int with bit
+i set for row i. Filtering is a bitwise OR within a facet and AND across
+facets, and facet counts are popcounts, so neither touches listing objects.
+"""
+import bisect
+import os
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+# Multi-valued or categorical listing fields exposed as facets
+FACET_FIELDS = ("gender_preference", "availability_status", "is_direct_owner", "payment_methods", "city_zone")
+# Upper edges of the rent buckets; the last bucket is open-ended
+RENT_BUCKET_EDGES = tuple(
+    int(edge) for edge in os.environ.get("RENTSURE_RENT_BUCKETS", "8000,12000,16000,20000,25000").split(",")
+)
+
+Filters = Tuple[Tuple[str, Tuple[str, ...]], ...]
+
+
+def normalize_filters(selections: Mapping[str, Optional[Iterable[Any]]]) -> Filters:
+    """Hashable, order-independent form of the selected facet values."""
+    normalized = []
+    for field in FACET_FIELDS:
+        values = selections.get(field)
+        if values:
+            normalized.append((field, tuple(sorted({facet_key(value).lower() for value in values}))))
+    return tuple(normalized)
+
+
+def facet_key(value: Any) -> str:
+    """Facet value as reported in counts (booleans become "true"/"false")."""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+def rent_bucket_labels() -> List[str]:
+    edges = (0,) + RENT_BUCKET_EDGES
+    labels = [f"{low}-{high}" for low, high in zip(edges, edges[1:])]
+    return labels + [f"{edges[-1]}+"]
+
+
+def _bitmap(rows: Iterable[int], size: int) -> int:
+    bits = bytearray((size + 7) // 8)
+    for i in rows:
+        bits[i >> 3] |= 1 << (i & 7)
+    return int.from_bytes(bits, "little")
+
+
+def iter_rows(mask: int) -> Iterator[int]:
+    """Row indexes of the set bits, ascending."""
+    data = mask.to_bytes((mask.bit_length() + 7) // 8, "little")
+    for position, byte in enumerate(data):
+        while byte:
+            low = byte & -byte
+            yield position * 8 + low.bit_length() - 1
+            byte ^= low
+
+
+def row_test(mask: int) -> Callable[[int], bool]:
+    """O(1) membership test for one row against a mask."""
+    data = mask.to_bytes((mask.bit_length() + 7) // 8, "little")
+    size = len(data)
+    return lambda i: (i >> 3) < size and bool(data[i >> 3] >> (i & 7) & 1)
+
+
+class FacetIndex:
+    """
+    Per-value bitmaps over one city's rows.
+
+    Built from coded columns (see RentalCatalog.coded_column): rows are
+    grouped by code and each distinct code is decoded once, so building the
+    index never materializes a listing.
+    """
+
+    __slots__ = ("size", "all_rows", "_bitmaps", "_lookup", "_rent", "_rent_buckets")
+
+    def __init__(self, rent: Sequence[float], coded_columns: Mapping[str, Tuple[Sequence[Hashable], Callable[[Hashable], Any]]]) -> None:
+        self.size = len(rent)
+        self.all_rows = (1 << self.size) - 1
+        self._rent = rent
+
+        self._bitmaps: Dict[str, Dict[str, int]] = {}
+        for field, (codes, decode) in coded_columns.items():
+            groups: Dict[Hashable, List[int]] = {}
+            for i, code in enumerate(codes):
+                groups.setdefault(code, []).append(i)
+            bitmaps: Dict[str, int] = {}
+            for code, rows in groups.items():
+                value = decode(code)
+                if value is None:
+                    continue
+                bits = _bitmap(rows, self.size)
+                for item in (value if isinstance(value, (list, tuple)) else (value,)):
+                    key = facet_key(item)
+                    bitmaps[key] = bitmaps.get(key, 0) | bits
+            self._bitmaps[field] = dict(sorted(bitmaps.items()))
+        # Filters match facet values case-insensitively
+        self._lookup = {
+            field: {key.lower(): key for key in bitmaps} for field, bitmaps in self._bitmaps.items()
+        }
+
+        buckets: List[List[int]] = [[] for _ in range(len(RENT_BUCKET_EDGES) + 1)]
+        for i, value in enumerate(rent):
+            if value == value:
+                buckets[bisect.bisect_right(RENT_BUCKET_EDGES, value)].append(i)
+        self._rent_buckets = [_bitmap(rows, self.size) for rows in buckets]
+
+    def _field_mask(self, field: str, values: Tuple[str, ...]) -> int:
+        bitmaps = self._bitmaps.get(field, {})
+        lookup = self._lookup.get(field, {})
+        mask = 0
+        for value in values:
+            key = lookup.get(value)
+            if key is not None:
+                mask |= bitmaps[key]
+        return mask
+
+    def rent_mask(self, min_rent: Optional[float], max_rent: Optional[float]) -> int:
+        """Rows with min_rent <= rent <= max_rent.
+
+        Buckets wholly inside the range are ORed in; only rows in buckets the
+        range cuts through are checked one by one.
+        """
+        if min_rent is None and max_rent is None:
+            return self.all_rows
+        low = float("-inf") if min_rent is None else min_rent
+        high = float("inf") if max_rent is None else max_rent
+        edges = (float("-inf"),) + RENT_BUCKET_EDGES + (float("inf"),)
+        mask = 0
+        for bucket, bits in enumerate(self._rent_buckets):
+            bucket_low, bucket_high = edges[bucket], edges[bucket + 1]
+            if bucket_high <= low or bucket_low > high:
+                continue
+            if low <= bucket_low and bucket_high <= high:
+                mask |= bits
+            else:
+                rent = self._rent
+                mask |= _bitmap((i for i in iter_rows(bits) if low <= rent[i] <= high), self.size)
+        return mask
+
+    def mask(self, filters: Filters, rent_mask: Optional[int] = None, skip: Optional[str] = None) -> int:
+        """Rows matching every facet filter (values within a facet are ORed)."""
+        mask = self.all_rows if rent_mask is None else rent_mask
+        for field, values in filters:
+            if field != skip:
+                mask &= self._field_mask(field, values)
+        return mask
+
+    def counts(self, filters: Filters, rent_mask: int) -> Dict[str, Dict[str, int]]:
+        """Count per facet value under the other facets' filters.
+
+        Each facet ignores its own selection, so a client can show how many
+        listings every alternative value would give.
+        """
+        selected = {field for field, _values in filters}
+        result: Dict[str, Dict[str, int]] = {}
+        for field, bitmaps in self._bitmaps.items():
+            base = self.mask(filters, rent_mask, skip=field) if field in selected else self.mask(filters, rent_mask)
+            result[field] = {key: (base & bits).bit_count() for key, bits in bitmaps.items()}
+        base = self.mask(filters)
+        result["rent"] = {
+            label: (base & bits).bit_count() for label, bits in zip(rent_bucket_labels(), self._rent_buckets)
+        }
+        return result
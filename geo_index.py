@@ -0,0 +1,253 @@
+"""
+Geospatial index for RentSure listings
+
+A uniform latitude/longitude grid (a geohash-style bucketing) over one city's
+listings. Radius, bounding-box and k-nearest queries only visit the grid cells
+that can contain an answer instead of measuring every listing. ClusterGrid
+keeps per-cell aggregates on the same kind of grid for map clustering.
+"""
+import heapq
+import math
+import os
+import statistics
+from typing import Any, Dict, List, Sequence, Tuple
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = EARTH_RADIUS_KM * math.pi / 180
+# Grid cell edge; roughly one neighborhood
+GEO_CELL_KM = float(os.environ.get("RENTSURE_GEO_CELL_KM", "1.0"))
+# Map clusters per 256px Web Mercator tile width (4 => ~64px clusters)
+CLUSTER_CELLS_PER_TILE = int(os.environ.get("RENTSURE_MAP_CLUSTERS_PER_TILE", "4"))
+
+
+def _overlapping_cells(
+    cells: Dict[Tuple[int, int], Any],
+    bounds: Tuple[int, int, int, int],
+    row0: int,
+    col0: int,
+    row1: int,
+    col1: int
+) -> List[Tuple[Tuple[int, int], Any]]:
+    """(cell, value) for every occupied cell in a row/col range."""
+    min_row, min_col, max_row, max_col = bounds
+    row0, col0 = max(row0, min_row), max(col0, min_col)
+    row1, col1 = min(row1, max_row), min(col1, max_col)
+    if row0 > row1 or col0 > col1:
+        return []
+    if (row1 - row0 + 1) * (col1 - col0 + 1) > len(cells):
+        # Range is larger than the occupied grid; filter occupied cells instead
+        return [
+            (cell, value) for cell, value in cells.items()
+            if row0 <= cell[0] <= row1 and col0 <= cell[1] <= col1
+        ]
+    return [
+        ((row, col), cells[(row, col)])
+        for row in range(row0, row1 + 1)
+        for col in range(col0, col1 + 1)
+        if (row, col) in cells
+    ]
+
+
+def _grid_bounds(cells: Dict[Tuple[int, int], Any]) -> Tuple[int, int, int, int]:
+    if not cells:
+        return 0, 0, -1, -1
+    rows = [cell[0] for cell in cells]
+    cols = [cell[1] for cell in cells]
+    return min(rows), min(cols), max(rows), max(cols)
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two points in km."""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    a = (
+        math.sin((phi2 - phi1) / 2) ** 2
+        + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class GeoIndex:
+    """
+    Grid index over listing coordinates, addressed by catalog row index.
+
+    Rows without coordinates (NaN) are left out of the index. Query results
+    are (row index, distance_km) pairs ordered by distance, then row index.
+    """
+
+    __slots__ = ("_lat", "_lon", "_cells", "_lat_step", "_lon_step", "_min_cell_km", "_bounds", "_size")
+
+    def __init__(self, latitudes: Sequence[float], longitudes: Sequence[float], cell_km: float = GEO_CELL_KM) -> None:
+        self._lat = latitudes
+        self._lon = longitudes
+        located = [i for i in range(len(latitudes)) if latitudes[i] == latitudes[i] and longitudes[i] == longitudes[i]]
+        self._size = len(located)
+
+        # Longitude degrees shrink with latitude; size cells for the widest
+        # latitude present so no cell is narrower than cell_km.
+        max_abs_lat = min(89.0, max((abs(latitudes[i]) for i in located), default=0.0))
+        self._lat_step = cell_km / KM_PER_DEGREE
+        self._lon_step = cell_km / (KM_PER_DEGREE * math.cos(math.radians(max_abs_lat)))
+        self._min_cell_km = cell_km
+
+        self._cells: Dict[Tuple[int, int], List[int]] = {}
+        for i in located:
+            self._cells.setdefault(self._cell(latitudes[i], longitudes[i]), []).append(i)
+        self._bounds = _grid_bounds(self._cells)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return math.floor(lat / self._lat_step), math.floor(lon / self._lon_step)
+
+    def _cells_in(self, south: float, west: float, north: float, east: float) -> List[List[int]]:
+        """Buckets of every occupied cell overlapping a lat/lon box."""
+        row0, col0 = self._cell(south, west)
+        row1, col1 = self._cell(north, east)
+        return [bucket for _cell, bucket in _overlapping_cells(self._cells, self._bounds, row0, col0, row1, col1)]
+
+    def in_bbox(self, south: float, west: float, north: float, east: float) -> List[int]:
+        """Row indexes of listings inside a lat/lon bounding box."""
+        lat, lon = self._lat, self._lon
+        return sorted(
+            i
+            for bucket in self._cells_in(south, west, north, east)
+            for i in bucket
+            if south <= lat[i] <= north and west <= lon[i] <= east
+        )
+
+    def within(self, lat: float, lon: float, radius_km: float) -> List[Tuple[int, float]]:
+        """Listings within radius_km of a point."""
+        if math.isinf(radius_km):
+            candidates = [i for bucket in self._cells.values() for i in bucket]
+        else:
+            dlat = radius_km / KM_PER_DEGREE
+            edge_lat = min(89.0, max(abs(lat - dlat), abs(lat + dlat)))
+            dlon = radius_km / (KM_PER_DEGREE * math.cos(math.radians(edge_lat)))
+            candidates = [
+                i for bucket in self._cells_in(lat - dlat, lon - dlon, lat + dlat, lon + dlon) for i in bucket
+            ]
+        hits = []
+        for i in candidates:
+            distance = haversine_km(lat, lon, self._lat[i], self._lon[i])
+            if distance <= radius_km:
+                hits.append((i, distance))
+        hits.sort(key=lambda hit: (hit[1], hit[0]))
+        return hits
+
+    def nearest(self, lat: float, lon: float, k: int) -> List[Tuple[int, float]]:
+        """The k listings closest to a point.
+
+        Searches outward ring by ring from the point's cell and stops once no
+        unvisited cell can hold anything closer than the current k-th hit.
+        Rings are clipped to the occupied grid and start at the first ring
+        that reaches it. A point further from the grid than the grid is wide
+        is answered by a linear scan instead: there the rings would mostly be
+        empty, and the ring-distance bound no longer holds (cells shrink away
+        from the city's latitude, longitudes wrap).
+        """
+        if k <= 0 or not self._cells:
+            return []
+        center_row, center_col = self._cell(lat, lon)
+        min_row, min_col, max_row, max_col = self._bounds
+        first_ring = max(0, min_row - center_row, center_row - max_row, min_col - center_col, center_col - max_col)
+        if first_ring > max(max_row - min_row, max_col - min_col) + 1:
+            hits = heapq.nsmallest(k, (
+                (haversine_km(lat, lon, self._lat[i], self._lon[i]), i)
+                for bucket in self._cells.values() for i in bucket
+            ))
+            return [(i, distance) for distance, i in hits]
+        max_ring = max(
+            abs(center_row - min_row), abs(center_row - max_row),
+            abs(center_col - min_col), abs(center_col - max_col),
+        )
+        best: List[Tuple[float, int]] = []  # max-heap of (-distance, -index)
+
+        def visit(row: int, col: int) -> None:
+            for i in self._cells.get((row, col), ()):
+                entry = (-haversine_km(lat, lon, self._lat[i], self._lon[i]), -i)
+                if len(best) < k:
+                    heapq.heappush(best, entry)
+                elif entry > best[0]:
+                    heapq.heapreplace(best, entry)
+
+        for ring in range(first_ring, max_ring + 1):
+            top, bottom = center_row - ring, center_row + ring
+            left, right = center_col - ring, center_col + ring
+            cols = range(max(left, min_col), min(right, max_col) + 1)
+            for row in (top, bottom) if ring else (top,):
+                if min_row <= row <= max_row:
+                    for col in cols:
+                        visit(row, col)
+            for row in range(max(top + 1, min_row), min(bottom - 1, max_row) + 1):
+                for col in (left, right):
+                    if min_col <= col <= max_col:
+                        visit(row, col)
+            # Anything outside this ring is at least ring cells away
+            if len(best) == k and -best[0][0] < ring * self._min_cell_km * 0.99:
+                break
+        return sorted(((-neg_i, -neg_d) for neg_d, neg_i in best), key=lambda hit: (hit[1], hit[0]))
+
+
+def cluster_cell_degrees(zoom: int) -> float:
+    """Cluster cell width in degrees of longitude at a map zoom level."""
+    return 360.0 / (2 ** zoom) / CLUSTER_CELLS_PER_TILE
+
+
+class ClusterGrid:
+    """
+    Per-cell aggregates of one city's listings for map clustering.
+
+    Cells are fixed to the grid rather than to the viewport, so clusters stay
+    put while the map pans and one grid serves every viewport at its zoom.
+    Each cluster reports count, centroid, median rent and average safety.
+    """
+
+    __slots__ = ("_lat_step", "_lon_step", "_clusters", "_bounds")
+
+    def __init__(
+        self,
+        latitudes: Sequence[float],
+        longitudes: Sequence[float],
+        rents: Sequence[float],
+        safety_scores: Sequence[float],
+        lon_step: float
+    ) -> None:
+        located = [i for i in range(len(latitudes)) if latitudes[i] == latitudes[i] and longitudes[i] == longitudes[i]]
+        # Square cells on a Web Mercator map: latitude span shrinks by cos(lat)
+        ref_lat = statistics.fmean(latitudes[i] for i in located) if located else 0.0
+        self._lon_step = lon_step
+        self._lat_step = lon_step * math.cos(math.radians(ref_lat))
+
+        members: Dict[Tuple[int, int], List[int]] = {}
+        for i in located:
+            members.setdefault(self._cell(latitudes[i], longitudes[i]), []).append(i)
+        self._clusters: Dict[Tuple[int, int], Dict[str, Any]] = {
+            cell: {
+                "lat": round(statistics.fmean(latitudes[i] for i in rows), 5),
+                "lon": round(statistics.fmean(longitudes[i] for i in rows), 5),
+                "count": len(rows),
+                "median_rent": round(statistics.median(rents[i] for i in rows)),
+                "avg_safety_score": round(statistics.fmean(safety_scores[i] for i in rows), 1),
+            }
+            for cell, rows in members.items()
+        }
+        self._bounds = _grid_bounds(self._clusters)
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return math.floor(lat / self._lat_step), math.floor(lon / self._lon_step)
+
+    def in_bbox(self, south: float, west: float, north: float, east: float) -> List[Dict[str, Any]]:
+        """Clusters whose cell overlaps a lat/lon bounding box."""
+        row0, col0 = self._cell(south, west)
+        row1, col1 = self._cell(north, east)
+        clusters = []
+        for (row, col), cluster in sorted(_overlapping_cells(self._clusters, self._bounds, row0, col0, row1, col1)):
+            clusters.append(dict(cluster, bounds={
+                "south": round(row * self._lat_step, 5),
+                "west": round(col * self._lon_step, 5),
+                "north": round((row + 1) * self._lat_step, 5),
+                "east": round((col + 1) * self._lon_step, 5),
+            }))
+        return clusters
@@ -0,0 +1,425 @@
+"""
+RentSure HTTP load test
+
+Replays a weighted mix of browse, search, detail, login and owner-write
+traffic against the real API routes from concurrent keep-alive clients,
+then reports throughput and p50/p95/p99 latency per scenario.
+
+The server under test is either:
+  - spawned on localhost with uvicorn (default; --workers N sets the worker
+    count, so runs can be repeated to size workers),
+  - started in this process (--in-process; quick, but shares the GIL with the
+    clients, so only compare in-process runs with each other), or
+  - an existing deployment (--url http://host:port).
+
+Spawned and in-process servers use a throwaway SQLite database (override
+with --database-url), so owner writes never touch rentsure.db. They also
+run with rate limiting off, since every simulated user shares one IP; start a
+--url deployment with RENTSURE_RATE_LIMIT_ENABLED=0 (or raised budgets).
+
+Usage:
+    python loadtest.py [--workers 2] [--concurrency 16] [--duration 30]
+                       [--mix browse=35,search=30,detail=20,login=10,owner_write=5]
+                       [--json loadtest.json]
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlencode, urlsplit
+
+DEFAULT_MIX = "browse=35,search=30,detail=20,login=10,owner_write=5"
+TENANT_LOGIN = {"email": "tenant@rentsure.demo", "password": "Tenant@123"}
+OWNER_LOGIN = {"email": "owner@rentsure.demo", "password": "Owner@123"}
+SEARCH_QUERIES = ["", "2bhk", "pg", "safe room near college", "flat metro", "girls hostel"]
+SEARCH_RANKS = ["match", "safety", "college", "office"]
+STARTUP_TIMEOUT_SECONDS = 60
+
+Request = Tuple[str, str, Optional[Dict[str, Any]], Dict[str, str]]
+
+
+# ============================================================================
+# Workload
+# ============================================================================
+
+class Workload:
+    """Builds requests for each scenario from ids discovered at setup."""
+
+    def __init__(self, cities: List[str], property_ids: List[str], owner_token: str, owner_property_id: int) -> None:
+        self.cities = cities
+        self.property_ids = property_ids
+        self.owner_headers = {"Authorization": f"Bearer {owner_token}"}
+        self.owner_property_id = owner_property_id
+
+    def browse(self, rng: random.Random) -> Request:
+        path = rng.choice([
+            "/",
+            "/cities",
+            f"/recommendations?city={rng.choice(self.cities)}&top_n={rng.randint(3, 10)}",
+            f"/recommendations?city={rng.choice(self.cities)}",
+        ])
+        return "GET", path, None, {}
+
+    def search(self, rng: random.Random) -> Request:
+        params: Dict[str, Any] = {
+            "city": rng.choice(self.cities),
+            "query": rng.choice(SEARCH_QUERIES),
+            "rank_by": rng.choice(SEARCH_RANKS),
+            "top_n": rng.randint(5, 10),
+        }
+        if rng.random() < 0.3:
+            params["max_rent"] = rng.choice([10000, 15000, 20000])
+        if rng.random() < 0.2:
+            params["gender_preference"] = rng.choice(["female", "male", "any"])
+        return "GET", "/search?" + urlencode(params), None, {}
+
+    def detail(self, rng: random.Random) -> Request:
+        property_id = rng.choice(self.property_ids)
+        path = rng.choice(["/rental/{}", "/rental/{}", "/proximity/{}", "/neighborhood/{}"]).format(property_id)
+        return "GET", path, None, {}
+
+    def login(self, rng: random.Random) -> Request:
+        return "POST", "/auth/login", TENANT_LOGIN, {}
+
+    def owner_write(self, rng: random.Random) -> Request:
+        if rng.random() < 0.5:
+            availability = "true" if rng.random() < 0.5 else "false"
+            path = f"/owner/properties/{self.owner_property_id}/availability?availability={availability}"
+            return "PATCH", path, None, self.owner_headers
+        body = {"updates": [{"id": self.owner_property_id, "rent": rng.randrange(8000, 20001, 500)}]}
+        return "PATCH", "/owner/properties", body, self.owner_headers
+
+
+SCENARIOS = ("browse", "search", "detail", "login", "owner_write")
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise ValueError(f"Unknown scenario {name!r}; choose from {', '.join(SCENARIOS)}")
+        weights[name] = float(weight or 1)
+    if not any(weights.values()):
+        raise ValueError("Workload mix has no weight")
+    return weights
+
+
+# ============================================================================
+# HTTP client
+# ============================================================================
+
+class Client:
+    """One keep-alive connection; reconnects after errors."""
+
+    def __init__(self, base_url: str, timeout: float = 30.0) -> None:
+        parts = urlsplit(base_url)
+        self._connection_class = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+        self._netloc = parts.netloc
+        self._prefix = parts.path.rstrip("/")
+        self._timeout = timeout
+        self._conn: Optional[http.client.HTTPConnection] = None
+
+    def request(self, method: str, path: str, body: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, str]] = None) -> Tuple[int, bytes]:
+        if self._conn is None:
+            self._conn = self._connection_class(self._netloc, timeout=self._timeout)
+        headers = dict(headers or {})
+        payload = None
+        if body is not None:
+            payload = json.dumps(body).encode("utf-8")
+            headers["Content-Type"] = "application/json"
+        try:
+            self._conn.request(method, self._prefix + path, body=payload, headers=headers)
+            response = self._conn.getresponse()
+            return response.status, response.read()
+        except (OSError, http.client.HTTPException):
+            self.close()
+            raise
+
+    def request_json(self, method: str, path: str, body: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, str]] = None) -> Any:
+        status, data = self.request(method, path, body, headers)
+        if status >= 400:
+            raise RuntimeError(f"{method} {path} returned {status}: {data[:200]!r}")
+        return json.loads(data)
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+def prepare_workload(base_url: str) -> Workload:
+    """Discover cities and listing ids, and give the demo owner a property to edit."""
+    client = Client(base_url)
+    try:
+        cities = [city["id"] for city in client.request_json("GET", "/cities")["cities"]]
+        property_ids = []
+        for city in cities:
+            status, data = client.request("GET", f"/search/export?city={city}&format=ndjson")
+            if status >= 400:
+                raise RuntimeError(f"GET /search/export returned {status}: {data[:200]!r}")
+            property_ids += [json.loads(line)["property_id"] for line in data.splitlines() if line.strip()]
+        owner_token = client.request_json("POST", "/auth/login", OWNER_LOGIN)["access_token"]
+        created = client.request_json("POST", "/owner/properties", {
+            "title": "Load test flat",
+            "description": "Created by loadtest.py",
+            "city": cities[0].title(),
+            "rent": 12000,
+        }, {"Authorization": f"Bearer {owner_token}"})
+    finally:
+        client.close()
+    return Workload(cities, property_ids, owner_token, created["id"])
+
+
+# ============================================================================
+# Servers under test
+# ============================================================================
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_until_up(base_url: str, is_alive: Callable[[], bool]) -> None:
+    deadline = time.monotonic() + STARTUP_TIMEOUT_SECONDS
+    client = Client(base_url, timeout=2)
+    try:
+        while time.monotonic() < deadline:
+            if not is_alive():
+                raise RuntimeError("Server exited during startup")
+            try:
+                # /ready answers 503 until the worker's warmup has finished
+                if client.request("GET", "/ready")[0] == 200:
+                    return
+            except (OSError, http.client.HTTPException):
+                pass
+            time.sleep(0.2)
+        raise RuntimeError(f"Server did not report ready within {STARTUP_TIMEOUT_SECONDS}s")
+    finally:
+        client.close()
+
+
+def _migrate(env: Dict[str, str]) -> None:
+    """Bring the server's database schema up to date, as a deploy's release phase does."""
+    subprocess.run(
+        [sys.executable, "migrations.py", "upgrade"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=dict(os.environ, **env),
+        check=True,
+        stdout=subprocess.DEVNULL,
+    )
+
+
+class SpawnedServer:
+    """`uvicorn app:app --workers N` on a free localhost port."""
+
+    def __init__(self, workers: int, env: Dict[str, str]) -> None:
+        _migrate(env)
+        self.port = _free_port()
+        self.base_url = f"http://127.0.0.1:{self.port}"
+        self._process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app:app", "--host", "127.0.0.1", "--port", str(self.port),
+             "--workers", str(workers), "--no-access-log", "--log-level", "warning"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            env=dict(os.environ, **env),
+        )
+        try:
+            _wait_until_up(self.base_url, lambda: self._process.poll() is None)
+        except Exception:
+            self.stop()
+            raise
+
+    def stop(self) -> None:
+        if self._process.poll() is None:
+            self._process.terminate()
+            try:
+                self._process.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                self._process.kill()
+
+
+class InProcessServer:
+    """The app served by uvicorn on a background thread of this process."""
+
+    def __init__(self, env: Dict[str, str]) -> None:
+        _migrate(env)
+        # Configuration is read at import time, so set it before importing
+        os.environ.update(env)
+        import uvicorn
+        from app import app
+
+        port = _free_port()
+        self.base_url = f"http://127.0.0.1:{port}"
+        config = uvicorn.Config(app, host="127.0.0.1", port=port, access_log=False, log_level="warning")
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+        self._thread.start()
+        _wait_until_up(self.base_url, self._thread.is_alive)
+
+    def stop(self) -> None:
+        self._server.should_exit = True
+        self._thread.join(timeout=15)
+
+
+# ============================================================================
+# Load generation & reporting
+# ============================================================================
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, min(len(sorted_values), round(fraction * len(sorted_values) + 0.5)))
+    return sorted_values[rank - 1]
+
+
+def run_load(
+    base_url: str,
+    workload: Workload,
+    mix: Dict[str, float],
+    concurrency: int,
+    duration: float,
+    warmup: float,
+    seed: int
+) -> Dict[str, Any]:
+    """Closed-loop load: each worker sends its next request as soon as the last returns."""
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    latencies: Dict[str, List[float]] = {name: [] for name in names}
+    errors: Dict[str, int] = {name: 0 for name in names}
+    statuses: Dict[str, Dict[int, int]] = {name: {} for name in names}
+    lock = threading.Lock()
+    started = time.perf_counter()
+    measure_from = started + warmup
+    stop_at = measure_from + duration
+
+    def worker(worker_id: int) -> None:
+        rng = random.Random(seed + worker_id)
+        client = Client(base_url)
+        try:
+            while True:
+                now = time.perf_counter()
+                if now >= stop_at:
+                    return
+                scenario = rng.choices(names, weights)[0]
+                method, path, body, headers = getattr(workload, scenario)(rng)
+                begin = time.perf_counter()
+                try:
+                    status, _data = client.request(method, path, body, headers)
+                except (OSError, http.client.HTTPException):
+                    status = 0
+                elapsed = time.perf_counter() - begin
+                if begin < measure_from:
+                    continue
+                with lock:
+                    latencies[scenario].append(elapsed)
+                    statuses[scenario][status] = statuses[scenario].get(status, 0) + 1
+                    if status == 0 or status >= 500:
+                        errors[scenario] += 1
+        finally:
+            client.close()
+
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    measured = max(time.perf_counter(), stop_at) - measure_from
+
+    def summary(values: List[float], error_count: int) -> Dict[str, Any]:
+        values = sorted(values)
+        return {
+            "requests": len(values),
+            "errors": error_count,
+            "throughput_rps": round(len(values) / measured, 2),
+            "p50_ms": round(percentile(values, 0.50) * 1000, 2),
+            "p95_ms": round(percentile(values, 0.95) * 1000, 2),
+            "p99_ms": round(percentile(values, 0.99) * 1000, 2),
+            "max_ms": round((values[-1] if values else 0.0) * 1000, 2),
+        }
+
+    scenarios = {name: dict(summary(latencies[name], errors[name]), statuses=statuses[name]) for name in names}
+    overall = summary([v for values in latencies.values() for v in values], sum(errors.values()))
+    return {"duration_seconds": round(measured, 2), "concurrency": concurrency, "overall": overall, "scenarios": scenarios}
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    print(f"\n{'scenario':<12} {'requests':>9} {'errors':>7} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    rows = list(report["scenarios"].items()) + [("overall", report["overall"])]
+    for name, stats in rows:
+        print(
+            f"{name:<12} {stats['requests']:>9} {stats['errors']:>7} {stats['throughput_rps']:>9.1f} "
+            f"{stats['p50_ms']:>9.2f} {stats['p95_ms']:>9.2f} {stats['p99_ms']:>9.2f} {stats['max_ms']:>9.2f}"
+        )
+    for name, stats in report["scenarios"].items():
+        unexpected = {status: count for status, count in stats["statuses"].items() if status >= 400 or status == 0}
+        if unexpected:
+            print(f"⚠ {name}: non-2xx responses {unexpected}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load-test the RentSure API with a realistic traffic mix")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--url", help="test an already running server instead of starting one")
+    target.add_argument("--in-process", action="store_true", help="serve the app from a thread of this process")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers for the spawned server")
+    parser.add_argument("--database-url", help="database for a spawned/in-process server (default: temp SQLite)")
+    parser.add_argument("--concurrency", type=int, default=16, help="concurrent client connections")
+    parser.add_argument("--duration", type=float, default=30, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=3, help="unmeasured seconds before measuring")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="scenario weights, e.g. search=80,detail=20")
+    parser.add_argument("--seed", type=int, default=42, help="request sequence seed")
+    parser.add_argument("--json", help="also write the report to this JSON file")
+    args = parser.parse_args()
+
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+
+    server = None
+    with tempfile.TemporaryDirectory(prefix="rentsure-loadtest-") as directory:
+        env = {
+            "DATABASE_URL": args.database_url or f"sqlite:///{os.path.join(directory, 'loadtest.db')}",
+            # Every simulated user shares one client IP
+            "RENTSURE_RATE_LIMIT_ENABLED": "0",
+        }
+        if args.url:
+            base_url = args.url.rstrip("/")
+        elif args.in_process:
+            server = InProcessServer(env)
+            base_url = server.base_url
+        else:
+            server = SpawnedServer(args.workers, env)
+            base_url = server.base_url
+        try:
+            workload = prepare_workload(base_url)
+            print(f"✓ Target {base_url}: {len(workload.cities)} cities, {len(workload.property_ids)} listings in the detail pool")
+            print(f"  {args.concurrency} clients, {args.warmup:g}s warm-up + {args.duration:g}s measured, mix {args.mix}")
+            report = run_load(base_url, workload, mix, args.concurrency, args.duration, args.warmup, args.seed)
+        finally:
+            if server is not None:
+                server.stop()
+
+    report["target"] = base_url
+    report["workers"] = None if args.url else (1 if args.in_process else args.workers)
+    report["mix"] = mix
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"✓ Report written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,393 @@
+"""
+Prometheus metrics for RentSure
+
+Counters, gauges and histograms rendered in the Prometheus text exposition
+format, plus an ASGI middleware that records per-route request counts and
+latency and per-request database query counts and time. Served by GET
+/metrics in app.py.
+
+The SQLAlchemy cursor hooks here are the only ones in the process. They keep
+the per-request statement count (QueryUsage) and call the statement
+listeners that tracing and query_audit register with add_statement_listener.
+"""
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from anyio import to_thread
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Request/phase latency buckets in seconds (5ms .. 10s)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Single queries and password hashes are faster than whole requests
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels: Sequence[str]) -> Tuple[str, ...]:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {labels}")
+        return tuple(str(label) for label in labels)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        return "\n".join(lines + self.samples())
+
+
+class Counter(_Metric):
+    """Monotonically increasing count per label set."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in values]
+
+
+class Gauge(_Metric):
+    """Point-in-time value per label set."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, *labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in sorted(values.items())
+        ]
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram per label set."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [count per bucket (last = +Inf)..., sum]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            slots = self._values.get(key)
+            if slots is None:
+                slots = self._values[key] = [0] * (len(self.buckets) + 2)
+            slots[index] += 1
+            slots[-1] += value
+
+    @contextmanager
+    def time(self, *labels: str) -> Iterator[None]:
+        """Observe the wall time of the with-block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = sorted((key, list(slots)) for key, slots in self._values.items())
+        lines = []
+        for key, slots in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), slots):
+                cumulative += count
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(slots[-1])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+REGISTRY: List[_Metric] = []
+
+
+def render() -> str:
+    """Every registered metric in the Prometheus text format."""
+    return "\n".join(metric.render() for metric in REGISTRY) + "\n"
+
+
+# ============================================================================
+# RentSure metrics
+# ============================================================================
+
+HTTP_REQUESTS = Counter(
+    "rentsure_http_requests_total", "HTTP requests by route template and status code.",
+    ("method", "route", "status"),
+)
+HTTP_LATENCY = Histogram(
+    "rentsure_http_request_duration_seconds", "HTTP request latency until the last body byte is sent.",
+    ("method", "route"),
+)
+HTTP_IN_PROGRESS = Gauge("rentsure_http_requests_in_progress", "HTTP requests currently being served.")
+SCORING_LATENCY = Histogram(
+    "rentsure_scoring_duration_seconds", "Time spent in scoring-engine phases per request.",
+    ("phase",),
+)
+DB_QUERIES = Counter("rentsure_db_queries_total", "SQL statements executed.", ("operation",))
+DB_QUERY_LATENCY = Histogram(
+    "rentsure_db_query_duration_seconds", "SQL statement execution time.",
+    ("operation",), FAST_BUCKETS,
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    "rentsure_db_queries_per_request", "SQL statements executed per HTTP request.",
+    ("route",), QUERY_COUNT_BUCKETS,
+)
+DB_TIME_PER_REQUEST = Histogram(
+    "rentsure_db_time_per_request_seconds", "Total SQL execution time per HTTP request.",
+    ("route",), FAST_BUCKETS,
+)
+PASSWORD_HASH_LATENCY = Histogram(
+    "rentsure_password_hash_duration_seconds", "pbkdf2 password hashing and verification time.",
+    ("operation",), FAST_BUCKETS,
+)
+THREADPOOL_THREADS = Gauge(
+    "rentsure_threadpool_threads", "Worker threadpool capacity and threads in use.", ("state",),
+)
+THREADPOOL_QUEUE_DEPTH = Gauge(
+    "rentsure_threadpool_queue_depth", "Sync handlers and run_in_threadpool calls waiting for a thread.",
+)
+
+
+# ============================================================================
+# Request middleware & database instrumentation
+# ============================================================================
+
+class QueryUsage:
+    """SQL statements run by one request, or by a block in track_queries()."""
+
+    def __init__(self, label: Callable[[], str], parent: Optional["QueryUsage"] = None) -> None:
+        self._label = label
+        self.parent = parent
+        self.count = 0
+        self.seconds = 0.0
+        # Per-request state of statement listeners, keyed by module
+        self.state: Dict[str, Any] = {}
+
+    @property
+    def label(self) -> str:
+        return self._label()
+
+
+_current_queries: ContextVar[Optional[QueryUsage]] = ContextVar("rentsure_current_queries", default=None)
+
+
+def current_queries() -> Optional[QueryUsage]:
+    """Statement usage of the request or tracked block being served, if any."""
+    return _current_queries.get()
+
+
+@contextmanager
+def track_queries(label: str) -> Iterator[QueryUsage]:
+    """Count the statements run inside the with-block (scripts, jobs, tests).
+
+    Statements still count toward an enclosing request or block as well.
+    """
+    usage = QueryUsage(lambda: label, _current_queries.get())
+    token = _current_queries.set(usage)
+    try:
+        yield usage
+    finally:
+        _current_queries.reset(token)
+
+
+# Set in the scope of in-process warmup requests (warmup.asgi_get). They are
+# not client traffic: metrics and rate limits skip them.
+WARMUP_SCOPE_KEY = "rentsure.warmup"
+
+
+def route_label(scope: Dict[str, Any]) -> str:
+    """Route template (/rental/{property_id}) so labels stay low-cardinality."""
+    route = scope.get("route")
+    path = getattr(route, "path_format", None) or getattr(route, "path", None)
+    return path or "unmatched"
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request counts, latency and DB usage per route."""
+
+    def __init__(self, app: Callable) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http" or scope.get(WARMUP_SCOPE_KEY):
+            await self.app(scope, receive, send)
+            return
+
+        status = [500]
+
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        # The route is only known once routing ran, so resolve the label lazily
+        usage = QueryUsage(lambda: f"{scope['method']} {route_label(scope)}")
+        token = _current_queries.set(usage)
+        HTTP_IN_PROGRESS.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            HTTP_IN_PROGRESS.dec()
+            _current_queries.reset(token)
+            route = route_label(scope)
+            HTTP_REQUESTS.inc(scope["method"], route, str(status[0]))
+            HTTP_LATENCY.observe(elapsed, scope["method"], route)
+            DB_QUERIES_PER_REQUEST.observe(usage.count, route)
+            DB_TIME_PER_REQUEST.observe(usage.seconds, route)
+
+
+class StatementListener(NamedTuple):
+    """Per-statement callbacks run from the shared cursor hooks below.
+
+    before(conn, cursor, statement, context)
+    after(conn, cursor, statement, context, elapsed_seconds)
+    error(exception_context)
+    """
+    before: Optional[Callable[..., None]] = None
+    after: Optional[Callable[..., None]] = None
+    error: Optional[Callable[..., None]] = None
+
+
+# Other modules (tracing, query_audit) hook statements through here, so the
+# process has one set of cursor hooks and one per-request statement count
+_statement_listeners: List[StatementListener] = []
+
+
+def add_statement_listener(listener: StatementListener) -> None:
+    """Run listener for every statement; installs the cursor hooks if needed."""
+    if listener not in _statement_listeners:
+        _statement_listeners.append(listener)
+    instrument_sqlalchemy()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault("rentsure_query_start", []).append(time.perf_counter())
+    context._rentsure_query_timed = True
+    for listener in _statement_listeners:
+        if listener.before is not None:
+            listener.before(conn, cursor, statement, context)
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    elapsed = time.perf_counter() - conn.info["rentsure_query_start"].pop()
+    context._rentsure_query_timed = False
+    operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+    DB_QUERIES.inc(operation)
+    DB_QUERY_LATENCY.observe(elapsed, operation)
+    usage = _current_queries.get()
+    while usage is not None:
+        usage.count += 1
+        usage.seconds += elapsed
+        usage = usage.parent
+    for listener in _statement_listeners:
+        if listener.after is not None:
+            listener.after(conn, cursor, statement, context, elapsed)
+
+
+def _handle_error(exception_context) -> None:
+    # A failed statement never reaches the after hook; drop its start time so
+    # the connection's stack does not grow with every error
+    context = exception_context.execution_context
+    if context is not None and getattr(context, "_rentsure_query_timed", False):
+        exception_context.connection.info["rentsure_query_start"].pop()
+        context._rentsure_query_timed = False
+    for listener in _statement_listeners:
+        if listener.error is not None:
+            listener.error(exception_context)
+
+
+def instrument_sqlalchemy() -> None:
+    """Time every statement on every engine (sync and async) in the process."""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(Engine, "handle_error", _handle_error)
+
+
+def update_threadpool_metrics() -> None:
+    """Sample the anyio worker-thread limiter; call from the event loop."""
+    limiter = to_thread.current_default_thread_limiter()
+    stats = limiter.statistics()
+    THREADPOOL_THREADS.set(limiter.total_tokens, "limit")
+    THREADPOOL_THREADS.set(stats.borrowed_tokens, "busy")
+    THREADPOOL_QUEUE_DEPTH.set(stats.tasks_waiting)
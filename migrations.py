@@ -0,0 +1,217 @@
+"""
+Versioned schema migrations for RentSure
+
+Importing models.py never touches the database; the schema is created and
+upgraded here instead. Each migration runs once, in version order, and is
+recorded in the `schema_migrations` table. An upgrade holds a database-wide
+lock (BEGIN EXCLUSIVE on SQLite, an advisory lock on Postgres) and re-reads
+the pending list under it, so workers that start together apply each
+migration exactly once; the others wait and find nothing left to do.
+
+Usage:
+    python migrations.py              # apply pending migrations (same as `upgrade`)
+    python migrations.py status       # list applied and pending migrations
+
+Production runs `upgrade` once per deploy (the Procfile release phase).
+RENTSURE_AUTO_MIGRATE=1 applies pending migrations on app startup instead;
+it defaults to on for SQLite databases (local development) and off for
+anything else.
+
+To add a migration, append a function to MIGRATIONS with the next version
+number. Never edit or renumber a migration that has shipped, and never build
+one from models.py: a migration must create the schema as it was when the
+migration was written, not as the models look today.
+"""
+import argparse
+import os
+from datetime import datetime
+from typing import Callable, List, NamedTuple
+
+from sqlalchemy import (
+    Boolean, Column, DateTime, Enum, Float, ForeignKey, Integer, MetaData, String, Table, inspect, select, text
+)
+from sqlalchemy.engine import Connection, Engine
+
+
+def auto_migrate_enabled(database_url: str) -> bool:
+    """RENTSURE_AUTO_MIGRATE if set, else on for SQLite URLs only."""
+    value = os.environ.get("RENTSURE_AUTO_MIGRATE")
+    if value is None:
+        return database_url.startswith("sqlite")
+    return value.lower() in ("1", "true", "yes")
+
+
+_migrations_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations",
+    _migrations_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    apply: Callable[[Connection], None]
+
+
+# ============================================================================
+# Migrations
+# ============================================================================
+
+# Frozen copy of the 0001 schema; later model changes need a new migration
+_baseline_metadata = MetaData()
+Table(
+    "users",
+    _baseline_metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("role", Enum("TENANT", "OWNER", name="userrole")),
+    Column("name", String, index=True),
+    Column("email", String, unique=True, index=True),
+    Column("phone", String),
+    Column("city", String, index=True),
+    Column("password_hash", String),
+    Column("created_at", DateTime),
+)
+Table(
+    "tenants",
+    _baseline_metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("user_id", Integer, ForeignKey("users.id"), unique=True),
+    Column("student_or_working", String),
+    Column("budget_preference", Integer, nullable=True),
+    Column("gender_preference", String, nullable=True),
+)
+Table(
+    "owners",
+    _baseline_metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("user_id", Integer, ForeignKey("users.id"), unique=True),
+    Column("property_type", String),
+)
+Table(
+    "properties",
+    _baseline_metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("owner_id", Integer, ForeignKey("users.id"), index=True),
+    Column("title", String, index=True),
+    Column("description", String),
+    Column("address", String, nullable=True),
+    Column("city", String, index=True),
+    Column("rent", Integer),
+    Column("availability", Boolean),
+    Column("safety_score", Float),
+    Column("trust_score", Float),
+    Column("nearby_college", String, nullable=True),
+    Column("college_distance_km", Float, nullable=True),
+    Column("nearby_office_hub", String, nullable=True),
+    Column("office_distance_km", Float, nullable=True),
+    Column("women_safety_index", Float),
+    Column("created_at", DateTime),
+)
+
+
+def _baseline_schema(conn: Connection) -> None:
+    """users, tenants, owners and properties; existing tables are left untouched."""
+    _baseline_metadata.create_all(bind=conn, checkfirst=True)
+
+
+def _property_address_column(conn: Connection) -> None:
+    """Databases created before properties.address existed."""
+    columns = {column["name"] for column in inspect(conn).get_columns("properties")}
+    if "address" not in columns:
+        conn.exec_driver_sql("ALTER TABLE properties ADD COLUMN address VARCHAR")
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "baseline schema", _baseline_schema),
+    Migration(2, "properties.address column", _property_address_column),
+]
+
+
+# ============================================================================
+# Runner
+# ============================================================================
+
+# pg_advisory_xact_lock key shared by every process migrating the database
+MIGRATION_LOCK_KEY = 0x52534D47
+
+
+def _applied(conn: Connection) -> set:
+    if not inspect(conn).has_table(schema_migrations.name):
+        return set()
+    return set(conn.execute(select(schema_migrations.c.version)).scalars())
+
+
+def applied_versions(engine: Engine) -> set:
+    """Versions recorded in schema_migrations (empty for a new database)."""
+    with engine.connect() as conn:
+        return _applied(conn)
+
+
+def pending_migrations(engine: Engine) -> List[Migration]:
+    applied = applied_versions(engine)
+    return [migration for migration in MIGRATIONS if migration.version not in applied]
+
+
+def _lock_for_migration(conn: Connection) -> None:
+    """Start the upgrade transaction holding a database-wide lock.
+
+    Other processes block here until the holder commits; dialects without
+    a lock here fall back to an ordinary transaction.
+    """
+    if conn.dialect.name == "sqlite":
+        # Takes the write lock up front (pysqlite would otherwise defer BEGIN)
+        conn.exec_driver_sql("BEGIN EXCLUSIVE")
+    elif conn.dialect.name == "postgresql":
+        conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+
+
+def upgrade(engine: Engine) -> List[Migration]:
+    """Apply pending migrations in order; return the ones applied.
+
+    Runs as one transaction under the migration lock, each migration in
+    its own savepoint: a failure leaves the database as it was.
+    """
+    with engine.connect() as conn:
+        _lock_for_migration(conn)
+        _migrations_metadata.create_all(bind=conn, checkfirst=True)
+        applied = _applied(conn)
+        pending = [migration for migration in MIGRATIONS if migration.version not in applied]
+        for migration in pending:
+            with conn.begin_nested():
+                migration.apply(conn)
+                conn.execute(schema_migrations.insert().values(
+                    version=migration.version,
+                    name=migration.name,
+                    applied_at=datetime.utcnow(),
+                ))
+        conn.commit()
+    for migration in pending:
+        print(f"✓ Applied migration {migration.version:04d} {migration.name}")
+    return pending
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Apply or inspect RentSure schema migrations")
+    parser.add_argument("command", nargs="?", choices=("upgrade", "status"), default="upgrade")
+    args = parser.parse_args()
+
+    from models import engine
+
+    if args.command == "status":
+        applied = applied_versions(engine)
+        for migration in MIGRATIONS:
+            state = "applied" if migration.version in applied else "pending"
+            print(f"{migration.version:04d} {migration.name:<32} {state}")
+        return
+
+    applied = upgrade(engine)
+    if not applied:
+        print(f"✓ {engine.url} is up to date")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,164 @@
 """
 Database models for RentSure auth system
 """
-from sqlalchemy import create_engine, Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Enum, text
+from sqlalchemy import create_engine, event, Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Enum, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship
+from sqlalchemy.orm import Session, sessionmaker, relationship
 from datetime import datetime
 import enum
+import os
 
-DATABASE_URL = "sqlite:///./rentsure.db"
+def _normalize_database_url(url: str) -> str:
+    # Heroku-style "postgres://" URLs are not accepted by SQLAlchemy
+    if url.startswith("postgres://"):
+        return "postgresql://" + url[len("postgres://"):]
+    return url
 
-engine = create_engine(
-    DATABASE_URL, 
-    connect_args={"check_same_thread": False}
-)
+
+# Primary (read/write) database, and an optional read replica
+DATABASE_URL = _normalize_database_url(os.environ.get("DATABASE_URL", "sqlite:///./rentsure.db"))
+DATABASE_READ_URL = os.environ.get("DATABASE_READ_URL")
+if DATABASE_READ_URL:
+    DATABASE_READ_URL = _normalize_database_url(DATABASE_READ_URL)
+
+# Connection pool sizing (per worker process)
+DB_POOL_SIZE = int(os.environ.get("RENTSURE_DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.environ.get("RENTSURE_DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.environ.get("RENTSURE_DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.environ.get("RENTSURE_DB_POOL_RECYCLE", "3600"))
+
+# SQLite tuning applied to every new connection
+SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get("RENTSURE_SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_CACHE_SIZE_KB = int(os.environ.get("RENTSURE_SQLITE_CACHE_SIZE_KB", "65536"))
+SQLITE_MMAP_SIZE = int(os.environ.get("RENTSURE_SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+
+
+def _engine_options(url: str) -> dict:
+    """create_engine keyword arguments for the given database URL."""
+    if not url.startswith("sqlite"):
+        return {
+            "pool_size": DB_POOL_SIZE,
+            "max_overflow": DB_MAX_OVERFLOW,
+            "pool_timeout": DB_POOL_TIMEOUT,
+            "pool_recycle": DB_POOL_RECYCLE,
+            "pool_pre_ping": True,
+        }
+
+    options = {
+        "connect_args": {
+            "check_same_thread": False,
+            # sqlite3's own lock wait, in seconds (mirrors busy_timeout)
+            "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000,
+        }
+    }
+    if ":memory:" not in url and url.rstrip("/") not in ("sqlite:", "sqlite+pysqlite:"):
+        # File databases use a QueuePool; in-memory ones keep SQLAlchemy's default
+        options.update(
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+        )
+    return options
+
+
+def _configure_sqlite(dbapi_connection, connection_record):
+    """Enable WAL so readers never block on the writer, plus cache tuning."""
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("PRAGMA journal_mode=WAL")
+        # Durable across application crashes; a power loss may drop the last commits
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        # Negative cache_size is in KiB
+        cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")
+        cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+    finally:
+        cursor.close()
+
+
+def create_db_engine(url: str):
+    """Create an engine with pooling and, for SQLite, the connection pragmas."""
+    db_engine = create_engine(url, **_engine_options(url))
+    if db_engine.dialect.name == "sqlite":
+        event.listen(db_engine, "connect", _configure_sqlite)
+    return db_engine
+
+
+def async_database_url(url: str) -> str:
+    """The asyncio-driver form of a sync database URL.
+
+    sqlite -> sqlite+aiosqlite, postgresql -> postgresql+asyncpg (install
+    asyncpg to use Postgres). URLs that already name a driver are kept.
+    """
+    scheme, sep, rest = url.partition(":")
+    if scheme == "sqlite":
+        return f"sqlite+aiosqlite{sep}{rest}"
+    if scheme in ("postgresql", "postgresql+psycopg2", "postgres"):
+        return f"postgresql+asyncpg{sep}{rest}"
+    return url
+
+
+def create_async_db_engine(url: str):
+    """Async counterpart of create_db_engine, with the same pool and pragmas."""
+    db_engine = create_async_engine(url, **_engine_options(url))
+    if db_engine.dialect.name == "sqlite":
+        event.listen(db_engine.sync_engine, "connect", _configure_sqlite)
+    return db_engine
+
+
+class RoutingSession(Session):
+    """
+    Session that sends reads to the replica and writes to the primary.
+
+    Flushes and DML statements always use the primary. Once a session has
+    written, it stays on the primary so it reads its own writes. Without a
+    replica every query goes to the primary.
+    """
+
+    def __init__(self, *args, primary=None, replica=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.primary_bind = primary
+        self.replica_bind = replica
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if getattr(clause, "is_dml", False):
+            # Later reads in this transaction must see the statement's effect
+            self.info["wrote"] = True
+        if self.replica_bind is None or self._flushing or self.info.get("wrote"):
+            return self.primary_bind
+        return self.replica_bind
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _mark_session_wrote(session, flush_context):
+    session.info["wrote"] = True
+
+
+engine = create_db_engine(DATABASE_URL)
+read_engine = create_db_engine(DATABASE_READ_URL) if DATABASE_READ_URL else None
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# For read-mostly routes: reads go to the replica when one is configured
+ReadSessionLocal = sessionmaker(
+    class_=RoutingSession, autocommit=False, autoflush=False, primary=engine, replica=read_engine
+)
+
+# Async engine for `async def` handlers: waiting on the database yields to the
+# event loop instead of holding a threadpool thread
+ASYNC_DATABASE_URL = os.environ.get("RENTSURE_ASYNC_DATABASE_URL", async_database_url(DATABASE_URL))
+async_engine = create_async_db_engine(ASYNC_DATABASE_URL)
+async_read_engine = create_async_db_engine(async_database_url(DATABASE_READ_URL)) if DATABASE_READ_URL else None
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+AsyncReadSessionLocal = async_sessionmaker(
+    class_=AsyncSession,
+    sync_session_class=RoutingSession,
+    autoflush=False,
+    expire_on_commit=False,
+    primary=async_engine.sync_engine,
+    replica=async_read_engine.sync_engine if async_read_engine else None,
+)
 
 Base = declarative_base()
 
@@ -89,21 +234,8 @@ class Property(Base):
     owner = relationship("User", back_populates="properties")
 
 
-def _ensure_property_address_column():
-    """Add address column for existing databases if missing."""
-    try:
-        with engine.begin() as conn:
-            columns = [row[1] for row in conn.exec_driver_sql("PRAGMA table_info(properties)").fetchall()]
-            if "address" not in columns:
-                conn.exec_driver_sql("ALTER TABLE properties ADD COLUMN address VARCHAR")
-    except Exception:
-        # Avoid hard crash on startup if migration fails
-        pass
-
-
-# Create tables on import
-Base.metadata.create_all(bind=engine)
-_ensure_property_address_column()
+# Schema creation and upgrades live in migrations.py; importing this module
+# never touches the database.
 
 
 def get_db():
@@ -113,3 +245,24 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """Dependency for getting an async database session in FastAPI"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def get_read_db():
+    """Dependency for a read-mostly session routed to the read replica"""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_read_db():
+    """Async dependency for a read-mostly session routed to the read replica"""
+    async with AsyncReadSessionLocal() as db:
+        yield db
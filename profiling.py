@@ -0,0 +1,143 @@
+"""
+On-demand profiling of a live RentSure worker
+
+sample_stacks() is a wall-clock sampling profiler: a loop reads every
+thread's Python stack with sys._current_frames() at a fixed interval and
+counts identical stacks. Nothing is hooked into the profiled code, so the
+overhead is one stack walk per thread per interval, and only while a profile
+is running. Output is the collapsed-stack format read by flamegraph.pl,
+speedscope and similar tools:
+
+    thread;outer_function (file.py:12);inner_function (file.py:40) 17
+
+allocation_sites() reports the top allocation sites via tracemalloc.
+"""
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Any, Dict, Optional
+
+# Upper bound on one profiling run, so a typo cannot pin a worker thread
+PROFILE_MAX_SECONDS = float(os.environ.get("RENTSURE_PROFILE_MAX_SECONDS", "60"))
+DEFAULT_INTERVAL_MS = 5.0
+ALLOCATION_GROUPINGS = ("lineno", "filename", "traceback")
+# Innermost frames of threads that are parked, not working: idle threadpool
+# workers and the event loop waiting for I/O
+IDLE_LEAVES = {("threading.py", "wait"), ("selectors.py", "select")}
+
+_profile_lock = threading.Lock()
+
+
+class ProfilerBusy(RuntimeError):
+    """Raised when a profile is requested while another one is running."""
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _collapsed_stack(frame, thread_name: str, include_idle: bool) -> Optional[str]:
+    leaf = frame.f_code
+    if not include_idle and (os.path.basename(leaf.co_filename), leaf.co_name) in IDLE_LEAVES:
+        return None
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.append(thread_name)
+    return ";".join(reversed(labels))
+
+
+def sample_stacks(seconds: float, interval_ms: float = DEFAULT_INTERVAL_MS, include_idle: bool = False) -> str:
+    """Sample every thread's stack for `seconds`; return collapsed stacks.
+
+    Blocks the calling thread for the duration. Only one profile runs at a
+    time per process; a concurrent request raises ProfilerBusy.
+    """
+    if not _profile_lock.acquire(blocking=False):
+        raise ProfilerBusy("A profile is already running in this worker")
+    try:
+        seconds = min(max(seconds, 0.0), PROFILE_MAX_SECONDS)
+        interval = max(interval_ms, 1.0) / 1000
+        own_thread = threading.get_ident()
+        counts: Counter = Counter()
+        deadline = time.perf_counter() + seconds
+        next_sample = time.perf_counter()
+        while next_sample < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own_thread:
+                    continue
+                stack = _collapsed_stack(frame, names.get(ident, f"thread-{ident}"), include_idle)
+                if stack is not None:
+                    counts[stack] += 1
+            next_sample += interval
+            time.sleep(max(0.0, next_sample - time.perf_counter()))
+    finally:
+        _profile_lock.release()
+    return "".join(f"{stack} {count}\n" for stack, count in counts.most_common())
+
+
+def allocation_sites(seconds: float, limit: int = 25, group_by: str = "lineno", frames: int = 1) -> Dict[str, Any]:
+    """Top allocation sites by live size.
+
+    If tracemalloc is already tracing (PYTHONTRACEMALLOC or an earlier call
+    left running), reports growth over the next `seconds`; otherwise traces
+    for `seconds` and reports what was allocated in that window and is still
+    alive. group_by is "lineno", "filename" or "traceback".
+    """
+    if not _profile_lock.acquire(blocking=False):
+        raise ProfilerBusy("A profile is already running in this worker")
+    try:
+        seconds = min(max(seconds, 0.0), PROFILE_MAX_SECONDS)
+        was_tracing = tracemalloc.is_tracing()
+        if was_tracing:
+            before = tracemalloc.take_snapshot()
+        else:
+            tracemalloc.start(max(1, frames))
+            before = None
+        try:
+            time.sleep(seconds)
+            after = tracemalloc.take_snapshot()
+            traced_current, traced_peak = tracemalloc.get_traced_memory()
+        finally:
+            if not was_tracing:
+                tracemalloc.stop()
+    finally:
+        _profile_lock.release()
+
+    ignore = [
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        tracemalloc.Filter(False, __file__),
+    ]
+    after = after.filter_traces(ignore)
+    if before is not None:
+        stats = after.compare_to(before.filter_traces(ignore), group_by)
+        stats = [stat for stat in stats if stat.size_diff > 0]
+        stats.sort(key=lambda stat: stat.size_diff, reverse=True)
+        sites = [_site(stat.traceback, stat.size_diff, stat.count_diff) for stat in stats[:limit]]
+    else:
+        sites = [_site(stat.traceback, stat.size, stat.count) for stat in after.statistics(group_by)[:limit]]
+    return {
+        "pid": os.getpid(),
+        "seconds": seconds,
+        "mode": "growth" if was_tracing else "window",
+        "group_by": group_by,
+        "traced_memory_kb": round(traced_current / 1024, 1),
+        "traced_peak_kb": round(traced_peak / 1024, 1),
+        "sites": sites,
+    }
+
+
+def _site(traceback: tracemalloc.Traceback, size: int, count: int) -> Dict[str, Any]:
+    return {
+        "size_kb": round(size / 1024, 1),
+        "count": count,
+        # Most recent call first
+        "traceback": [f"{frame.filename}:{frame.lineno}" for frame in reversed(traceback)],
+    }
@@ -0,0 +1,147 @@
+"""
+Bulk property import for RentSure
+
+Parses an uploaded CSV or NDJSON file one record at a time, validates each
+record with PropertyCreateRequest and inserts the valid ones in batched
+transactions. Invalid rows are reported back instead of failing the upload.
+"""
+import csv
+import io
+import json
+import os
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.orm import Session
+
+from models import Property
+from schemas import PropertyCreateRequest
+
+IMPORT_FORMATS = ("csv", "ndjson")
+IMPORT_BATCH_SIZE = int(os.environ.get("RENTSURE_IMPORT_BATCH_SIZE", "1000"))
+# Cap on per-row errors echoed back; a broken 100k-row file should not
+# produce a 100k-entry response.
+MAX_REPORTED_ERRORS = 100
+
+
+def detect_format(filename: Optional[str], content_type: Optional[str]) -> Optional[str]:
+    """Guess the import format from the upload's filename or content type."""
+    name = (filename or "").lower()
+    if name.endswith(".csv"):
+        return "csv"
+    if name.endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    content_type = (content_type or "").lower()
+    if "csv" in content_type:
+        return "csv"
+    if "ndjson" in content_type or "jsonlines" in content_type:
+        return "ndjson"
+    return None
+
+
+def _iter_csv(text: io.TextIOBase) -> Iterator[Tuple[int, Any]]:
+    reader = csv.DictReader(text)
+    for record in reader:
+        # Blank cells fall back to the schema defaults
+        yield reader.line_num, {
+            key.strip(): value for key, value in record.items()
+            if key is not None and value not in (None, "")
+        }
+
+
+def _iter_ndjson(text: io.TextIOBase) -> Iterator[Tuple[int, Any]]:
+    for line_no, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_no, json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_no, ValueError(f"Invalid JSON: {e.msg}")
+
+
+def iter_records(stream: BinaryIO, fmt: str) -> Iterator[Tuple[int, Any]]:
+    """Yield (line number, record) pairs. Unparseable lines yield an exception."""
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    try:
+        yield from _iter_csv(text) if fmt == "csv" else _iter_ndjson(text)
+    finally:
+        # Leave the underlying upload open; FastAPI closes it
+        text.detach()
+
+
+def _row_errors(error: Exception) -> List[Dict[str, str]]:
+    if isinstance(error, ValidationError):
+        return [
+            {"field": ".".join(str(part) for part in e["loc"]) or "row", "message": e["msg"]}
+            for e in error.errors()
+        ]
+    return [{"field": "row", "message": str(error)}]
+
+
+def import_properties(db: Session, owner_id: int, stream: BinaryIO, fmt: str) -> Dict[str, Any]:
+    """Validate and insert every record in the stream for one owner.
+
+    Each batch commits on its own, so rows from batches that already
+    committed stay imported even if a later batch fails. A batch the
+    database rejects (constraint violation, out-of-range value) is rolled
+    back, counted as failed and reported by its line range.
+    """
+    imported = 0
+    failed = 0
+    errors: List[Dict[str, Any]] = []
+    batch: List[Dict[str, Any]] = []
+    batch_lines: List[int] = []
+
+    def report(line: Optional[int], row_errors: List[Dict[str, str]]) -> None:
+        if len(errors) < MAX_REPORTED_ERRORS:
+            errors.append({"line": line, "errors": row_errors})
+
+    def flush() -> None:
+        nonlocal imported, failed
+        if not batch:
+            return
+        try:
+            db.execute(insert(Property), batch)
+            db.commit()
+            imported += len(batch)
+        except (IntegrityError, DataError) as e:
+            db.rollback()
+            failed += len(batch)
+            report(batch_lines[0], [{
+                "field": "batch",
+                "message": f"Rows on lines {batch_lines[0]}-{batch_lines[-1]} were not imported: {e.orig}",
+            }])
+        batch.clear()
+        batch_lines.clear()
+
+    try:
+        for line_no, record in iter_records(stream, fmt):
+            try:
+                if isinstance(record, Exception):
+                    raise record
+                if not isinstance(record, dict):
+                    raise ValueError("Each record must be an object")
+                row = PropertyCreateRequest.model_validate(record).model_dump()
+            except (ValidationError, ValueError) as e:
+                failed += 1
+                report(line_no, _row_errors(e))
+                continue
+
+            row["owner_id"] = owner_id
+            batch.append(row)
+            batch_lines.append(line_no)
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                flush()
+    except UnicodeDecodeError:
+        failed += 1
+        errors.append({"line": None, "errors": [{"field": "file", "message": "File is not valid UTF-8; import stopped"}]})
+
+    flush()
+    return {
+        "imported": imported,
+        "failed": failed,
+        "errors": errors,
+        "errors_truncated": failed > len(errors),
+    }
@@ -0,0 +1,160 @@
+"""
+Slow-query log and N+1 detector for RentSure
+
+A statement listener on the shared SQLAlchemy hooks in metrics.py, using the
+per-request statement tracking that MetricsMiddleware already sets up:
+
+- Any statement slower than RENTSURE_SLOW_QUERY_MS (default 100) is logged
+  with its duration and the route that issued it.
+- Within one request or one audit_queries() block, statements are grouped
+  by shape: the SQL with literals and IN-lists
+  collapsed. A shape repeated more than RENTSURE_REPEATED_QUERY_THRESHOLD
+  times (default 5) is the N+1 pattern: a query per row instead of one join
+  or IN query. RENTSURE_REPEATED_QUERY_MODE decides what happens then:
+      warn   log it once per request and shape (default)
+      raise  fail the statement with RepeatedQueryError (for tests/CI)
+      off    disable detection
+  INSERTs are not counted, since batched inserts legitimately repeat.
+
+tests/conftest.py runs every test inside audit_queries(mode="raise").
+"""
+import os
+import re
+from collections import Counter as ShapeCounter
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Set
+
+from metrics import Counter, QueryUsage, StatementListener, add_statement_listener, current_queries, track_queries
+
+SLOW_QUERY_MS = float(os.environ.get("RENTSURE_SLOW_QUERY_MS", "100"))
+REPEATED_QUERY_THRESHOLD = int(os.environ.get("RENTSURE_REPEATED_QUERY_THRESHOLD", "5"))
+REPEATED_QUERY_MODE = os.environ.get("RENTSURE_REPEATED_QUERY_MODE", "warn").lower()
+REPEATED_QUERY_MODES = ("warn", "raise", "off")
+# SQL text in log lines is cut to this many characters
+LOGGED_STATEMENT_CHARS = 300
+
+REPEATED_QUERY_REQUESTS = Counter(
+    "rentsure_db_repeated_query_requests_total",
+    "Requests that ran one statement shape more times than the N+1 threshold.",
+    ("route",),
+)
+
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_WHITESPACE = re.compile(r"\s+")
+
+
+class RepeatedQueryError(RuntimeError):
+    """Raised in "raise" mode when a request repeats a statement shape (N+1)."""
+
+
+def statement_shape(statement: str) -> str:
+    """Statement with literals and IN-lists collapsed, for grouping."""
+    shape = _STRING_LITERAL.sub("?", statement)
+    shape = _NUMBER_LITERAL.sub("?", shape)
+    shape = _WHITESPACE.sub(" ", shape).strip()
+    return _IN_LIST.sub("(?...)", shape)
+
+
+def _trim(statement: str) -> str:
+    statement = _WHITESPACE.sub(" ", statement).strip()
+    if len(statement) > LOGGED_STATEMENT_CHARS:
+        return statement[:LOGGED_STATEMENT_CHARS] + "..."
+    return statement
+
+
+class QueryAudit:
+    """Statement shapes for one request or audited block."""
+
+    def __init__(self, usage: QueryUsage, mode: str, threshold: int) -> None:
+        self.usage = usage
+        self.mode = mode
+        self.threshold = threshold
+        self.shapes: ShapeCounter = ShapeCounter()
+        self.repeated: Set[str] = set()
+
+    @property
+    def label(self) -> str:
+        return self.usage.label
+
+    @property
+    def total(self) -> int:
+        """Statements completed so far (counted by metrics)."""
+        return self.usage.count
+
+    def record(self, statement: str) -> None:
+        if self.mode == "off" or statement.lstrip()[:6].upper() == "INSERT":
+            return
+        shape = statement_shape(statement)
+        self.shapes[shape] += 1
+        count = self.shapes[shape]
+        if count <= self.threshold or shape in self.repeated:
+            return
+        self.repeated.add(shape)
+        if len(self.repeated) == 1:
+            REPEATED_QUERY_REQUESTS.inc(self.label)
+        message = (
+            f"Possible N+1 in {self.label}: same query run {count}+ times "
+            f"(threshold {self.threshold}): {_trim(shape)}"
+        )
+        if self.mode == "raise":
+            raise RepeatedQueryError(message)
+        print(f"⚠ {message}")
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "label": self.label,
+            "queries": self.total,
+            "repeated": {shape: self.shapes[shape] for shape in self.repeated},
+        }
+
+
+def _audit_for(usage: QueryUsage) -> QueryAudit:
+    audit = usage.state.get("query_audit")
+    if audit is None:
+        audit = usage.state["query_audit"] = QueryAudit(usage, REPEATED_QUERY_MODE, REPEATED_QUERY_THRESHOLD)
+    return audit
+
+
+@contextmanager
+def audit_queries(
+    label: str = "block",
+    mode: Optional[str] = None,
+    threshold: Optional[int] = None
+) -> Iterator[QueryAudit]:
+    """Audit the statements run inside the with-block (scripts, jobs, tests).
+
+        with audit_queries("owner export", mode="raise") as audit:
+            ...
+        print(audit.total)
+    """
+    with track_queries(label) as usage:
+        audit = QueryAudit(usage, mode or REPEATED_QUERY_MODE, REPEATED_QUERY_THRESHOLD if threshold is None else threshold)
+        usage.state["query_audit"] = audit
+        yield audit
+
+
+# ============================================================================
+# Statement listener
+# ============================================================================
+
+def _before_statement(conn, cursor, statement, context) -> None:
+    usage = current_queries()
+    if usage is not None:
+        _audit_for(usage).record(statement)
+
+
+def _after_statement(conn, cursor, statement, context, elapsed) -> None:
+    elapsed_ms = elapsed * 1000
+    if elapsed_ms >= SLOW_QUERY_MS:
+        usage = current_queries()
+        where = f" in {usage.label}" if usage is not None else ""
+        print(f"⚠ Slow query ({elapsed_ms:.1f} ms){where}: {_trim(statement)}")
+
+
+def instrument_sqlalchemy() -> None:
+    """Install the slow-query log and N+1 detector on every engine."""
+    if REPEATED_QUERY_MODE not in REPEATED_QUERY_MODES:
+        print(f"⚠ Unknown RENTSURE_REPEATED_QUERY_MODE {REPEATED_QUERY_MODE!r}; expected one of {REPEATED_QUERY_MODES}")
+    add_statement_listener(StatementListener(_before_statement, _after_statement))
@@ -0,0 +1,328 @@
+"""
+Per-client rate limiting for RentSure
+
+Token buckets in front of the routes that are expensive to serve or to
+abuse: /search*, /recommendations, /nearby and /map (scoring and geo CPU),
+/search/export (whole-city exports), /auth/login and /auth/register* (pbkdf2). Each
+client has one bucket per route budget. The bucket refills at the budget's
+rate up to its burst size, and each request takes one token. A request that
+finds the bucket empty gets 429 with Retry-After before routing, body parsing
+or any handler runs.
+
+Clients are keyed by token subject when the request carries a valid bearer
+token, and by client IP otherwise. Behind N trusted proxies, set
+RENTSURE_TRUSTED_PROXY_HOPS=N: the IP is then the Nth X-Forwarded-For entry
+from the right, the one the outermost trusted proxy appended. Entries further
+left are client-supplied and never used, so a forged header cannot buy a
+fresh bucket.
+
+    RENTSURE_RATE_LIMIT_ENABLED   "0" disables limiting (e.g. load tests)
+    RENTSURE_RATE_LIMIT_SEARCH    budget as "per_minute:burst" (default 120:30;
+                                  burst defaults to 1 when omitted)
+    RENTSURE_RATE_LIMIT_EXPORT    (default 20:5)
+    RENTSURE_RATE_LIMIT_LOGIN     (default 10:5)
+    RENTSURE_RATE_LIMIT_REGISTER  (default 5:3)
+    RENTSURE_RATE_LIMIT_STORE     "memory" (default, per worker) or "sqlite"
+    RENTSURE_RATE_LIMIT_DB        SQLite file of the shared store
+    RENTSURE_TRUSTED_PROXY_HOPS   proxies in front of the app (default 0)
+
+The in-memory store gives every worker its own buckets, so N workers allow up
+to N times the budget. The SQLite store shares buckets between the workers
+of one host. It is a local stand-in for a networked store such as Redis,
+which only needs to implement the same take() method. Stores that block
+(blocking = True) are called from the threadpool, never on the event loop,
+and a store that cannot answer in time lets the request through.
+"""
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from metrics import WARMUP_SCOPE_KEY, Counter
+
+RATE_LIMIT_ENABLED = os.environ.get("RENTSURE_RATE_LIMIT_ENABLED", "1").lower() not in ("0", "false", "no")
+RATE_LIMIT_STORE = os.environ.get("RENTSURE_RATE_LIMIT_STORE", "memory").lower()
+RATE_LIMIT_DB = os.environ.get(
+    "RENTSURE_RATE_LIMIT_DB",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "rate_limits.db"),
+)
+TRUSTED_PROXY_HOPS = int(os.environ.get("RENTSURE_TRUSTED_PROXY_HOPS", "0"))
+# Seconds the SQLite store waits for another worker's write lock
+SQLITE_LOCK_TIMEOUT_SECONDS = 0.25
+# Buckets kept by the in-memory store before idle (full) ones are dropped
+MAX_MEMORY_BUCKETS = 100_000
+# The SQLite store deletes buckets idle for this long, every PRUNE_EVERY takes
+SQLITE_BUCKET_TTL_SECONDS = 3600
+SQLITE_PRUNE_EVERY = 1000
+
+RATE_LIMITED_REQUESTS = Counter(
+    "rentsure_rate_limited_requests_total",
+    "Requests rejected with 429 by the per-client rate limiter.",
+    ("budget",),
+)
+RATE_LIMIT_STORE_ERRORS = Counter(
+    "rentsure_rate_limit_store_errors_total",
+    "Rate limit checks skipped (request allowed) because the bucket store failed.",
+)
+
+
+class Budget(NamedTuple):
+    name: str
+    per_minute: float
+    burst: int
+
+    @property
+    def rate(self) -> float:
+        """Tokens added per second."""
+        return self.per_minute / 60
+
+
+def parse_budget(name: str, default: str) -> Budget:
+    """Budget from RENTSURE_RATE_LIMIT_<NAME> ("per_minute:burst")."""
+    value = os.environ.get(f"RENTSURE_RATE_LIMIT_{name.upper()}", default)
+    per_minute, _, burst = value.partition(":")
+    try:
+        budget = Budget(name, float(per_minute), int(burst) if burst else 1)
+    except ValueError:
+        raise ValueError(f"RENTSURE_RATE_LIMIT_{name.upper()} must look like 'per_minute:burst', got {value!r}") from None
+    if budget.per_minute <= 0 or budget.burst < 1:
+        raise ValueError(f"RENTSURE_RATE_LIMIT_{name.upper()} must be positive, got {value!r}")
+    return budget
+
+
+SEARCH_BUDGET = parse_budget("search", "120:30")
+EXPORT_BUDGET = parse_budget("export", "20:5")
+LOGIN_BUDGET = parse_budget("login", "10:5")
+REGISTER_BUDGET = parse_budget("register", "5:3")
+
+# (method, path, budget), first match wins; a path ending in "*" matches by prefix
+ROUTE_BUDGETS: List[Tuple[str, str, Budget]] = [
+    ("GET", "/search/export", EXPORT_BUDGET),
+    ("GET", "/search*", SEARCH_BUDGET),
+    ("GET", "/recommendations", SEARCH_BUDGET),
+    ("GET", "/nearby", SEARCH_BUDGET),
+    ("GET", "/map", SEARCH_BUDGET),
+    ("POST", "/auth/login", LOGIN_BUDGET),
+    ("POST", "/auth/register", REGISTER_BUDGET),
+    ("POST", "/auth/register/*", REGISTER_BUDGET),
+]
+
+
+def budget_for(method: str, path: str) -> Optional[Budget]:
+    for route_method, route_path, budget in ROUTE_BUDGETS:
+        if method != route_method:
+            continue
+        if route_path.endswith("*") and path.startswith(route_path[:-1]):
+            return budget
+        if path == route_path or path == route_path + "/":
+            return budget
+    return None
+
+
+def _refill(tokens: float, updated: float, now: float, budget: Budget) -> float:
+    return min(float(budget.burst), tokens + (now - updated) * budget.rate)
+
+
+def _decide(tokens: float, budget: Budget) -> Tuple[bool, float, float]:
+    """(allowed, tokens left, seconds until a token is available)."""
+    if tokens >= 1:
+        return True, tokens - 1, 0.0
+    return False, tokens, (1 - tokens) / budget.rate
+
+
+# ============================================================================
+# Bucket stores
+# ============================================================================
+
+class MemoryStore:
+    """Buckets in a dict, private to this worker process."""
+
+    blocking = False
+
+    def __init__(self, max_buckets: int = MAX_MEMORY_BUCKETS) -> None:
+        self.max_buckets = max_buckets
+        # key -> [tokens, updated, seconds for an empty bucket to refill]
+        self._buckets: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def take(self, key: str, budget: Budget, now: Optional[float] = None) -> Tuple[bool, float]:
+        """Take one token from key's bucket: (allowed, retry_after seconds)."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            bucket = self._buckets.get(key)
+            tokens = float(budget.burst) if bucket is None else _refill(bucket[0], bucket[1], now, budget)
+            allowed, tokens, retry_after = _decide(tokens, budget)
+            if bucket is None:
+                if len(self._buckets) >= self.max_buckets:
+                    self._prune(now)
+                self._buckets[key] = [tokens, now, budget.burst / budget.rate]
+            else:
+                bucket[0], bucket[1] = tokens, now
+        return allowed, retry_after
+
+    def _prune(self, now: float) -> None:
+        # A bucket idle long enough to be full again is the same as no bucket;
+        # if none is, drop the oldest tenth
+        stale = [key for key, (_tokens, updated, refill) in self._buckets.items() if now - updated >= refill]
+        for key in stale or list(self._buckets)[: len(self._buckets) // 10]:
+            del self._buckets[key]
+
+
+class SQLiteStore:
+    """Buckets in a SQLite file shared by the workers of one host."""
+
+    blocking = True
+
+    def __init__(self, path: str = RATE_LIMIT_DB) -> None:
+        self.path = path
+        self._local = threading.local()
+        self._takes = 0
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_limit_buckets "
+                "(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Autocommit mode; take() opens its own write transaction
+            conn = sqlite3.connect(self.path, timeout=SQLITE_LOCK_TIMEOUT_SECONDS, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def take(self, key: str, budget: Budget, now: Optional[float] = None) -> Tuple[bool, float]:
+        """Take one token from key's bucket: (allowed, retry_after seconds)."""
+        # Wall clock: monotonic clocks are not comparable across processes
+        now = time.time() if now is None else now
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tokens, updated FROM rate_limit_buckets WHERE key = ?", (key,)).fetchone()
+            tokens = float(budget.burst) if row is None else _refill(row[0], row[1], now, budget)
+            allowed, tokens, retry_after = _decide(tokens, budget)
+            conn.execute(
+                "INSERT INTO rate_limit_buckets (key, tokens, updated) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated",
+                (key, tokens, now),
+            )
+            self._takes += 1
+            if self._takes % SQLITE_PRUNE_EVERY == 0:
+                conn.execute("DELETE FROM rate_limit_buckets WHERE updated < ?", (now - SQLITE_BUCKET_TTL_SECONDS,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return allowed, retry_after
+
+
+def make_store(kind: str = RATE_LIMIT_STORE):
+    if kind == "sqlite":
+        return SQLiteStore()
+    if kind != "memory":
+        print(f"⚠ Unknown RENTSURE_RATE_LIMIT_STORE {kind!r}; using memory")
+    return MemoryStore()
+
+
+# ============================================================================
+# Request middleware
+# ============================================================================
+
+def client_ip(scope: Dict[str, Any], trusted_hops: int = TRUSTED_PROXY_HOPS) -> str:
+    """The connecting client's IP, as seen by the outermost trusted proxy."""
+    if trusted_hops > 0:
+        forwarded = [
+            entry.strip()
+            for name, value in scope["headers"] if name == b"x-forwarded-for"
+            for entry in value.decode("latin-1").split(",")
+        ]
+        if len(forwarded) >= trusted_hops and forwarded[-trusted_hops]:
+            return forwarded[-trusted_hops]
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+def client_key(scope: Dict[str, Any], trusted_hops: int = TRUSTED_PROXY_HOPS) -> str:
+    """Token subject for requests with a valid bearer token, else client IP."""
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() == "bearer" and token:
+                from auth_utils import verify_token
+                from fastapi import HTTPException
+                try:
+                    payload = verify_token(token.strip())
+                except HTTPException:
+                    payload = {}
+                # Tokens from auth_routes carry user_id; "sub" is the JWT standard
+                subject = payload.get("sub") or payload.get("user_id")
+                if subject:
+                    return f"sub:{subject}"
+            break
+    return f"ip:{client_ip(scope, trusted_hops)}"
+
+
+class RateLimitMiddleware:
+    """ASGI middleware that sheds over-budget clients with 429."""
+
+    def __init__(
+        self,
+        app: Callable,
+        store: Any = None,
+        enabled: bool = RATE_LIMIT_ENABLED,
+        trusted_hops: int = TRUSTED_PROXY_HOPS
+    ) -> None:
+        self.app = app
+        self.store = store if store is not None else make_store()
+        self.enabled = enabled
+        self.trusted_hops = trusted_hops
+
+    async def _take(self, key: str, budget: Budget) -> Tuple[bool, float]:
+        try:
+            if getattr(self.store, "blocking", False):
+                return await run_in_threadpool(self.store.take, key, budget)
+            return self.store.take(key, budget)
+        except Exception as exc:
+            # Fail open: a slow or broken store must not take the API down
+            RATE_LIMIT_STORE_ERRORS.inc()
+            print(f"⚠ Rate limit store error: {exc}")
+            return True, 0.0
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if not self.enabled or scope["type"] != "http" or scope.get(WARMUP_SCOPE_KEY):
+            await self.app(scope, receive, send)
+            return
+        budget = budget_for(scope["method"], scope["path"])
+        if budget is None:
+            await self.app(scope, receive, send)
+            return
+
+        allowed, retry_after = await self._take(f"{budget.name}:{client_key(scope, self.trusted_hops)}", budget)
+        if allowed:
+            await self.app(scope, receive, send)
+            return
+
+        RATE_LIMITED_REQUESTS.inc(budget.name)
+        seconds = max(1, math.ceil(retry_after))
+        body = json.dumps({
+            "error": "Too Many Requests",
+            "message": f"Rate limit for {budget.name} exceeded; retry in {seconds}s",
+            "retry_after": seconds,
+        }).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(seconds).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
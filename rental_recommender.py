@@ -5,8 +5,24 @@ Ranks and recommends rental properties based on student profile preferences
 using trust, safety, distance, and budget suitability scoring.
 """
 
+import heapq
+import sys
+from array import array
 from dataclasses import dataclass
-from typing import List, Optional
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Mapping, Optional, Sequence, Tuple, Union
+
+# Low-cardinality string fields repeated across many listings. They are
+# interned on construction so every listing shares one copy of each value.
+INTERNED_FIELDS = (
+    "price_fairness",
+    "availability_status",
+    "gender_preference",
+    "owner_name",
+    "neighborhood",
+    "city_zone",
+    "nearby_college",
+    "nearby_office_hub",
+)
 
 
 @dataclass
@@ -16,7 +32,7 @@ class StudentProfile:
     preferred_distance_km: float  # Preferred distance from college/office
 
 
-@dataclass
+@dataclass(slots=True)
 class RentalProperty:
     """Details of an available rental property."""
     property_id: str  # Unique identifier
@@ -56,9 +72,17 @@ class RentalProperty:
     crime_index: Optional[int] = None
     night_transit_score: Optional[int] = None
     tiffin_options: Optional[List[dict]] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
 
+    def __post_init__(self) -> None:
+        for field_name in INTERNED_FIELDS:
+            value = getattr(self, field_name)
+            if type(value) is str:
+                setattr(self, field_name, sys.intern(value))
 
-@dataclass
+
+@dataclass(slots=True)
 class RecommendationResult:
     """A ranked rental recommendation with scoring breakdown."""
     property_id: str
@@ -105,25 +129,21 @@ class RecommendationResult:
     tiffin_options: Optional[List[dict]] = None
 
 
-def calculate_rental_recommendation_score(
-    rental: RentalProperty,
+def score_components(
+    rent: float,
+    distance_km: float,
+    safety_score: float,
+    trust_score: float,
     student: StudentProfile
-) -> RecommendationResult:
+) -> Tuple[float, float, float, float, float]:
     """
-    Calculate a composite recommendation score for a rental property.
+    Compute the recommendation score components from raw listing values.
 
-    Scoring Components:
-    - Budget Fit (0-30 pts): Over-budget properties are penalized
-    - Distance Fit (0-30 pts): Closer distance is rewarded
-    - Safety Score (0-20 pts): Normalized from property's 0-100 safety score
-    - Trust Score (0-20 pts): Normalized from owner's 0-100 trust score
-
-    Args:
-        rental: RentalProperty object with rental details
-        student: StudentProfile with student preferences
+    Shared by the per-object and column-based scoring paths so both always
+    produce identical scores.
 
     Returns:
-        RecommendationResult with overall score and component breakdown
+        (budget_fit, distance_fit, safety_contrib, trust_contrib, overall)
     """
 
     # ========== BUDGET FIT COMPONENT (0-30 points) ==========
@@ -131,11 +151,11 @@ def calculate_rental_recommendation_score(
     # Rentals over budget: penalized based on excess percentage
     # Formula: if rent <= budget: 30 pts
     #          else: 30 * (budget / rent), minimum 0
-    if rental.rent <= student.max_budget:
+    if rent <= student.max_budget:
         budget_fit_score = 30.0
     else:
         # Over-budget penalty: reduce proportionally
-        budget_ratio = student.max_budget / rental.rent
+        budget_ratio = student.max_budget / rent
         budget_fit_score = max(0, 30.0 * budget_ratio)
 
     # ========== DISTANCE FIT COMPONENT (0-30 points) ==========
@@ -145,28 +165,62 @@ def calculate_rental_recommendation_score(
     #          else: 30 * (preferred_distance / actual_distance)^0.8
     max_beneficial_distance = student.preferred_distance_km * 2.0
 
-    if rental.distance_km <= student.preferred_distance_km:
+    if distance_km <= student.preferred_distance_km:
         distance_fit_score = 30.0
-    elif rental.distance_km <= max_beneficial_distance:
+    elif distance_km <= max_beneficial_distance:
         # Penalize based on excess distance (with diminishing penalty)
-        distance_ratio = student.preferred_distance_km / rental.distance_km
+        distance_ratio = student.preferred_distance_km / distance_km
         distance_fit_score = 30.0 * (distance_ratio ** 0.8)
     else:
         distance_fit_score = 0.0
 
     # ========== SAFETY SCORE COMPONENT (0-20 points) ==========
     # Directly normalize safety score from 0-100 to 0-20 points
-    safety_score_contrib = (rental.safety_score / 100.0) * 20.0
+    safety_score_contrib = (safety_score / 100.0) * 20.0
 
     # ========== TRUST SCORE COMPONENT (0-20 points) ==========
     # Directly normalize trust score from 0-100 to 0-20 points
-    trust_score_contrib = (rental.trust_score / 100.0) * 20.0
+    trust_score_contrib = (trust_score / 100.0) * 20.0
 
     # ========== TOTAL SCORE ==========
     # Weighted sum of all components (clamped to 0-100)
     overall_score = min(100.0, budget_fit_score + distance_fit_score + 
                         safety_score_contrib + trust_score_contrib)
 
+    return budget_fit_score, distance_fit_score, safety_score_contrib, trust_score_contrib, overall_score
+
+
+def calculate_rental_recommendation_score(
+    rental: RentalProperty,
+    student: StudentProfile
+) -> RecommendationResult:
+    """
+    Calculate a composite recommendation score for a rental property.
+
+    Scoring Components:
+    - Budget Fit (0-30 pts): Over-budget properties are penalized
+    - Distance Fit (0-30 pts): Closer distance is rewarded
+    - Safety Score (0-20 pts): Normalized from property's 0-100 safety score
+    - Trust Score (0-20 pts): Normalized from owner's 0-100 trust score
+
+    Args:
+        rental: RentalProperty object with rental details
+        student: StudentProfile with student preferences
+
+    Returns:
+        RecommendationResult with overall score and component breakdown
+    """
+
+    (
+        budget_fit_score,
+        distance_fit_score,
+        safety_score_contrib,
+        trust_score_contrib,
+        overall_score,
+    ) = score_components(
+        rental.rent, rental.distance_km, rental.safety_score, rental.trust_score, student
+    )
+
     return RecommendationResult(
         property_id=rental.property_id,
         overall_score=overall_score,
@@ -213,9 +267,128 @@ def calculate_rental_recommendation_score(
     )
 
 
+# Number of distinct student profiles whose scores a RentalCatalog caches
+SCORE_CACHE_PROFILES = 16
+
+
+class RentalCatalog:
+    """
+    Struct-of-arrays view of a set of listings for bulk scoring.
+
+    The numeric scoring columns (rent, distance, safety, trust) are packed
+    into typed arrays so a whole city can be scored without touching (or
+    creating) per-listing Python objects. Full RecommendationResult objects
+    are only built for the top_n winners.
+
+    The catalog is a read-only snapshot and behaves like a sequence of
+    RentalProperty, so it can be used anywhere a list of rentals is. Any other
+    numeric columns (e.g. college_distance_km) can be supplied through
+    `columns` and read back with column(); missing values are NaN. Search
+    indexes over a catalog live in catalog_store.IndexedCatalog.
+    """
+
+    __slots__ = ("rent", "distance_km", "safety_score", "trust_score", "_rows", "_columns", "_score_cache")
+
+    def __init__(
+        self,
+        rows: Sequence[RentalProperty],
+        rent: Sequence[float],
+        distance_km: Sequence[float],
+        safety_score: Sequence[float],
+        trust_score: Sequence[float],
+        columns: Optional[Mapping[str, Sequence[float]]] = None
+    ) -> None:
+        self._rows = rows
+        self.rent = rent
+        self.distance_km = distance_km
+        self.safety_score = safety_score
+        self.trust_score = trust_score
+        self._columns = dict(columns or {})
+        self._columns.update(
+            rent=rent, distance_km=distance_km, safety_score=safety_score, trust_score=trust_score
+        )
+        self._score_cache: Dict[Tuple[float, float], List[float]] = {}
+
+    @classmethod
+    def from_rentals(cls, rentals: Sequence[RentalProperty]) -> "RentalCatalog":
+        """Build the numeric columns from existing RentalProperty objects."""
+        return cls(
+            rows=list(rentals),
+            rent=array("d", (r.rent for r in rentals)),
+            distance_km=array("d", (r.distance_km for r in rentals)),
+            safety_score=array("d", (r.safety_score for r in rentals)),
+            trust_score=array("d", (r.trust_score for r in rentals)),
+        )
+
+    def __len__(self) -> int:
+        return len(self.rent)
+
+    def column(self, name: str) -> Sequence[float]:
+        """A numeric column by field name (built from the rows if not stored)."""
+        values = self._columns.get(name)
+        if values is None:
+            values = array("d", (
+                float("nan") if getattr(r, name) is None else getattr(r, name) for r in self
+            ))
+            self._columns[name] = values
+        return values
+
+    def coded_column(self, name: str) -> Tuple[Sequence[Hashable], Callable[[Hashable], Any]]:
+        """A field as (per-row codes, decode). Equal values share a code.
+
+        Rows that can supply codes without decoding (the mapped catalog's
+        string pool) do so; otherwise the values themselves are the codes.
+        """
+        coded = getattr(self._rows, "coded_column", None)
+        if coded is not None:
+            return coded(name)
+        values = [getattr(r, name) for r in self]
+        return [tuple(v) if isinstance(v, list) else v for v in values], lambda code: code
+
+    def __getitem__(self, index: int) -> RentalProperty:
+        return self._rows[index]
+
+    def __iter__(self) -> Iterator[RentalProperty]:
+        for index in range(len(self)):
+            yield self._rows[index]
+
+    def overall_scores(self, student: StudentProfile) -> List[float]:
+        """
+        Overall score of every listing, in catalog order.
+
+        Scores are cached per student profile (the catalog is immutable), so
+        repeated rankings for the same profile skip rescoring. Treat the
+        returned list as read-only.
+        """
+        key = (student.max_budget, student.preferred_distance_km)
+        scores = self._score_cache.get(key)
+        if scores is None:
+            scores = [
+                score_components(rent, distance_km, safety_score, trust_score, student)[4]
+                for rent, distance_km, safety_score, trust_score in zip(
+                    self.rent, self.distance_km, self.safety_score, self.trust_score
+                )
+            ]
+            if len(self._score_cache) >= SCORE_CACHE_PROFILES:
+                self._score_cache.pop(next(iter(self._score_cache)))
+            self._score_cache[key] = scores
+        return scores
+
+    def recommend(self, student: StudentProfile, top_n: int = 5) -> List[RecommendationResult]:
+        """Same ranking as recommend_rentals, scored from the columns."""
+        scores = self.overall_scores(student)
+        indices = range(len(scores))
+        if 0 <= top_n < len(scores):
+            # nlargest keeps catalog order among equal scores, like a stable sort
+            best = heapq.nlargest(top_n, indices, key=scores.__getitem__)
+        else:
+            best = sorted(indices, key=scores.__getitem__, reverse=True)[:top_n]
+        return [calculate_rental_recommendation_score(self[i], student) for i in best]
+
+
 def recommend_rentals(
     student: StudentProfile,
-    available_rentals: List[RentalProperty],
+    available_rentals: Union[List[RentalProperty], RentalCatalog],
     top_n: int = 5
 ) -> List[RecommendationResult]:
     """
@@ -223,13 +396,17 @@ def recommend_rentals(
 
     Args:
         student: StudentProfile with preferences
-        available_rentals: List of available RentalProperty objects
+        available_rentals: List of available RentalProperty objects, or a
+            RentalCatalog (scored from its columns)
         top_n: Number of top recommendations to return (default: 5)
 
     Returns:
         List of RecommendationResult objects, sorted by overall_score (descending)
     """
 
+    if isinstance(available_rentals, RentalCatalog):
+        return available_rentals.recommend(student, top_n)
+
     # Score each rental
     scored_rentals = [
         calculate_rental_recommendation_score(rental, student)
@@ -0,0 +1,61 @@
+"""
+Local read-replica stand-in for RentSure
+
+Keeps a second SQLite file in sync with the primary so the read/write split
+(DATABASE_READ_URL) can be exercised locally without a real replicated
+database. Each sync copies a consistent snapshot of the primary with SQLite's
+online backup API; the interval doubles as simulated replication lag.
+
+Usage:
+    DATABASE_URL=sqlite:///./rentsure.db DATABASE_READ_URL=sqlite:///./rentsure-replica.db \
+        python replica_sync.py --interval 1
+"""
+import argparse
+import os
+import sqlite3
+import time
+
+from sqlalchemy.engine import make_url
+
+
+def sqlite_path(url: str) -> str:
+    """Filesystem path of a sqlite:/// URL."""
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "sqlite" or not parsed.database or parsed.database == ":memory:":
+        raise ValueError(f"Replica sync needs file-based SQLite URLs, got {url!r}")
+    return parsed.database
+
+
+def sync_replica(primary_path: str, replica_path: str) -> None:
+    """Copy a consistent snapshot of the primary database onto the replica."""
+    source = sqlite3.connect(primary_path)
+    target = sqlite3.connect(replica_path, timeout=30)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replicate the RentSure SQLite database to a read replica")
+    parser.add_argument("--primary", default=os.environ.get("DATABASE_URL", "sqlite:///./rentsure.db"))
+    parser.add_argument("--replica", default=os.environ.get("DATABASE_READ_URL"))
+    parser.add_argument("--interval", type=float, default=1.0, help="seconds between syncs (replication lag)")
+    parser.add_argument("--once", action="store_true", help="sync once and exit")
+    args = parser.parse_args()
+    if not args.replica:
+        parser.error("set DATABASE_READ_URL or pass --replica")
+
+    primary_path = sqlite_path(args.primary)
+    replica_path = sqlite_path(args.replica)
+    print(f"✓ Replicating {primary_path} -> {replica_path}")
+    while True:
+        sync_replica(primary_path, replica_path)
+        if args.once:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
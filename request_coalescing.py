@@ -0,0 +1,43 @@
+"""
+Single-flight request coalescing for RentSure
+
+When many identical ranking queries arrive at once (a trending city page),
+only the first one computes the result. Every concurrent duplicate awaits the
+same in-flight computation and shares its result.
+"""
+import asyncio
+from typing import Any, Callable, Dict, Hashable
+
+from starlette.concurrency import run_in_threadpool
+
+
+class SingleFlight:
+    """Deduplicate concurrent calls that share the same key.
+
+    The computation runs in the threadpool so the event loop stays free to
+    accept (and coalesce) the duplicates while it is in flight. Results are
+    not cached: once the computation finishes, the next call recomputes.
+    """
+
+    def __init__(self) -> None:
+        self._in_flight: Dict[Hashable, "asyncio.Task[Any]"] = {}
+
+    async def run(self, key: Hashable, func: Callable[..., Any], *args: Any) -> Any:
+        """Return func(*args), sharing one computation per key at a time."""
+        task = self._in_flight.get(key)
+        if task is None or task.done():
+            task = asyncio.ensure_future(run_in_threadpool(func, *args))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+
+        # Shield so a disconnecting client does not cancel the computation
+        # for everyone else waiting on it.
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: "asyncio.Task[Any]") -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+
+    def in_flight(self) -> int:
+        """Number of distinct computations currently running."""
+        return len(self._in_flight)
@@ -2,7 +2,7 @@
 Pydantic schemas for request/response validation
 """
 from pydantic import BaseModel, EmailStr
-from typing import Optional
+from typing import List, Optional
 from models import UserRole
 
 
@@ -74,6 +74,16 @@ class PropertyCreateRequest(BaseModel):
     office_distance_km: Optional[float] = None
 
 
+class PropertyBulkUpdateItem(BaseModel):
+    id: int
+    availability: Optional[bool] = None
+    rent: Optional[int] = None
+
+
+class PropertyBulkUpdateRequest(BaseModel):
+    updates: List[PropertyBulkUpdateItem]
+
+
 class PropertyResponse(BaseModel):
     id: int
     owner_id: int
@@ -1,8 +1,8 @@
 @echo off
 setlocal
 
-REM Start backend
-start "RentSure API" cmd /k "cd /d C:\Project\RentSure && .venv\Scripts\python.exe -m uvicorn app:app --reload"
+REM Start backend (applies pending schema migrations first)
+start "RentSure API" cmd /k "cd /d C:\Project\RentSure && .venv\Scripts\python.exe migrations.py && .venv\Scripts\python.exe -m uvicorn app:app --reload"
 
 REM Start frontend
 start "RentSure Frontend" cmd /k "cd /d C:\Project\RentSure\frontend && npm install && npm run dev"
@@ -0,0 +1,139 @@
+"""
+Startup-time profiling for RentSure
+
+Records how long each import group and init phase of a worker takes, from
+the moment this module is imported (app.py imports it first) until the
+worker starts serving. Work that is not needed to answer requests runs on
+background threads instead, tracked here so /health can report readiness:
+
+    startup_profile.checkpoint("import: framework")   # time since last mark
+    with startup_profile.phase("migrations"):          # a timed block
+        ...
+    startup_profile.background("catalog warmup", fn)  # off the startup path
+    startup_profile.serving()                          # startup finished
+
+RENTSURE_STARTUP_BUDGET_SECONDS (default 3) is the time a worker may take to
+start serving; exceeding it logs a warning with the slowest phases, so the
+offender can be made lazy or moved to the background.
+"""
+import asyncio
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+STARTUP_BUDGET_SECONDS = float(os.environ.get("RENTSURE_STARTUP_BUDGET_SECONDS", "3"))
+# How many of the slowest phases an over-budget warning lists
+SLOWEST_PHASES_REPORTED = 3
+
+
+class StartupProfile:
+    """Durations of the import and init phases of this worker process."""
+
+    def __init__(self, budget_seconds: float = STARTUP_BUDGET_SECONDS) -> None:
+        self.budget_seconds = budget_seconds
+        self.started = time.perf_counter()
+        self._last_mark = self.started
+        self._lock = threading.Lock()
+        self.phases: List[Dict[str, Any]] = []
+        self.tasks: Dict[str, Dict[str, Any]] = {}
+        self.serving_after_ms: Optional[float] = None
+
+    def _elapsed_ms(self, since: float) -> float:
+        return round((time.perf_counter() - since) * 1000, 1)
+
+    def checkpoint(self, name: str) -> None:
+        """Record the time since the previous checkpoint (e.g. an import group)."""
+        now = time.perf_counter()
+        with self._lock:
+            self.phases.append({"name": name, "ms": round((now - self._last_mark) * 1000, 1)})
+            self._last_mark = now
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time a blocking init step that runs before the worker serves."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.phases.append({"name": name, "ms": self._elapsed_ms(started)})
+                self._last_mark = time.perf_counter()
+
+    def background(self, name: str, fn: Callable[[], Any]) -> None:
+        """Run fn off the startup path; the worker is not ready until it finishes.
+
+        Plain functions run on a daemon thread. Coroutine functions run as a
+        task on the running event loop (call from an async startup handler).
+        """
+        task: Dict[str, Any] = {"name": name, "status": "running", "ms": None}
+        with self._lock:
+            self.tasks[name] = task
+        started = time.perf_counter()
+
+        def finish(exc: Optional[BaseException]) -> None:
+            if exc is None:
+                task["status"] = "done"
+            else:
+                task["status"] = "failed"
+                task["error"] = str(exc)
+                print(f"⚠ Startup task {name!r} failed: {exc}")
+            task["ms"] = self._elapsed_ms(started)
+
+        if asyncio.iscoroutinefunction(fn):
+            async def run_async() -> None:
+                try:
+                    await fn()
+                except Exception as exc:
+                    finish(exc)
+                else:
+                    finish(None)
+
+            # Keep a reference: the loop only holds tasks weakly
+            task["_task"] = asyncio.get_running_loop().create_task(run_async())
+            return
+
+        def run() -> None:
+            try:
+                fn()
+            except Exception as exc:
+                finish(exc)
+            else:
+                finish(None)
+
+        threading.Thread(target=run, name=f"startup-{name}", daemon=True).start()
+
+    def serving(self) -> None:
+        """Mark the end of blocking startup and check it against the budget."""
+        self.serving_after_ms = self._elapsed_ms(self.started)
+        budget_ms = self.budget_seconds * 1000
+        if self.serving_after_ms <= budget_ms:
+            print(f"✓ Serving after {self.serving_after_ms:.0f} ms (startup budget {budget_ms:.0f} ms)")
+            return
+        slowest = sorted(self.phases, key=lambda p: p["ms"], reverse=True)[:SLOWEST_PHASES_REPORTED]
+        print(
+            f"⚠ Startup took {self.serving_after_ms:.0f} ms, over the {budget_ms:.0f} ms budget; slowest: "
+            + ", ".join(f"{p['name']} {p['ms']:.0f} ms" for p in slowest)
+        )
+
+    def ready(self) -> bool:
+        """Serving, and every background startup task has finished."""
+        return self.serving_after_ms is not None and all(
+            task["status"] != "running" for task in self.tasks.values()
+        )
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready(),
+            "serving_after_ms": self.serving_after_ms,
+            "budget_ms": self.budget_seconds * 1000,
+            "phases": list(self.phases),
+            "background": [
+                {key: value for key, value in task.items() if not key.startswith("_")}
+                for task in self.tasks.values()
+            ],
+        }
+
+
+startup_profile = StartupProfile()
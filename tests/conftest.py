@@ -0,0 +1,76 @@
+"""Shared pytest setup: make the flat top-level modules importable."""
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+# Tests share one client address; keep the per-client limiter out of the way
+# (tests/test_rate_limit.py exercises it directly)
+os.environ.setdefault("RENTSURE_RATE_LIMIT_ENABLED", "0")
+# A repeated statement shape (likely N+1) fails the request under test
+os.environ.setdefault("RENTSURE_REPEATED_QUERY_MODE", "raise")
+# Never touch the checked-in rentsure.db
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='rentsure-tests-'), 'test.db')}")
+
+
+@pytest.fixture(scope="session")
+def client():
+    """TestClient over the app, without running the startup handlers."""
+    from fastapi.testclient import TestClient
+    from app import app
+
+    return TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def no_repeated_queries(request):
+    """Fail any test whose own statements repeat a shape (query_audit N+1 check)."""
+    from query_audit import audit_queries
+
+    with audit_queries(request.node.nodeid, mode="raise"):
+        yield
+
+
+@pytest.fixture(scope="session")
+def db_engine():
+    """The test database, migrated to the current schema."""
+    import migrations
+    from models import engine
+
+    migrations.upgrade(engine)
+    return engine
+
+
+def _make_user(role: str):
+    import uuid
+
+    from auth_utils import create_access_token
+    from models import SessionLocal, User, UserRole
+
+    with SessionLocal() as db:
+        user = User(role=UserRole(role), name=f"Test {role}", email=f"{uuid.uuid4().hex}@test.rentsure", city="Pune")
+        db.add(user)
+        db.commit()
+        token = create_access_token({"user_id": user.id, "role": role})
+        return user.id, {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def make_user(db_engine):
+    """Create a user with the given role; returns (user id, auth headers)."""
+    return _make_user
+
+
+@pytest.fixture
+def owner(make_user):
+    return make_user("owner")
+
+
+@pytest.fixture
+def tenant(make_user):
+    return make_user("tenant")
@@ -0,0 +1,68 @@
+"""PATCH /owner/properties: batch availability and rent updates."""
+import pytest
+from sqlalchemy import insert, select
+
+from models import Property, SessionLocal
+
+
+def add_properties(owner_id, count):
+    with SessionLocal() as db:
+        ids = db.scalars(
+            insert(Property).returning(Property.id),
+            [{"owner_id": owner_id, "title": f"P{i}", "city": "Pune", "rent": 8000, "availability": True} for i in range(count)],
+        ).all()
+        db.commit()
+    return ids
+
+
+def state(ids):
+    with SessionLocal() as db:
+        return dict((row.id, (row.availability, row.rent)) for row in db.execute(
+            select(Property.id, Property.availability, Property.rent).where(Property.id.in_(ids))
+        ))
+
+
+def test_updates_many_properties_in_one_request(client, owner):
+    owner_id, headers = owner
+    ids = add_properties(owner_id, 3)
+    response = client.patch("/owner/properties", headers=headers, json={"updates": [
+        {"id": ids[0], "availability": False},
+        {"id": ids[1], "rent": 9500},
+        {"id": ids[2], "availability": False, "rent": 7000},
+        {"id": ids[1], "rent": 9900},  # later entries win
+    ]})
+    assert response.status_code == 200
+    assert response.json() == {
+        "updated": 3, "availability_updated": 2, "rent_updated": 2, "message": "Properties updated",
+    }
+    assert state(ids) == {ids[0]: (False, 8000), ids[1]: (True, 9900), ids[2]: (False, 7000)}
+
+
+@pytest.mark.parametrize("updates, status", [
+    ([], 400),
+    ([{"id": 1}], 400),
+    ([{"id": 10**9, "rent": 1}], 404),
+])
+def test_rejects_empty_and_unknown_updates(client, owner, updates, status):
+    _owner_id, headers = owner
+    response = client.patch("/owner/properties", headers=headers, json={"updates": updates})
+    assert response.status_code == status
+
+
+def test_batch_with_another_owners_property_changes_nothing(client, owner, make_user):
+    owner_id, headers = owner
+    mine = add_properties(owner_id, 1)
+    other_id, _other_headers = make_user("owner")
+    theirs = add_properties(other_id, 1)
+    response = client.patch("/owner/properties", headers=headers, json={"updates": [
+        {"id": mine[0], "rent": 1}, {"id": theirs[0], "rent": 1},
+    ]})
+    assert response.status_code == 403
+    assert str(theirs[0]) in response.json()["detail"]
+    assert state(mine + theirs) == {mine[0]: (True, 8000), theirs[0]: (True, 8000)}
+
+
+def test_owner_only(client, tenant):
+    _tenant_id, headers = tenant
+    assert client.patch("/owner/properties", headers=headers, json={"updates": [{"id": 1, "rent": 1}]}).status_code == 403
+    assert client.patch("/owner/properties", json={"updates": [{"id": 1, "rent": 1}]}).status_code == 401
@@ -0,0 +1,90 @@
+"""Hot catalog reload: atomic swaps and the file watcher."""
+import os
+
+import pytest
+
+from catalog_reload import CatalogManager
+from catalog_store import write_catalog
+from rental_recommender import RentalProperty
+
+
+def publish(path, version, rent=9000):
+    write_catalog(path, {"testcity": [RentalProperty("T1", rent, 1.0, 80, 70)]}, {}, version)
+
+
+def publish_broken(path):
+    tmp_path = f"{path}.broken"
+    with open(tmp_path, "wb") as f:
+        f.write(b"not a catalog")
+    os.replace(tmp_path, path)
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = str(tmp_path / "catalog.bin")
+    publish(path, "v1")
+    return path
+
+
+def test_reload_swaps_in_new_version_and_keeps_old_store(path):
+    manager = CatalogManager(path)
+    old = manager.current
+    publish(path, "v2", rent=12000)
+
+    result = manager.reload()
+    assert result["status"] == "reloaded"
+    assert (result["previous_version"], result["catalog_version"]) == ("v1", "v2")
+    assert manager.current.catalog_version == "v2"
+    assert manager.current["testcity"][0].rent == 12000
+    # A request still holding the old store reads the old mapping
+    assert old["testcity"][0].rent == 9000
+
+
+def test_reload_runs_warmers_before_swap(path):
+    seen = []
+    manager = CatalogManager(path, warmers=[lambda store: seen.append((store.catalog_version, store.fully_loaded()))])
+    publish(path, "v2")
+    manager.reload()
+    assert seen == [("v2", True)]
+
+
+def test_failed_reload_keeps_current_version(path):
+    calls = []
+
+    def failing_warmer(store):
+        calls.append(store.catalog_version)
+        raise RuntimeError("warmup exploded")
+
+    manager = CatalogManager(path, warmers=[failing_warmer])
+    publish(path, "v2")
+    result = manager.reload()
+    assert result["status"] == "failed"
+    assert "warmup exploded" in result["error"]
+    assert manager.current.catalog_version == "v1"
+    assert manager.last_reload is result
+
+
+def test_watcher_skips_a_failed_file_until_it_changes(path):
+    manager = CatalogManager(path)
+    assert manager.check_for_update() is None
+
+    publish_broken(path)
+    assert manager.check_for_update()["status"] == "failed"
+    # Same broken file: no retry on later ticks
+    assert manager.check_for_update() is None
+    assert manager.check_for_update() is None
+    assert manager.current.catalog_version == "v1"
+
+    publish(path, "v3")
+    assert manager.check_for_update()["status"] == "reloaded"
+    assert manager.current.catalog_version == "v3"
+    assert manager.check_for_update() is None
+
+
+def test_rebuild_publishes_then_reloads(path, monkeypatch):
+    import catalog_build
+
+    monkeypatch.setattr(catalog_build, "build_catalog", lambda output_path: publish(output_path, "vrebuilt"))
+    manager = CatalogManager(path)
+    assert manager.reload(rebuild=True)["status"] == "reloaded"
+    assert manager.current.catalog_version == "vrebuilt"
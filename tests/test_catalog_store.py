@@ -0,0 +1,110 @@
+"""Packed catalog file: write, map and read back."""
+import pytest
+
+import catalog_build
+from catalog_build import DEFAULT_SOURCE_PATH, build_catalog, enrich_rentals, landmark_distance_km, load_source
+from catalog_store import CatalogFormatError, CatalogStore, write_catalog
+from geo_index import haversine_km
+from rental_recommender import RentalProperty
+
+
+@pytest.fixture(scope="module")
+def source():
+    rentals_by_city, city_meta, _digest = load_source(DEFAULT_SOURCE_PATH)
+    enrich_rentals(rentals_by_city, city_meta)
+    return rentals_by_city, city_meta
+
+
+@pytest.fixture
+def store(source, tmp_path):
+    rentals_by_city, city_meta = source
+    path = str(tmp_path / "catalog.bin")
+    write_catalog(path, rentals_by_city, city_meta, "vtest")
+    return CatalogStore(path, commute_path=str(tmp_path / "missing-commute.bin"))
+
+
+def test_round_trip_preserves_every_listing(source, store):
+    rentals_by_city, city_meta = source
+    assert store.catalog_version == "vtest"
+    assert store.city_meta == city_meta
+    assert sorted(store) == sorted(rentals_by_city)
+    for city, rentals in rentals_by_city.items():
+        assert list(store[city]) == rentals
+        assert list(store[city].rent) == [rental.rent for rental in rentals]
+
+
+def test_round_trip_keeps_missing_and_unicode_values(tmp_path):
+    rentals = [
+        RentalProperty("X1", 9000, 1.5, 80, 70, description="Près du campus ✓", tiffin_options=[{"name": "Dabba"}]),
+        RentalProperty("X2", 12000, 0.0, 0, 100, gender_preference=None, latitude=None, agreement_completed=False),
+    ]
+    path = str(tmp_path / "catalog.bin")
+    write_catalog(path, {"testcity": rentals}, {}, "vsmall")
+    assert list(CatalogStore(path)["testcity"]) == rentals
+
+
+def test_cities_are_mapped_on_first_use(store):
+    assert store.loaded_cities() == []
+    city = next(iter(store))
+    store[city]
+    assert store.loaded_cities() == [city]
+    assert not store.fully_loaded()
+    store.load_all()
+    assert store.fully_loaded()
+
+
+def test_lookups_by_id(source, store):
+    rentals_by_city, _city_meta = source
+    city, rentals = next(iter(rentals_by_city.items()))
+    rental = rentals[-1]
+    assert store.find_rental(f" {rental.property_id.lower()} ") == (city, rental)
+    assert store.find_rental("NOPE999") == (None, None)
+    assert store.find_owner(rental.owner_id)["name"] == rental.owner_name
+    assert store.find_owner("OWN-NONE-00") is None
+
+
+def test_rejects_missing_and_foreign_files(tmp_path):
+    with pytest.raises(CatalogFormatError):
+        CatalogStore(str(tmp_path / "nope.bin"))
+    other = tmp_path / "other.bin"
+    other.write_bytes(b"not a catalog at all")
+    with pytest.raises(CatalogFormatError):
+        CatalogStore(str(other))
+
+
+def test_indexes_are_built_on_first_use(store):
+    catalog = store[next(iter(store))]
+    assert not catalog.indexes_built()
+    assert catalog.geo_index() is catalog.geo_index()
+    assert catalog.facet_index() is catalog.facet_index()
+    assert catalog.indexes_built()
+    assert catalog.cluster_grid(12) is catalog.cluster_grid(12)
+
+
+def test_landmark_distances_come_from_coordinates(source):
+    rentals_by_city, city_meta = source
+    for city, rentals in rentals_by_city.items():
+        landmarks = city_meta[city]["landmarks"]
+        for rental in rentals:
+            college = landmarks[rental.nearby_college]
+            office = landmarks[rental.nearby_office_hub]
+            assert rental.college_distance_km == round(haversine_km(rental.latitude, rental.longitude, *college), 1)
+            assert rental.office_distance_km == round(haversine_km(rental.latitude, rental.longitude, *office), 1)
+    pune001 = next(rental for rental in rentals_by_city["pune"] if rental.property_id == "PUNE001")
+    assert (pune001.nearby_college, pune001.college_distance_km) == ("COEP", 1.2)
+
+
+def test_landmark_distance_is_unknown_without_positions():
+    landmarks = {"COEP": [18.5293, 73.8566]}
+    assert landmark_distance_km(RentalProperty("X1", 9000, 1.0, 80, 70, latitude=None), landmarks, "COEP") is None
+    located = RentalProperty("X2", 9000, 1.0, 80, 70, latitude=18.53, longitude=73.85)
+    assert landmark_distance_km(located, landmarks, "Unknown College") is None
+    assert landmark_distance_km(located, landmarks, None) is None
+
+
+def test_catalog_version_changes_with_enrichment(tmp_path, monkeypatch):
+    paths = (DEFAULT_SOURCE_PATH, str(tmp_path / "catalog.bin"), str(tmp_path / "commute.bin"))
+    version = build_catalog(*paths)
+    assert build_catalog(*paths) == version
+    monkeypatch.setattr(catalog_build, "ENRICHMENT_VERSION", catalog_build.ENRICHMENT_VERSION + 1)
+    assert build_catalog(*paths) != version
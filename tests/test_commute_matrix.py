@@ -0,0 +1,93 @@
+"""Commute matrix: build, memory-map and look up; listing commute_minutes."""
+import pytest
+
+import commute_matrix
+from catalog_build import DEFAULT_SOURCE_PATH, build_catalog
+from catalog_store import CatalogStore
+from commute_matrix import NO_ROUTE, CommuteMatrix, CommuteMatrixError, estimate_commute_minutes, write_commute_matrix
+from rental_recommender import RentalProperty
+
+LANDMARKS = {"COEP": [18.5293, 73.8567], "Hinjewadi IT Park": [18.587, 73.738]}
+RENTALS = {
+    "pune": [
+        RentalProperty("P1", 9000, 1.0, 80, 70, latitude=18.5329, longitude=73.8461),
+        RentalProperty("P2", 9000, 1.0, 80, 70, latitude=18.56, longitude=73.77),
+        RentalProperty("P3", 9000, 1.0, 80, 70, latitude=None, longitude=None),
+    ],
+    "nowhere": [RentalProperty("N1", 9000, 1.0, 80, 70, latitude=10.0, longitude=10.0)],
+}
+CITY_META = {"pune": {"landmarks": LANDMARKS}}
+
+
+@pytest.fixture
+def matrix_path(tmp_path):
+    path = str(tmp_path / "commute.bin")
+    write_commute_matrix(path, RENTALS, CITY_META, "vtest")
+    return path
+
+
+def test_lookup_matches_the_travel_model(matrix_path):
+    matrix = CommuteMatrix(matrix_path)
+    assert matrix.catalog_version == "vtest"
+    assert "pune" in matrix and "nowhere" not in matrix
+    commutes = matrix.city("pune")
+    assert commutes.destinations == list(LANDMARKS)
+    # Cells are COMMUTE_CELL_KM wide, so a lookup is within a cell's travel time of the exact value
+    tolerance = commute_matrix.COMMUTE_CELL_KM * commute_matrix.ROAD_DETOUR_FACTOR / commute_matrix.CITY_SPEED_KMH * 60
+    for rental in RENTALS["pune"][:2]:
+        for name, (lat, lon) in LANDMARKS.items():
+            exact = estimate_commute_minutes(rental.latitude, rental.longitude, lat, lon)
+            assert commutes.minutes(rental.latitude, rental.longitude, name) == pytest.approx(exact, abs=tolerance)
+
+
+def test_lookup_by_cell_and_column_agrees_with_lookup_by_name(matrix_path):
+    commutes = CommuteMatrix(matrix_path).city("pune")
+    cell = commutes.cell(18.5329, 73.8461)
+    column = commutes.destination("Hinjewadi IT Park")
+    assert commutes.minutes_from_cell(cell, column) == commutes.minutes(18.5329, 73.8461, "Hinjewadi IT Park")
+
+
+@pytest.mark.parametrize("lat, lon, destination", [
+    (None, None, "COEP"),
+    (float("nan"), 73.8, "COEP"),
+    (28.6, 77.2, "COEP"),
+    (18.5329, 73.8461, "Unknown College"),
+])
+def test_unknown_points_and_destinations(matrix_path, lat, lon, destination):
+    assert CommuteMatrix(matrix_path).city("pune").minutes(lat, lon, destination) is None
+
+
+def test_custom_travel_time_is_clamped_below_no_route(tmp_path):
+    path = str(tmp_path / "commute.bin")
+    write_commute_matrix(path, RENTALS, CITY_META, "vtest", travel_time=lambda *points: 10 ** 6)
+    assert CommuteMatrix(path).city("pune").minutes(18.5329, 73.8461, "COEP") == NO_ROUTE - 1
+
+
+def test_missing_or_foreign_file_is_rejected(tmp_path):
+    with pytest.raises(CommuteMatrixError):
+        CommuteMatrix(str(tmp_path / "missing.bin"))
+    foreign = tmp_path / "foreign.bin"
+    foreign.write_bytes(b"RSCAT" + b"\0" * 32)
+    with pytest.raises(CommuteMatrixError):
+        CommuteMatrix(str(foreign))
+
+
+def test_built_listings_take_commute_minutes_from_the_matrix(tmp_path):
+    catalog_path, commute_path = str(tmp_path / "catalog.bin"), str(tmp_path / "commute.bin")
+    build_catalog(DEFAULT_SOURCE_PATH, catalog_path, commute_path)
+    store = CatalogStore(catalog_path, commute_path=commute_path)
+    matrix = store.commute_matrix()
+    assert matrix is not None
+    for city in store:
+        commutes = matrix.city(city)
+        for rental in store[city]:
+            assert rental.commute_minutes == commutes.minutes(rental.latitude, rental.longitude, rental.nearby_college)
+
+
+def test_proximity_uses_matrix_minutes(client):
+    body = client.get("/proximity/PUNE001").json()
+    college, office = body["nearby_college"], body["nearby_office_hub"]
+    assert body["commute_minutes"] == body["commute_minutes_to"][college]
+    college_minutes, office_minutes = body["commute_minutes_to"][college], body["commute_minutes_to"][office]
+    assert body["proximity_score"] == round(max(0, 100 - (2 * college_minutes + office_minutes) / 3), 1)
+    assert body["best_for"] == ("college" if college_minutes <= office_minutes else "office")
@@ -0,0 +1,149 @@
+"""Streaming NDJSON/CSV exports and the owner export route."""
+import asyncio
+import csv
+import io
+import json
+
+import pytest
+from sqlalchemy import insert
+
+import exports
+from exports import OWNER_EXPORT_COLUMNS, encode_rows, iter_owner_properties
+from models import Property, SessionLocal
+
+ROWS = [
+    {"id": 1, "title": 'Room, "big"\nnear COEP', "rent": 9000, "tags": ["wifi", "ac"]},
+    {"id": 2, "title": "Plain", "rent": None, "tags": []},
+    {"id": 3, "title": "Café ₹", "rent": 12000, "tags": ["meals"]},
+]
+
+
+def parse_csv(text):
+    return list(csv.reader(io.StringIO(text, newline="")))
+
+
+def parse_ndjson(text):
+    return [json.loads(line) for line in text.splitlines()]
+
+
+def add_properties(owner_id, titles):
+    with SessionLocal() as db:
+        db.execute(insert(Property), [
+            {"owner_id": owner_id, "title": title, "description": "d", "city": "Pune", "rent": 8000 + i}
+            for i, title in enumerate(titles)
+        ])
+        db.commit()
+
+
+def asgi_get(path, headers):
+    """Run a GET through the app and return (status, headers, body chunks).
+
+    TestClient joins the body; calling the app directly shows each chunk.
+    """
+    from app import app
+
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    path, _, query = path.partition("?")
+    scope = {
+        "type": "http", "asgi": {"version": "3.0", "spec_version": "2.4"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "",
+        "query_string": query.encode(), "client": ("127.0.0.1", 50000), "server": ("testserver", 80),
+        "headers": [(name.lower().encode(), value.encode()) for name, value in headers.items()],
+    }
+    asyncio.run(app(scope, receive, send))
+    start = messages[0]
+    response_headers = {name.decode(): value.decode() for name, value in start["headers"]}
+    chunks = [message["body"] for message in messages[1:] if message["body"]]
+    return start["status"], response_headers, chunks
+
+
+def test_csv_rows_round_trip_with_quoting():
+    rows = parse_csv("".join(encode_rows(ROWS, "csv")))
+    assert rows[0] == ["id", "title", "rent", "tags"]
+    assert rows[1:] == [
+        ["1", 'Room, "big"\nnear COEP', "9000", '["wifi", "ac"]'],
+        ["2", "Plain", "", "[]"],
+        ["3", "Café ₹", "12000", '["meals"]'],
+    ]
+
+
+def test_csv_uses_the_given_columns():
+    rows = parse_csv("".join(encode_rows(ROWS, "csv", ("title", "missing"))))
+    assert rows == [["title", "missing"], ['Room, "big"\nnear COEP', ""], ["Plain", ""], ["Café ₹", ""]]
+
+
+def test_ndjson_rows_round_trip():
+    text = "".join(encode_rows(ROWS, "ndjson"))
+    assert text.endswith("\n")
+    assert parse_ndjson(text) == ROWS
+
+
+@pytest.mark.parametrize("fmt, fieldnames, expected", [
+    ("csv", ("id", "title"), "id,title\r\n"),
+    ("csv", None, ""),
+    ("ndjson", ("id", "title"), ""),
+])
+def test_zero_row_export(fmt, fieldnames, expected):
+    assert "".join(encode_rows([], fmt, fieldnames)) == expected
+
+
+@pytest.mark.parametrize("fmt", ["csv", "ndjson"])
+def test_output_is_chunked_by_row_count(monkeypatch, fmt):
+    monkeypatch.setattr(exports, "EXPORT_CHUNK_ROWS", 2)
+    rows = [{"id": i, "title": f"P{i}"} for i in range(5)]
+    chunks = list(encode_rows(iter(rows), fmt))
+    assert len(chunks) == 3
+    monkeypatch.setattr(exports, "EXPORT_CHUNK_ROWS", 1000)
+    assert "".join(chunks) == "".join(encode_rows(rows, fmt))
+
+
+def test_iter_owner_properties_yields_only_that_owner(make_user):
+    owner_id, _ = make_user("owner")
+    other_id, _ = make_user("owner")
+    add_properties(owner_id, ["First", "Second"])
+    add_properties(other_id, ["Not mine"])
+    records = list(iter_owner_properties(owner_id))
+    assert [record["title"] for record in records] == ["First", "Second"]
+    assert set(records[0]) == set(OWNER_EXPORT_COLUMNS)
+    assert isinstance(records[0]["created_at"], str)
+
+
+@pytest.mark.parametrize("fmt", ["csv", "ndjson"])
+def test_export_route_streams_the_owner_portfolio(owner, monkeypatch, fmt):
+    owner_id, headers = owner
+    monkeypatch.setattr(exports, "EXPORT_CHUNK_ROWS", 2)
+    titles = ['Room, "big"', "B", "C", "D", "E"]
+    add_properties(owner_id, titles)
+    status, response_headers, chunks = asgi_get(f"/owner/properties/export?format={fmt}", headers)
+    assert status == 200
+    assert response_headers["content-disposition"] == f'attachment; filename="properties.{fmt}"'
+    assert "content-length" not in response_headers
+    # Two rows per chunk: the body arrives as three separate messages
+    assert len(chunks) == 3
+    text = b"".join(chunks).decode()
+    if fmt == "csv":
+        rows = parse_csv(text)
+        assert rows[0] == list(OWNER_EXPORT_COLUMNS)
+        assert [row[1] for row in rows[1:]] == titles
+    else:
+        assert [record["title"] for record in parse_ndjson(text)] == titles
+
+
+def test_export_route_with_no_properties(client, owner):
+    _owner_id, headers = owner
+    response = client.get("/owner/properties/export?format=csv", headers=headers)
+    assert response.status_code == 200
+    assert response.text == ",".join(OWNER_EXPORT_COLUMNS) + "\r\n"
+    assert client.get("/owner/properties/export", headers=headers).text == ""
+
+
+def test_export_route_checks_role_and_format(client, owner, tenant):
+    assert client.get("/owner/properties/export", headers=tenant[1]).status_code == 403
+    assert client.get("/owner/properties/export?format=xml", headers=owner[1]).status_code == 400
@@ -0,0 +1,123 @@
+"""Facet bitmaps, masks and counts against brute-force answers."""
+import random
+
+import pytest
+
+from catalog_store import CatalogStore, IndexedCatalog, write_catalog
+from facets import (
+    FACET_FIELDS, RENT_BUCKET_EDGES, facet_key, iter_rows, normalize_filters, rent_bucket_labels, row_test
+)
+from rental_recommender import RentalProperty
+
+N = 300
+
+
+def make_rentals():
+    rng = random.Random(5)
+    methods = ["UPI", "Cash", "Bank Transfer"]
+    return [
+        RentalProperty(
+            f"F{i:03d}", rng.randrange(5000, 30000, 500), 1.0, 70, 70,
+            gender_preference=rng.choice(["male", "female", "any", None]),
+            availability_status=rng.choice(["available", "limited", "occupied"]),
+            is_direct_owner=rng.random() < 0.6,
+            payment_methods=rng.sample(methods, rng.randint(0, 3)) or None,
+            city_zone=rng.choice(["North", "South", "Central"]),
+        )
+        for i in range(N)
+    ]
+
+
+@pytest.fixture(scope="module")
+def rentals():
+    return make_rentals()
+
+
+@pytest.fixture(scope="module", params=["objects", "mapped"])
+def catalog(request, rentals, tmp_path_factory):
+    if request.param == "objects":
+        return IndexedCatalog.from_rentals(rentals)
+    path = str(tmp_path_factory.mktemp("facets") / "catalog.bin")
+    write_catalog(path, {"testcity": rentals}, {}, "vfacets")
+    return CatalogStore(path)["testcity"]
+
+
+def field_keys(rental, field):
+    value = getattr(rental, field)
+    if value is None:
+        return set()
+    return {facet_key(item) for item in (value if isinstance(value, list) else [value])}
+
+
+def brute_rows(rentals, filters, min_rent=None, max_rent=None, skip=None):
+    rows = []
+    for i, rental in enumerate(rentals):
+        if min_rent is not None and rental.rent < min_rent or max_rent is not None and rental.rent > max_rent:
+            continue
+        if all(
+            {key.lower() for key in field_keys(rental, field)} & set(values)
+            for field, values in filters if field != skip
+        ):
+            rows.append(i)
+    return rows
+
+
+FILTER_CASES = [
+    ({}, None, None),
+    ({"gender_preference": ["Female"]}, None, None),
+    ({"gender_preference": ["male", "any"], "is_direct_owner": [True]}, None, 15000),
+    ({"payment_methods": ["upi", "cash"], "city_zone": ["north"]}, 8000, None),
+    ({"availability_status": ["available"], "payment_methods": ["Bank Transfer"]}, 9000, 21000),
+    ({"city_zone": ["nowhere"]}, None, None),
+]
+
+
+@pytest.mark.parametrize("selections, min_rent, max_rent", FILTER_CASES)
+def test_mask_matches_brute_force(catalog, rentals, selections, min_rent, max_rent):
+    index = catalog.facet_index()
+    filters = normalize_filters(selections)
+    mask = index.mask(filters, index.rent_mask(min_rent, max_rent))
+    assert list(iter_rows(mask)) == brute_rows(rentals, filters, min_rent, max_rent)
+
+
+@pytest.mark.parametrize("selections, min_rent, max_rent", FILTER_CASES)
+def test_counts_ignore_own_facet(catalog, rentals, selections, min_rent, max_rent):
+    index = catalog.facet_index()
+    filters = normalize_filters(selections)
+    counts = index.counts(filters, index.rent_mask(min_rent, max_rent))
+
+    for field in FACET_FIELDS:
+        expected = {key: 0 for rental in rentals for key in field_keys(rental, field)}
+        for i in brute_rows(rentals, filters, min_rent, max_rent, skip=field):
+            for key in field_keys(rentals[i], field):
+                expected[key] += 1
+        assert counts[field] == dict(sorted(expected.items()))
+
+    edges = (0,) + RENT_BUCKET_EDGES
+    expected_rent = dict.fromkeys(rent_bucket_labels(), 0)
+    for i in brute_rows(rentals, filters):
+        bucket = sum(rentals[i].rent >= edge for edge in edges[1:])
+        expected_rent[rent_bucket_labels()[bucket]] += 1
+    assert counts["rent"] == expected_rent
+
+
+@pytest.mark.parametrize("min_rent, max_rent", [(None, 8000), (8000, 8000), (7999, 12001), (26000, None), (40000, None)])
+def test_rent_mask_at_bucket_edges(catalog, rentals, min_rent, max_rent):
+    index = catalog.facet_index()
+    assert list(iter_rows(index.rent_mask(min_rent, max_rent))) == brute_rows(rentals, (), min_rent, max_rent)
+
+
+def test_normalize_filters_is_order_and_case_independent():
+    assert normalize_filters({"city_zone": ["South", "north", "south"], "is_direct_owner": [False]}) == (
+        ("is_direct_owner", ("false",)),
+        ("city_zone", ("north", "south")),
+    )
+    assert normalize_filters({"city_zone": [], "unknown": ["x"]}) == ()
+
+
+def test_iter_rows_and_row_test():
+    mask = (1 << 0) | (1 << 9) | (1 << 64)
+    assert list(iter_rows(mask)) == [0, 9, 64]
+    assert list(iter_rows(0)) == []
+    member = row_test(mask)
+    assert [i for i in range(100) if member(i)] == [0, 9, 64]
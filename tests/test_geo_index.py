@@ -0,0 +1,118 @@
+"""GeoIndex queries against brute-force answers."""
+import math
+import random
+import statistics
+import time
+
+import pytest
+
+from geo_index import CLUSTER_CELLS_PER_TILE, ClusterGrid, GeoIndex, cluster_cell_degrees, haversine_km
+
+N = 2000
+
+
+@pytest.fixture(scope="module")
+def points():
+    rng = random.Random(7)
+    lat = [18.4 + rng.random() * 0.3 for _ in range(N)]
+    lon = [73.7 + rng.random() * 0.3 for _ in range(N)]
+    lat[3] = math.nan  # unlocated rows are not indexed
+    return lat, lon
+
+
+@pytest.fixture(scope="module")
+def index(points):
+    return GeoIndex(*points)
+
+
+def brute_nearest(points, lat, lon, k):
+    lats, lons = points
+    hits = sorted(
+        (haversine_km(lat, lon, lats[i], lons[i]), i) for i in range(N) if lats[i] == lats[i]
+    )
+    return [i for _distance, i in hits[:k]]
+
+
+def query_points():
+    rng = random.Random(11)
+    local = [(18.55 + rng.uniform(-1.5, 1.5), 73.85 + rng.uniform(-1.5, 1.5)) for _ in range(150)]
+    far = [(rng.uniform(-85, 85), rng.uniform(-180, 180)) for _ in range(30)]
+    fixed = [(18.55, 73.85), (28.6, 77.2), (0.0, 0.0), (-89.0, -179.0), (89.0, 0.0)]
+    return fixed + local + far
+
+
+def test_index_skips_rows_without_coordinates(index):
+    assert len(index) == N - 1
+
+
+@pytest.mark.parametrize("k", [1, 5, 25])
+def test_nearest_matches_brute_force(points, index, k):
+    for lat, lon in query_points():
+        assert [i for i, _d in index.nearest(lat, lon, k)] == brute_nearest(points, lat, lon, k), (lat, lon)
+
+
+def test_nearest_far_from_city_is_fast(index):
+    started = time.perf_counter()
+    for lat, lon in [(0.0, 0.0), (28.6, 77.2), (-60.0, -120.0)]:
+        assert len(index.nearest(lat, lon, 10)) == 10
+    assert time.perf_counter() - started < 1.0
+
+
+def test_nearest_edge_cases(index):
+    assert index.nearest(18.5, 73.8, 0) == []
+    assert GeoIndex([], []).nearest(18.5, 73.8, 3) == []
+    assert len(index.nearest(18.5, 73.8, N + 10)) == N - 1
+
+
+@pytest.mark.parametrize("radius_km", [0.0, 0.5, 2.0, 10.0, math.inf])
+def test_within_matches_brute_force(points, index, radius_km):
+    lats, lons = points
+    for lat, lon in query_points()[:40]:
+        expected = sorted(
+            i for i in range(N)
+            if lats[i] == lats[i] and haversine_km(lat, lon, lats[i], lons[i]) <= radius_km
+        )
+        assert sorted(i for i, _d in index.within(lat, lon, radius_km)) == expected
+
+
+def test_in_bbox_matches_brute_force(points, index):
+    lats, lons = points
+    south, west, north, east = 18.45, 73.75, 18.6, 73.9
+    expected = [
+        i for i in range(N)
+        if lats[i] == lats[i] and south <= lats[i] <= north and west <= lons[i] <= east
+    ]
+    assert index.in_bbox(south, west, north, east) == expected
+
+
+def test_cluster_cell_halves_with_each_zoom_level():
+    for zoom in range(0, 22):
+        assert cluster_cell_degrees(zoom + 1) == pytest.approx(cluster_cell_degrees(zoom) / 2)
+    assert cluster_cell_degrees(0) == pytest.approx(360.0 / CLUSTER_CELLS_PER_TILE)
+
+
+def test_cluster_grid_aggregates_each_cell():
+    lats = [18.501, 18.502, 18.503, 18.9, math.nan]
+    lons = [73.801, 73.802, 73.803, 73.9, 73.8]
+    grid = ClusterGrid(lats, lons, [8000, 9000, 20000, 5000, 1], [60, 70, 80, 90, 0], lon_step=0.05)
+    clusters = grid.in_bbox(18.0, 73.0, 19.0, 74.0)
+    assert [cluster["count"] for cluster in clusters] == [3, 1]
+    assert clusters[0]["median_rent"] == 9000
+    assert clusters[0]["avg_safety_score"] == 70.0
+    assert (clusters[0]["lat"], clusters[0]["lon"]) == (18.502, 73.802)
+    bounds = clusters[0]["bounds"]
+    assert bounds["east"] - bounds["west"] == pytest.approx(0.05, abs=1e-5)
+    # Square on the map: the cell's latitude span shrinks with cos(latitude)
+    assert bounds["north"] - bounds["south"] == pytest.approx(0.05 * math.cos(math.radians(statistics.fmean(lats[:4]))), abs=1e-5)
+
+
+def test_cluster_cells_do_not_move_with_the_viewport(points):
+    lats, lons = points
+    grid = ClusterGrid(lats, lons, [1000] * N, [50] * N, lon_step=cluster_cell_degrees(12))
+    everything = {(c["bounds"]["south"], c["bounds"]["west"]): c for c in grid.in_bbox(18.0, 73.0, 19.0, 75.0)}
+    assert sum(c["count"] for c in everything.values()) == N - 1
+    panned = grid.in_bbox(18.5, 73.8, 18.6, 73.9)
+    assert panned
+    for cluster in panned:
+        assert everything[(cluster["bounds"]["south"], cluster["bounds"]["west"])] == cluster
+    assert grid.in_bbox(-10.0, -10.0, -9.0, -9.0) == []
@@ -0,0 +1,67 @@
+"""/map: listings vs clusters, per-zoom cluster cells and bbox validation."""
+import pytest
+
+import app as app_module
+from geo_index import cluster_cell_degrees
+
+PUNE = {"south": 18.4, "west": 73.7, "north": 18.7, "east": 74.0}
+
+
+def get_map(client, zoom, **bbox):
+    return client.get("/map", params={**PUNE, **bbox, "zoom": zoom, "city": "pune"})
+
+
+def test_listings_up_to_max_markers_then_clusters(client, monkeypatch):
+    zoom = app_module.MAP_LISTINGS_MIN_ZOOM
+    listed = get_map(client, zoom).json()
+    assert listed["mode"] == "listings"
+    total = listed["total"]
+    assert total == len(listed["listings"]) > 1
+
+    monkeypatch.setattr(app_module, "MAP_MAX_MARKERS", total)
+    assert get_map(client, zoom).json()["mode"] == "listings"
+    monkeypatch.setattr(app_module, "MAP_MAX_MARKERS", total - 1)
+    clustered = get_map(client, zoom).json()
+    assert clustered["mode"] == "clusters"
+    assert clustered["total"] == total
+
+
+def test_zoomed_out_views_are_clustered(client):
+    body = get_map(client, app_module.MAP_LISTINGS_MIN_ZOOM - 1).json()
+    listed = get_map(client, app_module.MAP_LISTINGS_MIN_ZOOM).json()
+    assert body["mode"] == "clusters"
+    assert body["total"] == listed["total"]
+    assert all(cluster["city"] == "Pune" for cluster in body["clusters"])
+
+
+@pytest.mark.parametrize("zoom", [8, 11, 14])
+def test_cluster_cells_follow_the_zoom(client, zoom):
+    clusters = get_map(client, zoom).json()["clusters"]
+    assert clusters
+    for cluster in clusters:
+        bounds = cluster["bounds"]
+        assert bounds["east"] - bounds["west"] == pytest.approx(cluster_cell_degrees(zoom), abs=2e-5)
+        assert bounds["south"] - 1e-5 <= cluster["lat"] <= bounds["north"] + 1e-5
+        assert bounds["west"] - 1e-5 <= cluster["lon"] <= bounds["east"] + 1e-5
+
+
+def test_zoom_is_clamped(client):
+    assert get_map(client, 40).json()["zoom"] == 22
+    assert get_map(client, -3).json()["zoom"] == 0
+
+
+@pytest.mark.parametrize("bbox", [
+    {"south": 18.7, "north": 18.4},
+    {"west": 74.0, "east": 73.7},
+    {"south": 18.5, "north": 18.5},
+    {"south": "nan"},
+    {"east": "nan"},
+    {"south": "-inf", "north": "inf"},
+])
+def test_invalid_bbox_is_rejected(client, bbox):
+    response = get_map(client, 12, **bbox)
+    assert response.status_code == 400
+
+
+def test_unknown_city_is_404(client):
+    assert client.get("/map", params={**PUNE, "city": "atlantis"}).status_code == 404
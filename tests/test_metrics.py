@@ -0,0 +1,63 @@
+"""Metric rendering and the SQLAlchemy statement hooks."""
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+import metrics
+
+
+@pytest.fixture
+def engine():
+    metrics.instrument_sqlalchemy()
+    engine = create_engine("sqlite://")
+    yield engine
+    engine.dispose()
+
+
+def test_counter_renders_labels():
+    counter = metrics.Counter("test_things_total", "Things.", ("kind",))
+    counter.inc("a")
+    counter.inc("a", amount=2)
+    assert 'test_things_total{kind="a"} 3' in counter.render()
+
+
+def test_failed_statements_do_not_leak_start_times(engine):
+    with engine.connect() as conn:
+        for _ in range(3):
+            with pytest.raises(OperationalError):
+                conn.execute(text("SELECT * FROM missing_table"))
+        assert conn.info["rentsure_query_start"] == []
+        conn.execute(text("SELECT 1"))
+        assert conn.info["rentsure_query_start"] == []
+
+
+def test_statements_are_counted_per_block_and_enclosing_block(engine):
+    with metrics.track_queries("outer") as outer:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            with metrics.track_queries("inner") as inner:
+                conn.execute(text("SELECT 2"))
+                assert metrics.current_queries() is inner
+    assert (inner.count, outer.count) == (1, 2)
+    assert outer.seconds >= inner.seconds > 0
+
+
+def test_statement_listeners_see_results_and_errors(engine):
+    seen = []
+    listener = metrics.StatementListener(
+        before=lambda conn, cursor, statement, context: seen.append(("before", statement)),
+        after=lambda conn, cursor, statement, context, elapsed: seen.append(("after", statement)),
+        error=lambda exception_context: seen.append(("error", exception_context.statement)),
+    )
+    metrics.add_statement_listener(listener)
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            with pytest.raises(OperationalError):
+                conn.execute(text("SELECT * FROM missing_table"))
+    finally:
+        metrics._statement_listeners.remove(listener)
+    assert seen == [
+        ("before", "SELECT 1"), ("after", "SELECT 1"),
+        ("before", "SELECT * FROM missing_table"), ("error", "SELECT * FROM missing_table"),
+    ]
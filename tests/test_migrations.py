@@ -0,0 +1,105 @@
+"""Schema migrations on fresh and pre-existing databases."""
+import threading
+
+import pytest
+from sqlalchemy import create_engine, inspect
+
+import migrations
+from models import Base
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'migrate.db'}")
+    yield engine
+    engine.dispose()
+
+
+def schema(engine):
+    inspector = inspect(engine)
+    return {
+        table: (
+            {column["name"] for column in inspector.get_columns(table)},
+            {index["name"] for index in inspector.get_indexes(table)},
+        )
+        for table in Base.metadata.tables
+    }
+
+
+def test_upgrade_fresh_database_matches_models(engine, tmp_path):
+    applied = migrations.upgrade(engine)
+    assert [m.version for m in applied] == [m.version for m in migrations.MIGRATIONS]
+    assert migrations.pending_migrations(engine) == []
+    assert migrations.upgrade(engine) == []
+
+    reference = create_engine(f"sqlite:///{tmp_path / 'models.db'}")
+    Base.metadata.create_all(reference)
+    assert schema(engine) == schema(reference)
+    reference.dispose()
+
+
+def test_upgrade_adds_address_to_old_databases(engine):
+    with engine.begin() as conn:
+        conn.exec_driver_sql("CREATE TABLE properties (id INTEGER PRIMARY KEY, title VARCHAR)")
+    migrations.upgrade(engine)
+    columns = {column["name"] for column in inspect(engine).get_columns("properties")}
+    assert {"id", "title", "address"} <= columns
+
+
+@pytest.mark.parametrize("value, url, expected", [
+    (None, "sqlite:///./rentsure.db", True),
+    (None, "postgresql://db/rentsure", False),
+    ("0", "sqlite:///./rentsure.db", False),
+    ("1", "postgresql://db/rentsure", True),
+])
+def test_auto_migrate_defaults_on_for_sqlite(monkeypatch, value, url, expected):
+    if value is None:
+        monkeypatch.delenv("RENTSURE_AUTO_MIGRATE", raising=False)
+    else:
+        monkeypatch.setenv("RENTSURE_AUTO_MIGRATE", value)
+    assert migrations.auto_migrate_enabled(url) is expected
+
+
+def test_concurrent_upgrades_apply_each_migration_once(tmp_path):
+    path = tmp_path / "concurrent.db"
+    workers = 6
+    barrier = threading.Barrier(workers)
+    results, errors = [], []
+
+    def start_worker():
+        # One engine per worker, like separate gunicorn processes
+        engine = create_engine(f"sqlite:///{path}", connect_args={"timeout": 30})
+        try:
+            barrier.wait()
+            results.append([m.version for m in migrations.upgrade(engine)])
+        except Exception as exc:  # collected and asserted below
+            errors.append(exc)
+        finally:
+            engine.dispose()
+
+    threads = [threading.Thread(target=start_worker) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert sorted(results) == [[]] * (workers - 1) + [[m.version for m in migrations.MIGRATIONS]]
+    engine = create_engine(f"sqlite:///{path}")
+    assert migrations.pending_migrations(engine) == []
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("SELECT COUNT(*) FROM schema_migrations").scalar() == len(migrations.MIGRATIONS)
+    engine.dispose()
+
+
+def test_failed_migration_leaves_database_unchanged(engine, monkeypatch):
+    def broken(conn):
+        conn.exec_driver_sql("CREATE TABLE half_done (id INTEGER)")
+        raise RuntimeError("migration failed")
+
+    monkeypatch.setattr(migrations, "MIGRATIONS", migrations.MIGRATIONS + [migrations.Migration(99, "broken", broken)])
+    with pytest.raises(RuntimeError):
+        migrations.upgrade(engine)
+    assert not inspect(engine).has_table("half_done")
+    assert not inspect(engine).has_table("users")
+    assert [m.version for m in migrations.pending_migrations(engine)] == [1, 2, 99]
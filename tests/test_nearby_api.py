@@ -0,0 +1,27 @@
+"""/nearby and /search geo parameter handling."""
+import pytest
+
+
+@pytest.mark.parametrize("query", [
+    "lat=nan&lon=73.8",
+    "lat=18.5&lon=inf",
+    "lat=100&lon=73.8",
+    "lat=18.5&lon=73.8&radius_km=nan",
+    "lat=18.5&lon=73.8&radius_km=-1",
+])
+def test_nearby_rejects_unusable_points(client, query):
+    response = client.get(f"/nearby?city=pune&{query}")
+    assert response.status_code == 400
+    assert "error" in response.json()
+
+
+def test_nearby_far_point_returns_closest_listings(client):
+    response = client.get("/nearby?city=pune&lat=0&lon=0&k=3")
+    assert response.status_code == 200
+    distances = [row["near_distance_km"] for row in response.json()["results"]]
+    assert len(distances) == 3 and distances == sorted(distances)
+
+
+def test_search_rejects_non_finite_radius(client):
+    response = client.get("/search?city=pune&near=MIT-WPU&radius_km=nan")
+    assert response.status_code == 400
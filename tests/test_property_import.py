@@ -0,0 +1,162 @@
+"""Bulk property import: parsing, validation, batching and the upload route."""
+import io
+import json
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+
+import property_import
+from models import Property, SessionLocal
+from property_import import detect_format, import_properties
+
+VALID = {"title": "Room near VNIT", "description": "Furnished", "city": "Nagpur", "rent": 9000}
+
+
+def ndjson(*records):
+    return "\n".join(r if isinstance(r, str) else json.dumps(r) for r in records).encode()
+
+
+def run_import(owner_id, data, fmt):
+    with SessionLocal() as db:
+        return import_properties(db, owner_id, io.BytesIO(data), fmt)
+
+
+def owned_properties(owner_id):
+    with SessionLocal() as db:
+        return db.execute(
+            select(Property.title, Property.rent, Property.availability).where(Property.owner_id == owner_id).order_by(Property.id)
+        ).all()
+
+
+@pytest.mark.parametrize("filename, content_type, expected", [
+    ("props.CSV", None, "csv"),
+    ("props.jsonl", None, "ndjson"),
+    ("upload", "text/csv", "csv"),
+    ("upload", "application/x-ndjson", "ndjson"),
+    ("props.xlsx", "application/octet-stream", None),
+])
+def test_detect_format(filename, content_type, expected):
+    assert detect_format(filename, content_type) == expected
+
+
+def test_ndjson_import_reports_bad_rows_by_line(owner):
+    owner_id, _headers = owner
+    data = ndjson(VALID, "{not json", "", [1, 2], {**VALID, "rent": "lots"}, {**VALID, "title": "Second"})
+    result = run_import(owner_id, data, "ndjson")
+    assert (result["imported"], result["failed"], result["errors_truncated"]) == (2, 3, False)
+    assert [error["line"] for error in result["errors"]] == [2, 4, 5]
+    assert result["errors"][0]["errors"][0]["message"].startswith("Invalid JSON")
+    assert result["errors"][2]["errors"][0]["field"] == "rent"
+    assert [row.title for row in owned_properties(owner_id)] == ["Room near VNIT", "Second"]
+
+
+def test_csv_import_uses_schema_defaults_for_blank_cells(owner):
+    owner_id, _headers = owner
+    data = "﻿title,description,city,rent,availability\nA,d,Pune,8000,\nB,d,Pune,,false\n".encode()
+    result = run_import(owner_id, data, "csv")
+    assert (result["imported"], result["failed"]) == (1, 1)
+    assert result["errors"][0]["line"] == 3
+    assert owned_properties(owner_id) == [("A", 8000, True)]
+
+
+def test_import_commits_in_batches(owner, monkeypatch):
+    owner_id, _headers = owner
+    monkeypatch.setattr(property_import, "IMPORT_BATCH_SIZE", 2)
+    result = run_import(owner_id, ndjson(*({**VALID, "title": f"P{i}"} for i in range(5))), "ndjson")
+    assert result["imported"] == 5
+    assert len(owned_properties(owner_id)) == 5
+
+
+def test_invalid_utf8_stops_import_but_keeps_committed_batches(owner, monkeypatch):
+    owner_id, _headers = owner
+    monkeypatch.setattr(property_import, "IMPORT_BATCH_SIZE", 10)
+    # Decoding runs a chunk ahead of parsing, so put the bad byte past the first chunk
+    good = ndjson(*([VALID] * 300))
+    result = run_import(owner_id, good + b'\n{"title": "\xff"}\n' + ndjson(VALID), "ndjson")
+    assert 0 < result["imported"] < 300
+    assert len(owned_properties(owner_id)) == result["imported"]
+    assert result["errors"][-1] == {"line": None, "errors": [{"field": "file", "message": "File is not valid UTF-8; import stopped"}]}
+
+
+def test_reported_errors_are_capped(owner, monkeypatch):
+    owner_id, _headers = owner
+    monkeypatch.setattr(property_import, "MAX_REPORTED_ERRORS", 3)
+    result = run_import(owner_id, ndjson(*(["[]"] * 10)), "ndjson")
+    assert (result["failed"], len(result["errors"]), result["errors_truncated"]) == (10, 3, True)
+
+
+# ============================================================================
+# POST /owner/properties/import
+# ============================================================================
+
+def test_upload_route_imports_for_the_token_owner(client, owner):
+    owner_id, headers = owner
+    response = client.post(
+        "/owner/properties/import",
+        files={"file": ("props.ndjson", ndjson(VALID, "[]"), "application/x-ndjson")},
+        headers=headers,
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["imported"], body["failed"]) == (1, 1)
+    assert body["message"] == "Imported 1 properties, 1 rows rejected"
+    assert len(owned_properties(owner_id)) == 1
+
+
+def test_upload_route_rejects_unknown_format(client, owner):
+    _owner_id, headers = owner
+    response = client.post("/owner/properties/import", files={"file": ("props.xlsx", b"x")}, headers=headers)
+    assert response.status_code == 400
+
+
+def test_upload_route_is_owner_only(client, tenant):
+    _tenant_id, headers = tenant
+    response = client.post("/owner/properties/import", files={"file": ("props.csv", b"title\n")}, headers=headers)
+    assert response.status_code == 403
+    assert client.post("/owner/properties/import", files={"file": ("props.csv", b"title\n")}).status_code == 401
+
+
+def test_property_count_is_unchanged_by_rejected_upload(client, owner):
+    _owner_id, headers = owner
+    with SessionLocal() as db:
+        before = db.scalar(select(func.count(Property.id)))
+    client.post("/owner/properties/import", files={"file": ("p.ndjson", ndjson("[]", "{bad"))}, headers=headers)
+    with SessionLocal() as db:
+        assert db.scalar(select(func.count(Property.id))) == before
+
+
+def test_rejected_batch_is_rolled_back_and_reported(owner, monkeypatch):
+    owner_id, _headers = owner
+    monkeypatch.setattr(property_import, "IMPORT_BATCH_SIZE", 2)
+    data = ndjson(*({**VALID, "title": title} for title in ("A", "B", "C", "Broken", "E")))
+    with SessionLocal() as db:
+        execute = db.execute
+
+        def rejecting_execute(statement, params=None, *args, **kwargs):
+            if isinstance(params, list) and any(row["title"] == "Broken" for row in params):
+                execute(statement, params, *args, **kwargs)
+                raise IntegrityError("INSERT INTO properties", params, Exception("CHECK constraint failed"))
+            return execute(statement, params, *args, **kwargs)
+
+        monkeypatch.setattr(db, "execute", rejecting_execute)
+        result = import_properties(db, owner_id, io.BytesIO(data), "ndjson")
+    assert (result["imported"], result["failed"]) == (3, 2)
+    assert result["errors"] == [{"line": 3, "errors": [{
+        "field": "batch", "message": "Rows on lines 3-4 were not imported: CHECK constraint failed",
+    }]}]
+    # The rejected batch's rows were rolled back; later batches still commit
+    assert [row.title for row in owned_properties(owner_id)] == ["A", "B", "E"]
+
+
+def test_rejected_batches_count_towards_the_error_cap(owner, monkeypatch):
+    owner_id, _headers = owner
+    monkeypatch.setattr(property_import, "IMPORT_BATCH_SIZE", 1)
+    monkeypatch.setattr(property_import, "MAX_REPORTED_ERRORS", 3)
+    with SessionLocal() as db:
+        def rejecting_execute(statement, params=None, *args, **kwargs):
+            raise IntegrityError("INSERT INTO properties", params, Exception("FOREIGN KEY constraint failed"))
+
+        monkeypatch.setattr(db, "execute", rejecting_execute)
+        result = import_properties(db, owner_id, io.BytesIO(ndjson(*([VALID] * 5))), "ndjson")
+    assert (result["imported"], result["failed"], len(result["errors"]), result["errors_truncated"]) == (0, 5, 3, True)
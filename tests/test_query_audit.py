@@ -0,0 +1,63 @@
+"""Statement shapes and N+1 detection."""
+import pytest
+from sqlalchemy import create_engine, text
+
+import query_audit
+from query_audit import RepeatedQueryError, audit_queries, statement_shape
+
+
+@pytest.fixture
+def engine():
+    query_audit.instrument_sqlalchemy()
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE rooms (id INTEGER PRIMARY KEY, city VARCHAR)"))
+    yield engine
+    engine.dispose()
+
+
+def test_statement_shape_collapses_literals_and_in_lists():
+    assert statement_shape("SELECT * FROM rooms WHERE id = 7 AND city = 'Pune'") == (
+        "SELECT * FROM rooms WHERE id = ? AND city = ?"
+    )
+    assert statement_shape("SELECT * FROM rooms WHERE id IN (?, ?,  ?)") == "SELECT * FROM rooms WHERE id IN (?...)"
+    assert statement_shape("SELECT t1.id FROM rooms AS t1") == "SELECT t1.id FROM rooms AS t1"
+
+
+def test_repeated_shape_raises_past_threshold(engine):
+    with engine.connect() as conn:
+        with audit_queries("per-row lookups", mode="raise", threshold=3) as audit:
+            for room_id in range(3):
+                conn.execute(text(f"SELECT city FROM rooms WHERE id = {room_id}"))
+            with pytest.raises(RepeatedQueryError, match="per-row lookups"):
+                conn.execute(text("SELECT city FROM rooms WHERE id = 99"))
+    assert audit.total == 3
+
+
+def test_inserts_and_distinct_shapes_are_not_flagged(engine):
+    with engine.begin() as conn:
+        with audit_queries(mode="raise", threshold=2) as audit:
+            for room_id in range(5):
+                conn.execute(text("INSERT INTO rooms (id, city) VALUES (:id, 'Pune')"), {"id": room_id})
+            conn.execute(text("SELECT COUNT(*) FROM rooms"))
+            conn.execute(text("SELECT city FROM rooms WHERE id IN (1, 2, 3)"))
+    assert audit.total == 7
+    assert audit.summary()["repeated"] == {}
+
+
+def test_warn_mode_reports_each_shape_once(engine, capsys):
+    before = query_audit.REPEATED_QUERY_REQUESTS._values.get(("warned block",), 0)
+    with engine.connect() as conn:
+        with audit_queries("warned block", mode="warn", threshold=1) as audit:
+            for room_id in range(4):
+                conn.execute(text(f"SELECT city FROM rooms WHERE id = {room_id}"))
+    assert capsys.readouterr().out.count("Possible N+1 in warned block") == 1
+    assert list(audit.summary()["repeated"].values()) == [4]
+    assert query_audit.REPEATED_QUERY_REQUESTS._values[("warned block",)] == before + 1
+
+
+def test_requests_are_audited_under_their_route(client, monkeypatch, capsys):
+    monkeypatch.setattr(query_audit, "REPEATED_QUERY_MODE", "warn")
+    monkeypatch.setattr(query_audit, "REPEATED_QUERY_THRESHOLD", 0)
+    client.get("/owner/1")
+    assert "Possible N+1 in GET /owner/{owner_id}" in capsys.readouterr().out
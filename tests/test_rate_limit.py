@@ -0,0 +1,201 @@
+"""Token buckets, route budgets, client keys and the 429 middleware."""
+import asyncio
+import json
+import sqlite3
+
+import pytest
+
+import rate_limit
+from rate_limit import (
+    EXPORT_BUDGET,
+    LOGIN_BUDGET,
+    REGISTER_BUDGET,
+    SEARCH_BUDGET,
+    Budget,
+    MemoryStore,
+    RateLimitMiddleware,
+    SQLiteStore,
+    budget_for,
+    client_key,
+)
+
+BUDGET = Budget("test", 60, 3)  # one token per second, burst 3
+
+
+@pytest.mark.parametrize("method, path, expected", [
+    ("GET", "/search", SEARCH_BUDGET),
+    ("GET", "/search/", SEARCH_BUDGET),
+    ("GET", "/search/suggest", SEARCH_BUDGET),
+    ("GET", "/search/export", EXPORT_BUDGET),
+    ("GET", "/recommendations", SEARCH_BUDGET),
+    ("GET", "/nearby", SEARCH_BUDGET),
+    ("GET", "/map", SEARCH_BUDGET),
+    ("POST", "/auth/login", LOGIN_BUDGET),
+    ("POST", "/auth/register", REGISTER_BUDGET),
+    ("POST", "/auth/register/tenant", REGISTER_BUDGET),
+    ("GET", "/auth/login", None),
+    ("POST", "/search", None),
+    ("GET", "/health", None),
+    ("GET", "/properties/PUNE001", None),
+])
+def test_budget_for(method, path, expected):
+    assert budget_for(method, path) == expected
+
+
+def test_parse_budget_rejects_bad_values(monkeypatch):
+    monkeypatch.setenv("RENTSURE_RATE_LIMIT_SEARCH", "lots")
+    with pytest.raises(ValueError):
+        rate_limit.parse_budget("search", "120:30")
+    monkeypatch.setenv("RENTSURE_RATE_LIMIT_SEARCH", "0:5")
+    with pytest.raises(ValueError):
+        rate_limit.parse_budget("search", "120:30")
+
+
+# ============================================================================
+# Bucket stores
+# ============================================================================
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return MemoryStore()
+    return SQLiteStore(str(tmp_path / "buckets.db"))
+
+
+def test_bucket_allows_burst_then_refills(store):
+    now = 1000.0
+    assert [store.take("k", BUDGET, now)[0] for _ in range(3)] == [True, True, True]
+    allowed, retry_after = store.take("k", BUDGET, now)
+    assert not allowed
+    assert retry_after == pytest.approx(1.0)
+    # Half a token later: still empty, half the wait left
+    allowed, retry_after = store.take("k", BUDGET, now + 0.5)
+    assert not allowed
+    assert retry_after == pytest.approx(0.5)
+    assert store.take("k", BUDGET, now + 1.0)[0]
+    # Refill stops at the burst size
+    assert [store.take("k", BUDGET, now + 100)[0] for _ in range(4)] == [True, True, True, False]
+
+
+def test_buckets_are_per_key(store):
+    for _ in range(3):
+        store.take("a", BUDGET, 0.0)
+    assert not store.take("a", BUDGET, 0.0)[0]
+    assert store.take("b", BUDGET, 0.0)[0]
+
+
+def test_sqlite_store_is_shared_between_workers(tmp_path):
+    path = str(tmp_path / "buckets.db")
+    first, second = SQLiteStore(path), SQLiteStore(path)
+    assert first.take("k", BUDGET, 0.0)[0]
+    assert second.take("k", BUDGET, 0.0)[0]
+    assert first.take("k", BUDGET, 0.0)[0]
+    assert not second.take("k", BUDGET, 0.0)[0]
+
+
+def test_sqlite_store_prunes_idle_buckets(tmp_path, monkeypatch):
+    monkeypatch.setattr(rate_limit, "SQLITE_PRUNE_EVERY", 2)
+    path = str(tmp_path / "buckets.db")
+    store = SQLiteStore(path)
+    store.take("idle", BUDGET, 0.0)
+    store.take("active", BUDGET, rate_limit.SQLITE_BUCKET_TTL_SECONDS + 1)
+    keys = {row[0] for row in sqlite3.connect(path).execute("SELECT key FROM rate_limit_buckets")}
+    assert keys == {"active"}
+
+
+def test_memory_store_prunes_full_buckets_first():
+    store = MemoryStore(max_buckets=3)
+    store.take("idle", BUDGET, 0.0)
+    store.take("busy-1", BUDGET, 9.0)
+    store.take("busy-2", BUDGET, 9.0)
+    store.take("new", BUDGET, 10.0)
+    assert set(store._buckets) == {"busy-1", "busy-2", "new"}
+
+
+# ============================================================================
+# Client keys
+# ============================================================================
+
+def scope_with(headers=(), client=("10.0.0.1", 5000)):
+    return {
+        "type": "http",
+        "headers": [(name.encode(), value.encode()) for name, value in headers],
+        "client": client,
+    }
+
+
+def test_client_key_ignores_forwarded_for_without_trusted_proxies():
+    scope = scope_with([("x-forwarded-for", "1.2.3.4")])
+    assert client_key(scope, trusted_hops=0) == "ip:10.0.0.1"
+
+
+def test_client_key_uses_entry_appended_by_trusted_proxy():
+    # The client sent "6.6.6.6"; the router appended the address it saw
+    scope = scope_with([("x-forwarded-for", "6.6.6.6, 203.0.113.9")])
+    assert client_key(scope, trusted_hops=1) == "ip:203.0.113.9"
+    scope = scope_with([("x-forwarded-for", "6.6.6.6"), ("x-forwarded-for", "203.0.113.9, 10.1.1.1")])
+    assert client_key(scope, trusted_hops=2) == "ip:203.0.113.9"
+
+
+def test_client_key_falls_back_when_header_is_short():
+    scope = scope_with([("x-forwarded-for", "203.0.113.9")])
+    assert client_key(scope, trusted_hops=2) == "ip:10.0.0.1"
+    assert client_key(scope_with(client=None), trusted_hops=1) == "ip:unknown"
+
+
+def test_client_key_prefers_token_user():
+    from auth_utils import create_access_token
+
+    token = create_access_token({"user_id": 42, "role": "tenant"})
+    scope = scope_with([("authorization", f"Bearer {token}")])
+    assert client_key(scope) == "sub:42"
+    scope = scope_with([("authorization", "Bearer not-a-token")])
+    assert client_key(scope) == "ip:10.0.0.1"
+
+
+# ============================================================================
+# Middleware
+# ============================================================================
+
+async def inner_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+def call(middleware, path="/search", method="GET"):
+    messages = []
+    scope = dict(scope_with(), method=method, path=path)
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(middleware(scope, receive, send))
+    return messages
+
+
+def test_middleware_rejects_over_budget_clients():
+    middleware = RateLimitMiddleware(inner_app, store=MemoryStore(), enabled=True)
+    statuses = [call(middleware)[0]["status"] for _ in range(SEARCH_BUDGET.burst)]
+    assert statuses == [200] * SEARCH_BUDGET.burst
+
+    start, body = call(middleware)
+    assert start["status"] == 429
+    headers = dict(start["headers"])
+    assert int(headers[b"retry-after"]) >= 1
+    assert json.loads(body["body"])["retry_after"] == int(headers[b"retry-after"])
+    # Unlimited routes are untouched
+    assert call(middleware, path="/health")[0]["status"] == 200
+
+
+def test_middleware_runs_blocking_store_and_fails_open(tmp_path):
+    class BrokenStore(SQLiteStore):
+        def take(self, key, budget, now=None):
+            raise sqlite3.OperationalError("database is locked")
+
+    middleware = RateLimitMiddleware(inner_app, store=BrokenStore(str(tmp_path / "b.db")), enabled=True)
+    before = rate_limit.RATE_LIMIT_STORE_ERRORS._values.get((), 0)
+    assert call(middleware)[0]["status"] == 200
+    assert rate_limit.RATE_LIMIT_STORE_ERRORS._values.get((), 0) == before + 1
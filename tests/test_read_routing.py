@@ -0,0 +1,119 @@
+"""RoutingSession: reads on the replica, writes and read-your-writes on the primary."""
+import asyncio
+
+import pytest
+from sqlalchemy import Column, Integer, String, insert, select, update
+from sqlalchemy.orm import declarative_base, sessionmaker
+
+from models import AsyncReadSessionLocal, RoutingSession, create_async_db_engine, create_db_engine
+
+NoteBase = declarative_base()
+
+
+class Note(NoteBase):
+    __tablename__ = "notes"
+
+    id = Column(Integer, primary_key=True)
+    body = Column(String)
+
+
+def make_engine(path, label):
+    """A file database holding one note that names the database."""
+    engine = create_db_engine(f"sqlite:///{path}")
+    NoteBase.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(Note).values(id=1, body=label))
+    return engine
+
+
+@pytest.fixture
+def engines(tmp_path):
+    primary = make_engine(tmp_path / "primary.db", "primary")
+    replica = make_engine(tmp_path / "replica.db", "replica")
+    yield primary, replica
+    primary.dispose()
+    replica.dispose()
+
+
+@pytest.fixture
+def session_factory(engines):
+    primary, replica = engines
+    return sessionmaker(class_=RoutingSession, autoflush=False, primary=primary, replica=replica)
+
+
+def read_source(db):
+    """Which database answered: the note with id 1 is named after it."""
+    return db.execute(select(Note.body).where(Note.id == 1)).scalar_one()
+
+
+def bodies(engine):
+    with engine.connect() as conn:
+        return sorted(conn.execute(select(Note.body)).scalars())
+
+
+def test_reads_go_to_the_replica(session_factory, engines):
+    with session_factory() as db:
+        assert read_source(db) == "replica"
+        assert db.get_bind() is engines[1]
+
+
+def test_flush_writes_to_the_primary_and_later_reads_stay_there(session_factory, engines):
+    primary, replica = engines
+    with session_factory() as db:
+        assert read_source(db) == "replica"
+        db.add(Note(id=2, body="new"))
+        db.flush()
+        assert read_source(db) == "primary"
+        db.commit()
+        assert read_source(db) == "primary"
+    assert bodies(primary) == ["new", "primary"]
+    assert bodies(replica) == ["replica"]
+
+
+def test_dml_statements_use_the_primary_and_keep_the_session_there(session_factory, engines):
+    primary, replica = engines
+    with session_factory() as db:
+        db.execute(update(Note).where(Note.id == 1).values(body="primary, updated"))
+        # Still inside the write transaction: the read must see the update
+        assert read_source(db) == "primary, updated"
+        db.commit()
+    assert bodies(primary) == ["primary, updated"]
+    assert bodies(replica) == ["replica"]
+
+
+def test_autoflush_before_a_read_uses_the_primary(engines):
+    primary, replica = engines
+    factory = sessionmaker(class_=RoutingSession, autoflush=True, primary=primary, replica=replica)
+    with factory() as db:
+        db.add(Note(id=2, body="pending"))
+        # The query autoflushes first, which routes it to the primary
+        assert db.execute(select(Note.body).where(Note.id == 2)).scalar_one() == "pending"
+        db.rollback()
+    assert bodies(primary) == ["primary"]
+
+
+def test_without_a_replica_everything_uses_the_primary(engines):
+    primary, _ = engines
+    with sessionmaker(class_=RoutingSession, primary=primary, replica=None)() as db:
+        assert read_source(db) == "primary"
+
+
+def test_async_read_sessions_route_the_same_way(tmp_path, engines):
+    async_primary = create_async_db_engine(f"sqlite+aiosqlite:///{tmp_path / 'primary.db'}")
+    async_replica = create_async_db_engine(f"sqlite+aiosqlite:///{tmp_path / 'replica.db'}")
+
+    async def scenario():
+        sources = []
+        async with AsyncReadSessionLocal(primary=async_primary.sync_engine, replica=async_replica.sync_engine) as db:
+            sources.append((await db.execute(select(Note.body).where(Note.id == 1))).scalar_one())
+            db.add(Note(id=2, body="async"))
+            await db.flush()
+            sources.append((await db.execute(select(Note.body).where(Note.id == 1))).scalar_one())
+            await db.commit()
+        await async_primary.dispose()
+        await async_replica.dispose()
+        return sources
+
+    assert asyncio.run(scenario()) == ["replica", "primary"]
+    assert bodies(engines[0]) == ["async", "primary"]
+    assert bodies(engines[1]) == ["replica"]
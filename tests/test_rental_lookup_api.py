@@ -0,0 +1,12 @@
+"""Listing id lookups are case- and whitespace-insensitive on every route."""
+import pytest
+
+
+@pytest.mark.parametrize("route", ["/rental/{id}", "/proximity/{id}", "/neighborhood/{id}", "/tiffin/{id}"])
+@pytest.mark.parametrize("property_id", ["PUNE002", "pune002", "Pune002%20"])
+def test_property_id_normalized(client, route, property_id):
+    assert client.get(route.format(id=property_id)).status_code == 200
+
+
+def test_unknown_property_is_404(client):
+    assert client.get("/proximity/NOPE999").status_code == 404
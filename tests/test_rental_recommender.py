@@ -0,0 +1,105 @@
+"""Scoring and the compact RentalProperty/RentalCatalog storage."""
+import os
+import random
+import subprocess
+import sys
+
+import pytest
+
+from rental_recommender import (
+    INTERNED_FIELDS,
+    RentalCatalog,
+    RentalProperty,
+    StudentProfile,
+    calculate_rental_recommendation_score,
+    recommend_rentals,
+    score_components,
+)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def reference_score(rental, student):
+    """The original per-listing scoring formula, kept as the reference."""
+    if rental.rent <= student.max_budget:
+        budget_fit = 30.0
+    else:
+        budget_fit = max(0, 30.0 * (student.max_budget / rental.rent))
+    if rental.distance_km <= student.preferred_distance_km:
+        distance_fit = 30.0
+    elif rental.distance_km <= student.preferred_distance_km * 2.0:
+        distance_fit = 30.0 * ((student.preferred_distance_km / rental.distance_km) ** 0.8)
+    else:
+        distance_fit = 0.0
+    safety = (rental.safety_score / 100.0) * 20.0
+    trust = (rental.trust_score / 100.0) * 20.0
+    return budget_fit, distance_fit, safety, trust, min(100.0, budget_fit + distance_fit + safety + trust)
+
+
+@pytest.fixture(scope="module")
+def rentals():
+    rng = random.Random(3)
+    return [
+        RentalProperty(
+            f"R{i:03d}",
+            rng.randrange(4000, 30000, 250),
+            round(rng.uniform(0.1, 12.0), 2),
+            rng.randint(0, 100),
+            rng.randint(0, 100),
+            neighborhood="".join(["Koth", "rud"]),  # a fresh, non-interned string
+            price_fairness=rng.choice(["Fair", "Low", "High"]),
+        )
+        for i in range(200)
+    ]
+
+
+PROFILES = [StudentProfile(10000, 2.0), StudentProfile(15000, 5.0), StudentProfile(25000, 0.5), StudentProfile(4000, 12.0)]
+
+
+@pytest.mark.parametrize("student", PROFILES)
+def test_scores_match_reference_formula(rentals, student):
+    catalog = RentalCatalog.from_rentals(rentals)
+    expected = [reference_score(rental, student) for rental in rentals]
+    assert [score_components(r.rent, r.distance_km, r.safety_score, r.trust_score, student) for r in rentals] == [
+        pytest.approx(components) for components in expected
+    ]
+    assert catalog.overall_scores(student) == pytest.approx([components[4] for components in expected])
+    result = calculate_rental_recommendation_score(rentals[0], student)
+    assert (result.budget_fit_score, result.distance_fit_score, result.overall_score) == pytest.approx(
+        (expected[0][0], expected[0][1], expected[0][4])
+    )
+
+
+@pytest.mark.parametrize("student", PROFILES)
+def test_catalog_ranking_matches_list_ranking(rentals, student):
+    catalog = RentalCatalog.from_rentals(rentals)
+    expected = sorted(rentals, key=lambda r: reference_score(r, student)[4], reverse=True)[:10]
+    assert [r.property_id for r in catalog.recommend(student, top_n=10)] == [r.property_id for r in expected]
+    assert [r.property_id for r in recommend_rentals(student, rentals, top_n=10)] == [r.property_id for r in expected]
+
+
+def test_score_cache_returns_same_scores(rentals):
+    catalog = RentalCatalog.from_rentals(rentals)
+    first = catalog.overall_scores(PROFILES[0])
+    assert catalog.overall_scores(PROFILES[0]) is first
+    assert catalog.overall_scores(PROFILES[1]) != first
+
+
+def test_categorical_fields_are_interned(rentals):
+    for field in ("neighborhood", "price_fairness"):
+        assert field in INTERNED_FIELDS
+        values = {id(getattr(rental, field)) for rental in rentals}
+        assert len(values) == len({getattr(rental, field) for rental in rentals})
+        assert all(getattr(rental, field) is sys.intern(getattr(rental, field)) for rental in rentals)
+
+
+def test_rental_property_is_slotted():
+    rental = RentalProperty("S1", 9000, 1.0, 80, 70)
+    assert not hasattr(rental, "__dict__")
+    assert rental == RentalProperty("S1", 9000, 1.0, 80, 70)
+
+
+def test_scoring_module_does_not_import_the_index_layer():
+    code = "import sys, rental_recommender; print(sorted({'geo_index', 'facets'} & set(sys.modules)))"
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, cwd=ROOT)
+    assert output.stdout.strip() == "[]"
@@ -0,0 +1,110 @@
+"""SingleFlight: one computation per key for concurrent callers."""
+import asyncio
+import threading
+
+import pytest
+
+from request_coalescing import SingleFlight
+
+
+def gated(result=None, error=None):
+    """A blocking function that counts calls and waits until released."""
+    calls = []
+    release = threading.Event()
+
+    def func(*args):
+        calls.append(args)
+        release.wait(5)
+        if error is not None:
+            raise error
+        return result
+
+    return func, calls, release
+
+
+async def until(condition):
+    for _ in range(500):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("condition not reached")
+
+
+def test_concurrent_callers_share_one_computation():
+    flight = SingleFlight()
+    func, calls, release = gated(result=["ranked"])
+
+    async def scenario():
+        waiters = [asyncio.ensure_future(flight.run(("pune", 5), func, "pune")) for _ in range(20)]
+        await until(lambda: calls)
+        assert flight.in_flight() == 1
+        release.set()
+        return await asyncio.gather(*waiters)
+
+    results = asyncio.run(scenario())
+    assert calls == [("pune",)]
+    assert results == [["ranked"]] * 20
+    assert all(result is results[0] for result in results)
+    assert flight.in_flight() == 0
+
+
+def test_distinct_keys_run_separately():
+    flight = SingleFlight()
+
+    async def scenario():
+        return await asyncio.gather(*(flight.run(key, lambda k=key: k.upper()) for key in ("a", "b", "a")))
+
+    assert asyncio.run(scenario()) == ["A", "B", "A"]
+
+
+def test_every_waiter_gets_the_same_exception():
+    flight = SingleFlight()
+    func, calls, release = gated(error=ValueError("scoring failed"))
+
+    async def scenario():
+        waiters = [asyncio.ensure_future(flight.run("key", func)) for _ in range(5)]
+        await until(lambda: calls)
+        release.set()
+        return await asyncio.gather(*waiters, return_exceptions=True)
+
+    errors = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert all(isinstance(error, ValueError) for error in errors)
+    assert all(error is errors[0] for error in errors)
+    assert flight.in_flight() == 0
+
+
+def test_cancelled_waiter_does_not_cancel_the_shared_computation():
+    flight = SingleFlight()
+    func, calls, release = gated(result=42)
+
+    async def scenario():
+        leaving = asyncio.ensure_future(flight.run("key", func))
+        staying = asyncio.ensure_future(flight.run("key", func))
+        await until(lambda: calls)
+        leaving.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leaving
+        release.set()
+        return await staying
+
+    assert asyncio.run(scenario()) == 42
+    assert len(calls) == 1
+
+
+def test_key_is_forgotten_after_completion():
+    flight = SingleFlight()
+    calls = []
+
+    def func():
+        calls.append(1)
+        return len(calls)
+
+    async def scenario():
+        first = await flight.run("key", func)
+        assert flight.in_flight() == 0
+        second = await flight.run("key", func)
+        return first, second
+
+    # Results are not cached: a later call recomputes
+    assert asyncio.run(scenario()) == (1, 2)
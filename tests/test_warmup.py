@@ -0,0 +1,45 @@
+"""Worker warmup: in-process replays and the /ready probe."""
+import asyncio
+import time
+
+import metrics
+import warmup
+from metrics import MetricsMiddleware
+from rate_limit import SEARCH_BUDGET, MemoryStore, RateLimitMiddleware
+
+
+async def inner_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+def test_warmup_requests_skip_rate_limits_and_metrics():
+    app = MetricsMiddleware(RateLimitMiddleware(inner_app, store=MemoryStore(), enabled=True))
+    before = dict(metrics.HTTP_REQUESTS._values)
+
+    async def replay():
+        return [await warmup.asgi_get(app, "/search?city=pune") for _ in range(SEARCH_BUDGET.burst + 5)]
+
+    assert asyncio.run(replay()) == [200] * (SEARCH_BUDGET.burst + 5)
+    assert metrics.HTTP_REQUESTS._values == before
+
+
+def test_ready_is_503_until_warmup_has_run(client):
+    from fastapi.testclient import TestClient
+
+    from app import app
+
+    # The shared client skips the startup handlers, so nothing is warm yet
+    response = client.get("/ready")
+    assert response.status_code == 503
+    assert response.json()["checks"]["score_cache_primed"] is False
+
+    # Entering the client runs startup, which starts warmup in the background
+    with TestClient(app) as warm_client:
+        deadline = time.monotonic() + 60
+        while (response := warm_client.get("/ready")).status_code != 200 and time.monotonic() < deadline:
+            time.sleep(0.1)
+    body = response.json()
+    assert response.status_code == 200, body
+    assert all(body["checks"].values())
+    assert body["warmup_requests"] and all(status < 500 for status in body["warmup_requests"].values())
@@ -0,0 +1,271 @@
+"""
+Request tracing for RentSure
+
+OpenTelemetry-style spans (trace id, span id, parent, timings, attributes)
+kept in a contextvar, so phases of a request nest without passing anything
+around. A sampled request gets a root span from TracingMiddleware; code marks
+its phases with `with span("name"):` and SQL statements get spans from the
+shared SQLAlchemy cursor hooks in metrics.py. When a trace finishes, its
+spans go to the configured exporter:
+
+    RENTSURE_TRACE_SAMPLE_RATE  fraction of requests traced (default 0: off)
+    RENTSURE_TRACE_EXPORTER     "console" (default) or "file"
+    RENTSURE_TRACE_FILE         JSON-lines output of the file exporter
+
+An incoming W3C `traceparent` header with the sampled flag set is always
+traced and keeps its trace id. Outside a sampled request, span() is a no-op
+costing one contextvar read.
+"""
+import json
+import os
+import random
+import sys
+import threading
+import time
+from contextlib import nullcontext
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from metrics import StatementListener, add_statement_listener
+
+from metrics import route_label
+
+TRACE_SAMPLE_RATE = float(os.environ.get("RENTSURE_TRACE_SAMPLE_RATE", "0"))
+TRACE_EXPORTER = os.environ.get("RENTSURE_TRACE_EXPORTER", "console")
+TRACE_FILE = os.environ.get(
+    "RENTSURE_TRACE_FILE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "traces.jsonl"),
+)
+# SQL text recorded on db spans is cut to this many characters
+MAX_STATEMENT_CHARS = 500
+
+_NOOP = nullcontext()
+
+
+class _Trace:
+    """Finished spans of one trace, exported together when the root ends."""
+
+    __slots__ = ("trace_id", "spans", "lock", "exported")
+
+    def __init__(self, trace_id: str) -> None:
+        self.trace_id = trace_id
+        self.spans: List["Span"] = []
+        self.lock = threading.Lock()
+        self.exported = False
+
+
+class Span:
+    """One timed operation within a trace."""
+
+    __slots__ = ("name", "trace", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "_token")
+
+    def __init__(self, name: str, trace: _Trace, parent_id: Optional[str], attributes: Dict[str, Any]) -> None:
+        self.name = name
+        self.trace = trace
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes
+        self._token = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def end(self) -> None:
+        self.end_ns = time.time_ns()
+        trace = self.trace
+        with trace.lock:
+            if not trace.exported:
+                trace.spans.append(self)
+
+    def __enter__(self) -> "Span":
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is not None:
+            self.attributes["error"] = True
+            self.attributes["exception.type"] = exc_type.__name__
+        _current_span.reset(self._token)
+        self.end()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_id,
+            "name": self.name,
+            "start_time_unix_nano": self.start_ns,
+            "end_time_unix_nano": self.end_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "attributes": self.attributes,
+        }
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("rentsure_current_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def span(name: str, **attributes: Any):
+    """Child span of the active span; a no-op when the request is not traced."""
+    parent = _current_span.get()
+    if parent is None:
+        return _NOOP
+    return Span(name, parent.trace, parent.span_id, attributes)
+
+
+# ============================================================================
+# Exporters
+# ============================================================================
+
+class ConsoleExporter:
+    """Prints each trace as an indented tree of span durations."""
+
+    def export(self, spans: List[Span]) -> None:
+        children: Dict[Optional[str], List[Span]] = {}
+        ids = {s.span_id for s in spans}
+        for s in sorted(spans, key=lambda s: s.start_ns):
+            # Spans whose parent was not recorded hang off the root
+            children.setdefault(s.parent_id if s.parent_id in ids else None, []).append(s)
+        lines = [f"✓ Trace {spans[0].trace.trace_id}"]
+
+        def walk(parent: Optional[str], depth: int) -> None:
+            for s in children.get(parent, []):
+                duration = (s.end_ns - s.start_ns) / 1e6
+                attrs = " ".join(f"{key}={value}" for key, value in s.attributes.items() if key != "db.statement")
+                lines.append(f"  {'  ' * depth}{s.name} {duration:.2f}ms {attrs}".rstrip())
+                walk(s.span_id, depth + 1)
+
+        walk(None, 0)
+        print("\n".join(lines), file=sys.stderr)
+
+
+class FileExporter:
+    """Appends one JSON object per span to a JSON-lines file."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, spans: List[Span]) -> None:
+        payload = "".join(json.dumps(s.to_dict(), default=str) + "\n" for s in spans)
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(payload)
+
+
+def _make_exporter(kind: str):
+    if kind == "file":
+        return FileExporter(TRACE_FILE)
+    if kind != "console":
+        print(f"⚠ Unknown RENTSURE_TRACE_EXPORTER {kind!r}; using console")
+    return ConsoleExporter()
+
+
+exporter = _make_exporter(TRACE_EXPORTER)
+
+
+def _export(trace: _Trace) -> None:
+    with trace.lock:
+        trace.exported = True
+        spans = trace.spans
+        trace.spans = []
+    if spans:
+        try:
+            exporter.export(spans)
+        except OSError as e:
+            print(f"⚠ Trace export failed: {e}")
+
+
+# ============================================================================
+# Sampling & request middleware
+# ============================================================================
+
+def _parse_traceparent(header: Optional[bytes]) -> Optional[Tuple[str, str]]:
+    """(trace_id, parent span id) of a sampled W3C traceparent header."""
+    if not header:
+        return None
+    parts = header.decode("latin-1").strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        sampled = int(parts[3], 16) & 1
+    except ValueError:
+        return None
+    return (parts[1], parts[2]) if sampled else None
+
+
+def start_trace(name: str, parent: Optional[Tuple[str, str]] = None, **attributes: Any) -> Span:
+    """Root span of a new trace (or of a remote parent's trace)."""
+    trace_id, parent_id = parent if parent else (os.urandom(16).hex(), None)
+    return Span(name, _Trace(trace_id), parent_id, attributes)
+
+
+class TracingMiddleware:
+    """ASGI middleware that opens a root span for sampled requests."""
+
+    def __init__(self, app: Callable, sample_rate: float = TRACE_SAMPLE_RATE) -> None:
+        self.app = app
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        remote = _parse_traceparent(dict(scope["headers"]).get(b"traceparent"))
+        if remote is None and (self.sample_rate <= 0 or random.random() >= self.sample_rate):
+            await self.app(scope, receive, send)
+            return
+
+        root = start_trace(scope["method"], remote, **{"http.method": scope["method"], "http.target": scope["path"]})
+
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                root.set_attribute("http.status_code", message["status"])
+            await send(message)
+
+        try:
+            with root:
+                await self.app(scope, receive, send_wrapper)
+        finally:
+            root.name = f"{scope['method']} {route_label(scope)}"
+            _export(root.trace)
+
+
+# ============================================================================
+# SQLAlchemy spans
+# ============================================================================
+
+def _before_statement(conn, cursor, statement, context) -> None:
+    parent = _current_span.get()
+    if parent is not None:
+        # Leaf span: ended by the after/error hook, never made current
+        context._rentsure_span = Span("db.query", parent.trace, parent.span_id, {
+            "db.system": conn.dialect.name,
+            "db.statement": statement[:MAX_STATEMENT_CHARS],
+        })
+
+
+def _after_statement(conn, cursor, statement, context, elapsed) -> None:
+    db_span = getattr(context, "_rentsure_span", None)
+    if db_span is not None:
+        if cursor.rowcount >= 0:
+            db_span.set_attribute("db.rows", cursor.rowcount)
+        db_span.end()
+
+
+def _statement_error(exception_context) -> None:
+    context = exception_context.execution_context
+    db_span = getattr(context, "_rentsure_span", None) if context is not None else None
+    if db_span is not None:
+        db_span.set_attribute("error", True)
+        db_span.set_attribute("exception.type", type(exception_context.original_exception).__name__)
+        db_span.end()
+
+
+def instrument_sqlalchemy() -> None:
+    """Record a span for every SQL statement run inside a traced request."""
+    add_statement_listener(StatementListener(_before_statement, _after_statement, _statement_error))
@@ -0,0 +1,117 @@
+"""
+Worker warmup for RentSure
+
+Helpers for the warmup routine that runs before a worker reports ready on
+/ready. It opens connection pool connections ahead of the first request and
+replays representative GET requests through the ASGI app in-process. The
+replay runs the real routing, handlers, DB queries and JSON encoding with no
+network hop; it is marked in the scope, so it is neither rate limited nor
+recorded in /metrics.
+
+    RENTSURE_WARMUP_DB_CONNECTIONS  connections opened per pool (default 2)
+"""
+import asyncio
+import os
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from metrics import WARMUP_SCOPE_KEY
+
+WARMUP_DB_CONNECTIONS = int(os.environ.get("RENTSURE_WARMUP_DB_CONNECTIONS", "2"))
+
+
+# ============================================================================
+# Connection pools
+# ============================================================================
+
+def _pool_capacity(engine: Engine, count: int) -> int:
+    size = getattr(engine.pool, "size", None)
+    return min(count, size()) if callable(size) else count
+
+
+def open_pool_connections(engine: Engine, count: int = WARMUP_DB_CONNECTIONS) -> None:
+    """Open `count` connections at once so the pool keeps them idle."""
+    connections = []
+    try:
+        for _ in range(_pool_capacity(engine, count)):
+            connection = engine.connect()
+            connections.append(connection)
+            connection.execute(text("SELECT 1"))
+    finally:
+        for connection in connections:
+            connection.close()
+
+
+async def open_async_pool_connections(engine: AsyncEngine, count: int = WARMUP_DB_CONNECTIONS) -> None:
+    """Async counterpart of open_pool_connections.
+
+    Must run on the serving event loop: async drivers bind their connections
+    to the loop that opened them.
+    """
+    connections = []
+    try:
+        for _ in range(_pool_capacity(engine.sync_engine, count)):
+            connection = await engine.connect()
+            connections.append(connection)
+            await connection.execute(text("SELECT 1"))
+    finally:
+        for connection in connections:
+            await connection.close()
+
+
+def open_connections(engine: Engine) -> Optional[int]:
+    """Connections the pool holds open (idle or in use); None if it does not pool."""
+    pool = engine.pool
+    if not hasattr(pool, "checkedin"):
+        return None
+    return pool.checkedin() + pool.checkedout()
+
+
+# ============================================================================
+# In-process requests
+# ============================================================================
+
+async def asgi_get(app: Callable, path: str) -> int:
+    """GET `path` from the ASGI app in-process and return the status code."""
+    path, _, query = path.partition("?")
+    scope: Dict[str, Any] = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": query.encode(),
+        "headers": [(b"host", b"warmup"), (b"user-agent", b"rentsure-warmup")],
+        "client": ("127.0.0.1", 0),
+        "server": ("warmup", 80),
+        WARMUP_SCOPE_KEY: True,
+    }
+    messages: List[Dict[str, Any]] = []
+    request_sent = False
+    response_complete = asyncio.Event()
+
+    async def receive() -> Dict[str, Any]:
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # Later reads are disconnect listeners (e.g. streaming responses)
+        await response_complete.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message: Dict[str, Any]) -> None:
+        messages.append(message)
+        if message["type"] == "http.response.body" and not message.get("more_body", False):
+            response_complete.set()
+
+    await app(scope, receive, send)
+    for message in messages:
+        if message["type"] == "http.response.start":
+            return message["status"]
+    return 500